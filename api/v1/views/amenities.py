@@ -1,6 +1,8 @@
 #!/usr/bin/python3
 """API Module for amenity endpoints"""
 from api.v1.views import app_views
+from api.v1.views.conditional import conditional
+from api.v1.views.pagination import paginate
 from flask import abort, jsonify, make_response, request
 from models import storage
 from models.amenity import Amenity
@@ -21,21 +23,21 @@ def serialize_to_json(obj):
 
 
 @app_views.route('/amenities', methods=['GET'], strict_slashes=False)
+@conditional(Amenity)
 def get_amenities():
     """
     Retrieves all amenities and returns a JSON response.
 
     Returns:
-        Response: A JSON response containing a list of all amenities.
+        Response: A JSON response containing a list of the amenities,
+        one page of them when `limit` or `cursor` is given.
     """
-    all_amenities = [
-        serialize_to_json(value) for value in storage.all(Amenity).values()
-        ]
-    return jsonify(all_amenities)
+    return paginate(Amenity)
 
 
 @app_views.route('/amenities/<string:amenity_id>', methods=['GET'],
                  strict_slashes=False)
+@conditional(Amenity)
 def get_amenity(amenity_id):
     """
     Retrieves a specific amenity by ID and returns a JSON response.
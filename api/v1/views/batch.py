@@ -0,0 +1,112 @@
+#!/usr/bin/python3
+"""API Module for the batch endpoint"""
+from api.v1.views import app_views
+from flask import current_app, jsonify, make_response, request
+from models import storage
+import sys
+
+# integer - most sub-requests a batch may hold
+MAX_REQUESTS = 100
+
+
+class _Failed(Exception):
+    """raised to roll back an atomic batch whose sub-request failed"""
+
+
+@app_views.route('/batch', methods=['POST'], strict_slashes=False)
+def batch():
+    """
+    Runs several requests to the API in one.
+
+    The JSON body is a list of sub-requests, or an object holding it as
+    `requests` and `atomic`. Each sub-request has a `method` (GET by
+    default), a `path` relative to /api/v1 and, for writes, a JSON `body`.
+    They run in order in the storage session of the batch, so the objects
+    looked up by one are not fetched again by the next. When atomic is
+    true, the writes are saved at once after the last sub-request, and
+    none of them is if one fails: the sub-requests after it are not run.
+
+    Returns:
+        Response: A JSON response containing the list of the `status`,
+        `headers` and `body` of each sub-request, with a 409 status if an
+        atomic batch was rolled back, or an error response if the body is
+        invalid.
+    """
+    data = request.get_json(silent=True)
+    atomic = False
+    if isinstance(data, dict):
+        atomic = data.get("atomic", False)
+        data = data.get("requests")
+    if not isinstance(data, list) or \
+            not all(isinstance(sub, dict) for sub in data):
+        return make_response(jsonify({"error": "Not a list of requests"}),
+                             400)
+    if len(data) > MAX_REQUESTS:
+        return make_response(jsonify(
+            {"error": "More than {} requests".format(MAX_REQUESTS)}), 400)
+    if not isinstance(atomic, bool):
+        return make_response(jsonify({"error": "atomic must be a boolean"}),
+                             400)
+    results = []
+    if not atomic:
+        with storage.pinned():
+            for sub in data:
+                results.append(_run(sub, atomic))
+        return jsonify(results)
+    try:
+        with storage.pinned(), storage.transaction():
+            for sub in data:
+                results.append(_run(sub, atomic))
+                if results[-1]["status"] >= 400:
+                    raise _Failed()
+    except _Failed:
+        results.extend({"status": 424, "headers": {},
+                        "body": {"error": "Not run"}}
+                       for sub in data[len(results):])
+        return make_response(jsonify(results), 409)
+    return jsonify(results)
+
+
+def _run(sub, atomic):
+    """
+    Runs a sub-request of a batch.
+
+    Args:
+        sub (dict): The `method`, `path` and `body` of the sub-request.
+        atomic (bool): Whether the batch is rolled back if it fails.
+
+    Returns:
+        dict: The `status`, `headers` and `body` of its response.
+    """
+    path = sub.get("path")
+    method = sub.get("method", "GET")
+    if not isinstance(path, str) or not isinstance(method, str):
+        return _error(400, "Missing path or method")
+    prefix = app_views.url_prefix
+    if not path.startswith(prefix + "/"):
+        path = prefix + "/" + path.lstrip("/")
+    kwargs = {"json": sub["body"]} if "body" in sub else {}
+    with current_app.test_request_context(path, request.host_url,
+                                          method=method.upper(), **kwargs):
+        # the route the path matches, however it is spelled
+        if request.endpoint == "app_views.batch":
+            return _error(400, "Batches cannot be nested")
+        try:
+            response = current_app.full_dispatch_request()
+            body = response.get_data(as_text=True)
+        except Exception:
+            current_app.log_exception(sys.exc_info())
+            if not atomic:
+                # the session may be unusable, start a new one
+                storage.close()
+            return _error(500, "Internal server error")
+    headers = {key: value for key, value in response.headers.items()
+               if key not in ("Content-Type", "Content-Length")}
+    return {"status": response.status_code, "headers": headers,
+            "body": response.get_json(silent=True)
+            if response.is_json else body}
+
+
+def _error(status, message):
+    """returns the result of a sub-request rejected with message"""
+    return {"status": status, "headers": {}, "body": {"error": message}}
@@ -0,0 +1,206 @@
+#!/usr/bin/python3
+"""API Module for the bulk endpoints of the resources"""
+from api.v1.views import app_views
+from flask import jsonify, make_response, request
+from models import storage
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+# integer - most items a bulk request may hold
+MAX_ITEMS = 1000
+# dictionary - <resource> -> its class, the keys an item to create must
+# hold, the classes of the objects those ids refer to, and the keys an
+# update leaves alone
+RESOURCES = {
+    "states": {"cls": State, "required": ("name",), "parents": {},
+               "ignored": ("id", "created_at", "updated_at")},
+    "cities": {"cls": City, "required": ("state_id", "name"),
+               "parents": {"state_id": State},
+               "ignored": ("id", "state_id", "created_at", "updated_at")},
+    "amenities": {"cls": Amenity, "required": ("name",), "parents": {},
+                  "ignored": ("id", "created_at", "updated_at")},
+    "users": {"cls": User, "required": ("email", "password"), "parents": {},
+              "ignored": ("id", "email", "created_at", "updated_at")},
+    "places": {"cls": Place, "required": ("city_id", "user_id", "name"),
+               "parents": {"city_id": City, "user_id": User},
+               "ignored": ("id", "user_id", "city_id", "created_at",
+                           "updated_at")},
+    "reviews": {"cls": Review, "required": ("place_id", "user_id", "text"),
+                "parents": {"place_id": Place, "user_id": User},
+                "ignored": ("id", "user_id", "place_id", "created_at",
+                            "updated_at")},
+}
+
+
+@app_views.route('/states/bulk', methods=['POST', 'PATCH', 'DELETE'],
+                 strict_slashes=False, defaults={"resource": "states"})
+@app_views.route('/cities/bulk', methods=['POST', 'PATCH', 'DELETE'],
+                 strict_slashes=False, defaults={"resource": "cities"})
+@app_views.route('/amenities/bulk', methods=['POST', 'PATCH', 'DELETE'],
+                 strict_slashes=False, defaults={"resource": "amenities"})
+@app_views.route('/users/bulk', methods=['POST', 'PATCH', 'DELETE'],
+                 strict_slashes=False, defaults={"resource": "users"})
+@app_views.route('/places/bulk', methods=['POST', 'PATCH', 'DELETE'],
+                 strict_slashes=False, defaults={"resource": "places"})
+@app_views.route('/reviews/bulk', methods=['POST', 'PATCH', 'DELETE'],
+                 strict_slashes=False, defaults={"resource": "reviews"})
+def bulk(resource):
+    """
+    Creates, updates or deletes several objects of a resource in one.
+
+    The JSON body is a list of items: with POST, the objects to create, as
+    their single POST takes them along with the ids of their parents
+    (`state_id` of a city, `city_id` of a place, `place_id` of a review);
+    with PATCH, the `id` of each object to update and the attributes to
+    set; with DELETE, the ids of the objects to delete, or objects holding
+    them as `id`. Every item is validated and the objects it refers to are
+    looked up at once, then the valid items are applied and saved at once:
+    the invalid ones are skipped, and none is saved if saving fails.
+
+    Args:
+        resource (string): The name of the resource, e.g. states.
+
+    Returns:
+        Response: A JSON response containing the list of the `status`
+        (201 created, 200 updated or deleted, 400 invalid, 404 not found)
+        and `body` (the object, or the error) of each item, or an error
+        response if the body is not a list.
+    """
+    items = request.get_json(silent=True)
+    if not isinstance(items, list):
+        return make_response(jsonify({"error": "Not a list"}), 400)
+    if len(items) > MAX_ITEMS:
+        return make_response(jsonify(
+            {"error": "More than {} items".format(MAX_ITEMS)}), 400)
+    apply = {"POST": _create, "PATCH": _update, "DELETE": _delete}
+    with storage.transaction():
+        results = apply[request.method](RESOURCES[resource], items)
+    return jsonify(results)
+
+
+def _create(spec, items):
+    """
+    Creates the objects of the valid items.
+
+    Args:
+        spec (dict): The entry of RESOURCES of the resource.
+        items (list): The attributes of each object to create.
+
+    Returns:
+        list: The result of each item.
+    """
+    results = [None] * len(items)
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[i] = _error(400, "Not a JSON")
+            continue
+        for key in spec["required"]:
+            if key not in item:
+                results[i] = _error(400, "Missing " + key)
+                break
+    found = {}
+    for key, cls in spec["parents"].items():
+        ids = {item[key] for item, result in zip(items, results)
+               if result is None and isinstance(item[key], str)}
+        found[key] = storage.get_many(cls, ids) if ids else {}
+    objs = []
+    for i, item in enumerate(items):
+        if results[i] is not None:
+            continue
+        if any("{}.{}".format(cls.__name__, item[key]) not in found[key]
+               for key, cls in spec["parents"].items()):
+            results[i] = _error(404, "Not found")
+            continue
+        objs.append((i, spec["cls"](**item)))
+    storage.bulk_new(obj for i, obj in objs)
+    for i, obj in objs:
+        results[i] = {"status": 201, "body": obj.to_dict()}
+    return results
+
+
+def _update(spec, items):
+    """
+    Sets the attributes of the valid items to the objects of their ids.
+
+    Args:
+        spec (dict): The entry of RESOURCES of the resource.
+        items (list): The id of each object to update and its attributes.
+
+    Returns:
+        list: The result of each item.
+    """
+    results = []
+    for item, (obj, error) in zip(items, _lookup(spec["cls"], items)):
+        if obj is None:
+            results.append(error)
+            continue
+        for key, value in item.items():
+            if key not in spec["ignored"]:
+                setattr(obj, key, value)
+        results.append({"status": 200, "body": obj.to_dict()})
+    return results
+
+
+def _delete(spec, items):
+    """
+    Deletes the objects of the valid items.
+
+    Args:
+        spec (dict): The entry of RESOURCES of the resource.
+        items (list): The id of each object to delete, or a dictionary
+        holding it.
+
+    Returns:
+        list: The result of each item.
+    """
+    items = [{"id": item} if isinstance(item, str) else item
+             for item in items]
+    results = []
+    deleted = set()
+    for obj, error in _lookup(spec["cls"], items):
+        if obj is None:
+            results.append(error)
+        elif obj.id in deleted:
+            results.append(_error(404, "Not found"))
+        else:
+            deleted.add(obj.id)
+            obj.delete()
+            results.append({"status": 200, "body": {}})
+    return results
+
+
+def _lookup(cls, items):
+    """
+    Looks the objects of cls the items refer to by their `id` up at once.
+
+    Args:
+        cls (class): The class of the objects.
+        items (list): The items.
+
+    Returns:
+        list: For each item, (its object, None), or (None, the result of
+        the item) if it is invalid or its object is not found.
+    """
+    ids = {item["id"] for item in items
+           if isinstance(item, dict) and isinstance(item.get("id"), str)}
+    found = storage.get_many(cls, ids) if ids else {}
+    objs = []
+    for item in items:
+        if not isinstance(item, dict):
+            objs.append((None, _error(400, "Not a JSON")))
+        elif not isinstance(item.get("id"), str):
+            objs.append((None, _error(400, "Missing id")))
+        else:
+            obj = found.get("{}.{}".format(cls.__name__, item["id"]))
+            objs.append((obj, None) if obj is not None
+                        else (None, _error(404, "Not found")))
+    return objs
+
+
+def _error(status, message):
+    """returns the result of an item rejected with message"""
+    return {"status": status, "body": {"error": message}}
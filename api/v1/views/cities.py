@@ -1,6 +1,8 @@
 #!/usr/bin/python3
 """API Module for city endpoints"""
 from api.v1.views import app_views
+from api.v1.views.conditional import conditional
+from api.v1.views.pagination import paginate
 from flask import abort, jsonify, make_response, request
 from models import storage
 from models.state import State
@@ -9,19 +11,20 @@ from models.city import City
 
 @app_views.route('/states/<string:state_id>/cities', methods=['GET'],
                  strict_slashes=False)
+@conditional(State, City)
 def get_cities(state_id):
     """
     Gets all the cities in the given state id
 
     Keyword arguments:
     state_id -- state id
-    Return: json list of all the cities in the state
+    Return: json list of the cities in the state, one page of them when
+    limit or cursor is given
     """
     state = storage.get(State, state_id)
     if state is None:
         abort(404)
-    all_cities = [value.to_dict() for value in state.cities]
-    return jsonify(all_cities)
+    return paginate(City, "state_id", state_id)
 
 
 @app_views.route('/states/<string:state_id>/cities', methods=['POST'],
@@ -51,6 +54,7 @@ def create_cities(state_id):
 
 @app_views.route('/cities/<string:city_id>', methods=['GET'],
                  strict_slashes=False)
+@conditional(City)
 def get_city(city_id):
     """
     Gets a city in the given city id
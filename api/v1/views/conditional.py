@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""Conditional GET of the views: ETag, Last-Modified and 304 responses"""
+from functools import wraps
+from flask import current_app, make_response, request
+from models import storage
+from werkzeug.http import is_resource_modified
+import zlib
+
+
+def conditional(*classes):
+    """
+    Makes the GET requests of a view conditional on the objects of classes.
+
+    Its 200 responses carry a strong ETag made of the storage versions of
+    classes, which change whenever one of their objects does, and their
+    Last-Modified. A request whose If-None-Match holds that ETag, or
+    without one whose If-Modified-Since is not older, gets an empty 304
+    response before the view looks any object up.
+
+    Args:
+        classes: The classes of the objects the view returns.
+
+    Returns:
+        function: A decorator of views.
+    """
+    def decorator(view):
+        """makes view conditional"""
+        @wraps(view)
+        def conditional_view(*args, **kwargs):
+            """runs the view if the objects it returns changed"""
+            if request.method not in ("GET", "HEAD"):
+                return view(*args, **kwargs)
+            etag, last_modified = validators(classes)
+            if not is_resource_modified(request.environ, etag=etag,
+                                        last_modified=last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            response.vary.add("Accept")
+            return response
+        return conditional_view
+    return decorator
+
+
+def validators(classes):
+    """
+    Computes the ETag and Last-Modified of the objects of classes, from
+    their storage versions, without looking any object up.
+
+    Args:
+        classes: The classes of the objects.
+
+    Returns:
+        tuple: The ETag, also depending on the Accept header since it
+        picks JSON or NDJSON, and the datetime of the last change.
+    """
+    versions = [storage.version(cls) for cls in classes]
+    etag = ".".join("{:x}-{:x}".format(version, int(
+        modified.timestamp() * 1000000)) for version, modified in versions)
+    accept = request.headers.get("Accept")
+    if accept:
+        etag += "-{:08x}".format(zlib.crc32(accept.encode()))
+    return etag, max(modified for version, modified in versions)
@@ -1,8 +1,9 @@
 #!/usr/bin/python3
 """Module for route /status"""
 from api.v1.views import app_views
-from flask import jsonify
-from models import storage
+from api.v1.views.conditional import conditional
+from flask import abort, jsonify
+from models import base_model, storage, storage_t
 from models.amenity import Amenity
 from models.city import City
 from models.place import Place
@@ -18,14 +19,33 @@ def status_view():
 
 
 @app_views.route("/stats", strict_slashes=False, methods=["GET"])
+@conditional(Amenity, City, Place, Review, State, User)
 def stats_view():
     """Returns statistics of classes in storage"""
+    counts = storage.counts()
     class_stats = {
-        "amenities": storage.count(Amenity),
-        "cities": storage.count(City),
-        "places": storage.count(Place),
-        "reviews": storage.count(Review),
-        "states": storage.count(State),
-        "users": storage.count(User)
+        "amenities": counts[Amenity.__name__],
+        "cities": counts[City.__name__],
+        "places": counts[Place.__name__],
+        "reviews": counts[Review.__name__],
+        "states": counts[State.__name__],
+        "users": counts[User.__name__]
     }
     return jsonify(class_stats)
+
+
+@app_views.route("/pool", strict_slashes=False, methods=["GET"])
+def pool_view():
+    """Returns the state of the database connection pool"""
+    if storage_t != "db":
+        abort(404)
+    return jsonify(storage.pool_stats())
+
+
+@app_views.route("/cache", strict_slashes=False, methods=["GET"])
+def cache_view():
+    """Returns the hits, misses and size of the to_dict() cache"""
+    if storage_t == "db":
+        abort(404)
+    with base_model.cache_lock:
+        return jsonify(base_model.cache_stats)
@@ -0,0 +1,185 @@
+#!/usr/bin/python3
+"""Pagination, field projection and streaming of the list endpoints"""
+import base64
+import json
+from flask import abort, current_app, jsonify, make_response, request
+from flask import Response, stream_with_context
+from models import storage
+from models.base_model import format_time, parse_time
+from urllib.parse import urlencode
+
+# integer - page size when a cursor is given without a limit
+DEFAULT_LIMIT = 100
+# integer - largest page size, a greater limit gets pages of this size
+MAX_LIMIT = 1000
+# integer - number of objects serialized per chunk of a streamed response
+CHUNK_SIZE = 500
+# string - media type of newline delimited JSON
+NDJSON = "application/x-ndjson"
+
+
+def encode_cursor(obj, value=None):
+    """
+    Encodes the position of an object in the (created_at, id) order.
+
+    Args:
+        obj: The last object of a page.
+        value: The value obj is ordered by before its id, if not its
+        created_at.
+
+    Returns:
+        str: An opaque, URL-safe cursor to the objects coming after obj.
+    """
+    if value is None:
+        value = format_time(obj.created_at)
+    position = json.dumps([value, obj.id])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor, parse=parse_time):
+    """
+    Decodes a cursor made by encode_cursor.
+
+    Args:
+        cursor (str): The cursor given in the query string.
+        parse: Converts the value encoded before the id back.
+
+    Returns:
+        tuple: The (created_at, id), or (value, id), the next page starts
+        after.
+    """
+    try:
+        value, id = json.loads(base64.urlsafe_b64decode(cursor))
+        return (parse(value), id)
+    except (TypeError, ValueError):
+        abort(make_response(jsonify({"error": "Invalid cursor"}), 400))
+
+
+def paginate(cls, attr=None, value=None):
+    """
+    Lists the objects of cls ordered by (created_at, id).
+
+    The query string may hold `limit` (page size), `cursor` (where the
+    page starts, taken from the `next` link of the previous page) and
+    `fields` (comma separated attributes to return). Without limit and
+    cursor every object is returned, streamed in chunks as it is
+    serialized. Objects come as NDJSON, one per line, instead of a JSON
+    list when the request accepts application/x-ndjson.
+
+    Args:
+        cls: The class of the objects to list.
+        attr (str): Only list the objects whose attribute attr...
+        value: ...equals value.
+
+    Returns:
+        Response: A JSON list (or NDJSON) of the objects of the page, with
+        a `Link: <...>; rel="next"` header when more objects follow.
+    """
+    limit, after = page_args()
+    if limit is None:
+        return respond(storage.iter_page(cls, None, None, attr, value))
+    return respond(storage.page(cls, limit, after, attr, value), limit)
+
+
+def page_args(parse=parse_time):
+    """
+    Reads the `limit` and `cursor` of the query string.
+
+    Args:
+        parse: Converts the value encoded in the cursor before the id back.
+
+    Returns:
+        tuple: The page size, at most MAX_LIMIT, None to list every object,
+        and the position the page starts after, None to start from the
+        first object.
+    """
+    limit = request.args.get("limit")
+    cursor = request.args.get("cursor")
+    if limit is not None:
+        if not limit.isdigit() or int(limit) == 0:
+            abort(make_response(jsonify({"error": "Invalid limit"}), 400))
+        limit = min(int(limit), MAX_LIMIT)
+    elif cursor is not None:
+        limit = DEFAULT_LIMIT
+    after = decode_cursor(cursor, parse) if cursor is not None else None
+    return limit, after
+
+
+def respond(objs, limit=None, position=None):
+    """
+    Makes the response of a list endpoint, projected on the `fields` of
+    the query string and as NDJSON if the request accepts it.
+
+    Args:
+        objs: The objects of the page, or an iterable of every object,
+        streamed as it is serialized, if limit is None.
+        limit (int): The page size.
+        position: Returns the value an object is ordered by before its id,
+        if not its created_at.
+
+    Returns:
+        Response: A JSON list (or NDJSON) of the objects, with a
+        `Link: <...>; rel="next"` header when the page is full.
+    """
+    fields = request.args.get("fields")
+    fields = fields.split(",") if fields else None
+    ndjson = request.accept_mimetypes.best_match(
+        ["application/json", NDJSON]) == NDJSON
+    mimetype = NDJSON if ndjson else "application/json"
+    if limit is None:
+        return Response(stream_with_context(stream(objs, fields, ndjson)),
+                        mimetype=mimetype)
+    response = Response("".join(stream(objs, fields, ndjson)),
+                        mimetype=mimetype)
+    if len(objs) == limit:
+        last = objs[-1]
+        args = request.args.to_dict()
+        args["cursor"] = encode_cursor(
+            last, None if position is None else position(last))
+        args["limit"] = limit
+        response.headers["Link"] = '<{}?{}>; rel="next"'.format(
+            request.base_url, urlencode(args))
+    return response
+
+
+def stream(objs, fields=None, ndjson=False):
+    """
+    Serializes objects a chunk at a time.
+
+    Args:
+        objs: An iterable of the objects to serialize.
+        fields (list): The attributes to keep, all of them if None.
+        ndjson (bool): Whether to write one object per line instead of
+        a JSON list.
+
+    Yields:
+        str: The successive chunks of the JSON list or of the NDJSON.
+    """
+    dumps = current_app.json.dumps
+    chunk = []
+    separator = ""
+    if not ndjson:
+        yield "["
+    for obj in objs:
+        obj_dict = obj.to_dict()
+        if fields is not None:
+            obj_dict = {key: obj_dict[key] for key in fields
+                        if key in obj_dict}
+        chunk.append(obj_dict)
+        if len(chunk) == CHUNK_SIZE:
+            yield _dump_chunk(dumps, chunk, separator, ndjson)
+            chunk = []
+            separator = ","
+    if chunk:
+        yield _dump_chunk(dumps, chunk, separator, ndjson)
+    if not ndjson:
+        yield "]\n"
+
+
+def _dump_chunk(dumps, chunk, separator, ndjson):
+    """returns the JSON of the dictionaries of chunk, as lines if ndjson,
+    else as list items following separator"""
+    if ndjson:
+        return "".join(dumps(obj_dict, separators=(",", ":")) + "\n"
+                       for obj_dict in chunk)
+    return separator + dumps(chunk, separators=(",", ":"))[1:-1]
@@ -1,9 +1,14 @@
 #!/usr/bin/python3
 """API Module for places endpoints"""
 from api.v1.views import app_views
+from api.v1.views.conditional import conditional
+from api.v1.views.pagination import MAX_LIMIT, page_args, paginate, respond
 from flask import abort, jsonify, make_response, request
+import math
 from models import storage
+from models.base_model import parse_time
 from models.city import City
+from models.engine import spatial
 from models.user import User
 from models.place import Place
 
@@ -24,6 +29,7 @@ def serialize_to_json(obj):
 
 @app_views.route('/cities/<string:city_id>/places', methods=['GET'],
                  strict_slashes=False)
+@conditional(City, Place)
 def get_city_places(city_id):
     """
     Retrieves all places in a specific city by ID and returns a JSON response.
@@ -33,17 +39,144 @@ def get_city_places(city_id):
 
     Returns:
         Response: A JSON response containing a list of places in the
-        specified city or a 404 error if the city is not found.
+        specified city, one page of them when `limit` or `cursor` is given,
+        or a 404 error if the city is not found.
     """
     city = storage.get(City, city_id)
     if city is None:
         abort(404)
-    city_places = [serialize_to_json(place) for place in city.places]
-    return jsonify(city_places)
+    return paginate(Place, "city_id", city_id)
+
+
+@app_views.route('/places', methods=['GET'], strict_slashes=False)
+@conditional(Place)
+def get_places():
+    """
+    Retrieves the places within the ranges given in the query string.
+
+    `min_price` and `max_price` bound the price by night, `min_guests` the
+    number of guests, `bbox` (min_lat,min_lng,max_lat,max_lng, crossing
+    the antimeridian if min_lng > max_lng) the location and `radius` (in
+    km) the distance from `lat` and `lng`. `sort` orders the places by
+    `price` or by `distance` from lat and lng instead of by creation, and
+    `k` only returns the k places nearest to lat and lng. `limit`,
+    `cursor` and `fields` work as on the other list endpoints.
+
+    Returns:
+        Response: A JSON response containing a list of the matching
+        places or an error response if a parameter is invalid.
+    """
+    ranges = {}
+    min_price, max_price = _number("min_price"), _number("max_price")
+    if min_price is not None or max_price is not None:
+        ranges["price_by_night"] = (min_price, max_price)
+    min_guests = _number("min_guests")
+    if min_guests is not None:
+        ranges["max_guest"] = (min_guests, None)
+    lat, lng, radius = _number("lat"), _number("lng"), _number("radius")
+    sort = request.args.get("sort")
+    if sort not in (None, "price", "distance"):
+        return _bad_request("sort must be price or distance")
+    k = request.args.get("k")
+    if (radius is not None or sort == "distance" or k is not None) and \
+            (lat is None or lng is None):
+        return _bad_request("radius, distance and k need lat and lng")
+    if k is not None:
+        if not k.isdigit() or int(k) == 0:
+            return _bad_request("k must be a positive integer")
+        if ranges or radius is not None or \
+                request.args.get("bbox") is not None:
+            return _bad_request("k only goes with lat and lng")
+        return respond(storage.nearest(Place, lat, lng,
+                                       min(int(k), MAX_LIMIT)))
+    bbox = request.args.get("bbox")
+    if bbox is not None:
+        try:
+            min_lat, min_lng, max_lat, max_lng = map(float, bbox.split(","))
+        except ValueError:
+            min_lat = min_lng = max_lat = max_lng = math.nan
+        if not all(map(math.isfinite, (min_lat, min_lng, max_lat, max_lng))):
+            return _bad_request("bbox must be min_lat,min_lng,max_lat,max_lng")
+        if not -90 <= min_lat <= 90 or not -90 <= max_lat <= 90:
+            return _bad_request("bbox latitudes must be between -90 and 90")
+        if not ranges and radius is None and sort is None:
+            limit, after = page_args()
+            return respond(storage.within_bbox(Place, min_lat, min_lng,
+                                               max_lat, max_lng, limit,
+                                               after), limit)
+        ranges["latitude"] = (min_lat, max_lat)
+        ranges["longitude"] = (min_lng, max_lng)
+    order_by = "price_by_night" if sort == "price" else "created_at"
+    if sort == "price":
+        def position(place):
+            return place.price_by_night
+    else:
+        position = None
+    if radius is None and sort != "distance":
+        limit, after = page_args(float if sort == "price" else parse_time)
+        return respond(storage.page_range(Place, ranges, order_by, limit,
+                                          after), limit, position)
+
+    # the places of the box around the circle, measured one by one
+    ranges.setdefault("latitude", (None, None))
+    ranges.setdefault("longitude", (None, None))
+    if radius is not None:
+        min_lat, min_lng, max_lat, max_lng = spatial.bbox_around(lat, lng,
+                                                                 radius)
+        _narrow(ranges, "latitude", min_lat, max_lat)
+        if min_lng <= max_lng:
+            _narrow(ranges, "longitude", min_lng, max_lng)
+    distances = {}
+    places = []
+    for place in storage.page_range(Place, ranges, order_by):
+        distance = spatial.distance(lat, lng, place.latitude, place.longitude)
+        if radius is None or distance <= radius:
+            distances[place.id] = distance
+            places.append(place)
+    if sort == "distance":
+        def position(place):
+            return distances[place.id]
+        places.sort(key=lambda place: (position(place), place.id))
+    limit, after = page_args(float if sort else parse_time)
+    if after is not None:
+        key = position or (lambda place: place.created_at)
+        places = [place for place in places
+                  if (key(place), place.id) > after]
+    if limit is not None:
+        places = places[:limit]
+    return respond(places, limit, position)
+
+
+def _number(name):
+    """returns the number given as name in the query string, None if it
+    is missing, aborts with 400 if it is not a number"""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        value = float(value)
+    except ValueError:
+        value = math.nan
+    if not math.isfinite(value):
+        abort(_bad_request("{} must be a number".format(name)))
+    return value
+
+
+def _narrow(ranges, attr, low, high):
+    """narrows the (low, high) range of attr in ranges to low, high"""
+    old_low, old_high = ranges[attr]
+    ranges[attr] = (low if old_low is None else max(low, old_low),
+                    high if old_high is None else min(high, old_high))
+
+
+def _bad_request(error):
+    """returns a 400 response holding error"""
+    return make_response(jsonify({"error": error}), 400)
 
 
 @app_views.route('/places/<string:place_id>', methods=['GET'],
                  strict_slashes=False)
+@conditional(Place)
 def get_place(place_id):
     """
     Retrieves a specific place by ID and returns a JSON response.
@@ -141,3 +274,33 @@ def update_place(place_id):
             setattr(place, key, value)
     storage.save()
     return jsonify(place.to_dict()), 200
+
+
+@app_views.route('/places_search', methods=['POST'], strict_slashes=False)
+def search_places():
+    """
+    Searches the places matching the JSON body of the request.
+
+    The body may hold `states`, `cities` and `amenities`, lists of ids.
+    Places in the listed states or cities are kept, all places if both
+    lists are empty or missing, then only those having every listed
+    amenity.
+
+    Returns:
+        Response: A JSON response containing a list of the matching
+        places or an error response if the body is not JSON.
+    """
+    search_data = request.get_json(silent=True)
+    if not isinstance(search_data, dict):
+        return make_response(jsonify({"error": "Not a JSON"}), 400)
+    criteria = {}
+    for key in ("states", "cities", "amenities"):
+        ids = search_data.get(key) or []
+        if not isinstance(ids, list) or \
+                not all(isinstance(id, str) for id in ids):
+            return make_response(
+                jsonify({"error": "{} must be a list of ids".format(key)}),
+                400)
+        criteria[key] = ids
+    places = storage.search_places(**criteria)
+    return jsonify([place.to_dict() for place in places])
@@ -2,6 +2,7 @@
 """API Module for places amenities endpoints"""
 import os
 from api.v1.views import app_views
+from api.v1.views.conditional import conditional
 from flask import abort, jsonify, make_response, request
 from models import storage
 from models.place import Place
@@ -27,6 +28,7 @@ def serialize_to_json(obj):
 
 @app_views.route('/places/<string:place_id>/amenities',
                  methods=['GET'], strict_slashes=False)
+@conditional(Place, Amenity)
 def get_places_amenities(place_id):
     """
     Retrieves amenities associated with a specific place by ID
@@ -42,14 +44,9 @@ def get_places_amenities(place_id):
     place = storage.get(Place, place_id)
     if place is None:
         abort(404)
-    if storage_type is 'db':
-        place_amenities = [
-            serialize_to_json(amenity) for amenity in place.amenities
-            ]
-    else:
-        place_amenities = [
-            serialize_to_json(amenity) for amenity in place.amenity_ids
-            ]
+    place_amenities = [
+        serialize_to_json(amenity) for amenity in place.amenities
+        ]
     return jsonify(place_amenities), 200
 
 
@@ -73,12 +70,15 @@ def delete_places_amenities(place_id, amenity_id):
     if place is None or amenity is None:
         abort(404)
     if storage_type == 'db':
-        places_amenities = place.amenities
+        if amenity not in place.amenities:
+            abort(404)
+        place.amenities.remove(amenity)
     else:
-        places_amenities = place.amenity_ids
-    if amenity not in places_amenities:
-        abort(404)
-    places_amenities.remove(amenity)
+        if amenity.id not in place.amenity_ids:
+            abort(404)
+        # a new list, so that the storage indexes the change
+        place.amenity_ids = [id for id in place.amenity_ids
+                             if id != amenity.id]
     place.save()
     return jsonify({}), 200
 
@@ -103,11 +103,13 @@ def link_amenities_places(place_id, amenity_id):
     if place is None or amenity is None:
         abort(404)
     if storage_type == 'db':
-        places_amenities = place.amenities
+        if amenity in place.amenities:
+            return jsonify(serialize_to_json(amenity)), 200
+        place.amenities.append(amenity)
     else:
-        places_amenities = place.amenity_ids
-    if amenity in places_amenities:
-        return jsonify(serialize_to_json(amenity)), 200
-    places_amenities.append(amenity)
+        if amenity.id in place.amenity_ids:
+            return jsonify(serialize_to_json(amenity)), 200
+        # a new list, so that the storage indexes the change
+        place.amenity_ids = place.amenity_ids + [amenity.id]
     place.save()
     return jsonify(serialize_to_json(amenity)), 201
@@ -1,6 +1,8 @@
 #!/usr/bin/python3
 """API Module for places reviews endpoints"""
 from api.v1.views import app_views
+from api.v1.views.conditional import conditional
+from api.v1.views.pagination import paginate
 from flask import abort, jsonify, make_response, request
 from models import storage
 from models.user import User
@@ -24,6 +26,7 @@ def serialize_to_json(obj):
 
 @app_views.route('/places/<string:place_id>/reviews', methods=['GET'],
                  strict_slashes=False)
+@conditional(Place, Review)
 def get_place_reviews(place_id):
     """
     Retrieves all reviews for a specific place by ID and
@@ -34,17 +37,18 @@ def get_place_reviews(place_id):
 
     Returns:
         Response: A JSON response containing a list of reviews for the
-        specified place or a 404 error if the place is not found.
+        specified place, one page of them when `limit` or `cursor` is
+        given, or a 404 error if the place is not found.
     """
     place = storage.get(Place, place_id)
     if place is None:
         abort(404)
-    place_reviews = [serialize_to_json(review) for review in place.reviews]
-    return jsonify(place_reviews)
+    return paginate(Review, "place_id", place_id)
 
 
 @app_views.route('/reviews/<string:review_id>', methods=['GET'],
                  strict_slashes=False)
+@conditional(Review)
 def get_review(review_id):
     """
     Retrieves a specific review by ID and returns a JSON response.
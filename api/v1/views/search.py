@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+"""API Module for the full-text search endpoint"""
+from api.v1.views import app_views
+from api.v1.views.conditional import conditional
+from api.v1.views.pagination import MAX_LIMIT
+from flask import jsonify, make_response, request
+from models import storage
+from models.place import Place
+from models.review import Review
+
+# integer - number of results when the query string gives no limit
+DEFAULT_LIMIT = 10
+
+
+@app_views.route('/search', methods=['GET'], strict_slashes=False)
+@conditional(Place, Review)
+def search():
+    """
+    Searches the place descriptions and review texts for the words of `q`.
+
+    The query string may also hold `type` (Place or Review) to search only
+    one of them and `limit`, the number of results (10 by default).
+
+    Returns:
+        Response: A JSON response containing a list of the best matching
+        places and reviews, best first, each with its BM25 `score`, or an
+        error response if a parameter is invalid.
+    """
+    text = request.args.get("q", "")
+    if not text.strip():
+        return make_response(jsonify({"error": "Missing q"}), 400)
+    types = {"Place": Place, "Review": Review}
+    cls = request.args.get("type")
+    if cls is not None and cls not in types:
+        return make_response(jsonify({"error": "Invalid type"}), 400)
+    limit = request.args.get("limit", str(DEFAULT_LIMIT))
+    if not limit.isdigit() or int(limit) == 0:
+        return make_response(jsonify({"error": "Invalid limit"}), 400)
+    results = []
+    for score, obj in storage.search(text, types.get(cls),
+                                     min(int(limit), MAX_LIMIT)):
+        obj_dict = obj.to_dict()
+        obj_dict["score"] = score
+        results.append(obj_dict)
+    return jsonify(results)
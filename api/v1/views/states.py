@@ -1,6 +1,8 @@
 #!/usr/bin/python3
 """API Module for state"""
 from api.v1.views import app_views
+from api.v1.views.conditional import conditional
+from api.v1.views.pagination import paginate
 from flask import abort, jsonify, make_response, request
 from models import storage
 from models.state import State
@@ -21,16 +23,15 @@ def serialize_to_json(obj):
 
 
 @app_views.route('/states', methods=['GET'], strict_slashes=False)
+@conditional(State)
 def get_states():
-    """Returns all the states"""
-    all_states = [
-        serialize_to_json(value) for value in storage.all(State).values()
-        ]
-    return jsonify(all_states)
+    """Returns the states, a page of them if asked"""
+    return paginate(State)
 
 
 @app_views.route('states/<string:state_id>', methods=['GET'],
                  strict_slashes=False)
+@conditional(State)
 def get_state(state_id):
     """Returns the state having the id"""
     return jsonify(serialize_to_json(storage.get(State, state_id)))
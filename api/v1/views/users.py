@@ -1,6 +1,8 @@
 #!/usr/bin/python3
 """API Module for user endpoints"""
 from api.v1.views import app_views
+from api.v1.views.conditional import conditional
+from api.v1.views.pagination import paginate
 from flask import abort, jsonify, make_response, request
 from models import storage
 from models.user import User
@@ -21,21 +23,21 @@ def serialize_to_json(obj):
 
 
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
+@conditional(User)
 def get_users():
     """
     Retrieves all users and returns a JSON response.
 
     Returns:
-        Response: A JSON response containing a list of all users.
+        Response: A JSON response containing a list of the users,
+        one page of them when `limit` or `cursor` is given.
     """
-    all_users = [
-        serialize_to_json(user) for user in storage.all(User).values()
-        ]
-    return jsonify(all_users)
+    return paginate(User)
 
 
 @app_views.route('/users/<string:user_id>', methods=['GET'],
                  strict_slashes=False)
+@conditional(User)
 def get_user(user_id):
     """
     Retrieves a specific user by ID and returns a JSON response.
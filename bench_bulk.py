@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+"""
+Benchmark of the bulk endpoints: places created, updated and deleted
+through the Flask test client one request per place, then with one
+request to /api/v1/places/bulk, in the file storage and in the DBStorage
+on SQLite.
+
+Usage: ./bench_bulk.py [places]
+
+The places (1000 by default) belong to one city and one user; each
+storage runs in a new process in a temporary directory, the DBStorage
+on a SQLite file there.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def measure(places):
+    """prints the places per second of each way of writing them"""
+    from api.v1.app import app
+    client = app.test_client()
+    url = "/api/v1/"
+    user_id = client.post(url + "users", json={
+        "email": "user@hbnb.io", "password": "pwd"}).get_json()["id"]
+    state_id = client.post(url + "states",
+                           json={"name": "State"}).get_json()["id"]
+    city_id = client.post(url + "states/{}/cities".format(state_id),
+                          json={"name": "City"}).get_json()["id"]
+
+    def rate(requests):
+        """returns the places per second of requests() and its result"""
+        start = time.perf_counter()
+        result = requests()
+        print(places / (time.perf_counter() - start))
+        return result
+
+    ids = rate(lambda: [client.post(
+        url + "cities/{}/places".format(city_id),
+        json={"name": "Place {}".format(i), "user_id": user_id}
+    ).get_json()["id"] for i in range(places)])
+    rate(lambda: [client.put(url + "places/" + id,
+                             json={"price_by_night": 5}) for id in ids])
+    rate(lambda: [client.delete(url + "places/" + id) for id in ids])
+    items = rate(lambda: client.post(url + "places/bulk", json=[
+        {"name": "Place {}".format(i), "user_id": user_id,
+         "city_id": city_id} for i in range(places)]).get_json())
+    ids = [item["body"]["id"] for item in items]
+    rate(lambda: client.patch(url + "places/bulk", json=[
+        {"id": id, "price_by_night": 5} for id in ids]))
+    rate(lambda: client.delete(url + "places/bulk", json=ids))
+
+
+def main():
+    """runs the requests in the file storage, then in SQLite"""
+    if len(sys.argv) > 1 and sys.argv[1] == "--measure":
+        return measure(int(sys.argv[2]))
+    places = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    directory = tempfile.mkdtemp()
+    results = []
+    for storage_type in ("file", "db"):
+        env = dict(os.environ, HBNB_TYPE_STORAGE=storage_type,
+                   HBNB_DB_URL="sqlite:///" + os.path.join(directory, "db"))
+        output = subprocess.run([sys.executable, os.path.abspath(__file__),
+                                 "--measure", str(places)], cwd=directory,
+                                env=env, stdout=subprocess.PIPE, text=True,
+                                check=True)
+        results.append([float(rate) for rate in output.stdout.split()])
+    print("{} places (places/s)".format(places))
+    print("requests     file storage   sqlite")
+    for label, file_rate, db_rate in zip(
+            ("POST one", "PUT one", "DELETE one", "POST bulk", "PATCH bulk",
+             "DELETE bulk"), *results):
+        print("{:12} {:12.0f} {:8.0f}".format(label, file_rate, db_rate))
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""
+Benchmark of FileStorage.close() at the end of the API requests: GET
+/api/v1/states through the Flask test client, with close() reloading the
+JSON file only when another process changed it, and with close()
+reloading it on every request as it did before.
+
+Usage: ./bench_close.py [objects] [requests]
+
+The store holds 50 states and filler reviews up to objects (10000 by
+default), written to a temporary directory.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+
+def write_store(objects):
+    """writes a file.json of 50 states and objects - 50 reviews"""
+    now = "2017-01-01T00:00:00.000000"
+    store = {}
+    for i in range(objects):
+        name = "State" if i < 50 else "Review"
+        id = str(uuid.uuid4())
+        obj = {"__class__": name, "id": id, "created_at": now,
+               "updated_at": now}
+        if name == "State":
+            obj["name"] = "State {}".format(i)
+        else:
+            obj.update(place_id="place", user_id="user", text="Review")
+        store[name + "." + id] = obj
+    with open("file.json", "w") as f:
+        json.dump(store, f)
+
+
+def measure(client, requests):
+    """returns the requests per second of GET /api/v1/states"""
+    client.get("/api/v1/states")
+    start = time.perf_counter()
+    for i in range(requests):
+        client.get("/api/v1/states")
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    """runs GET /api/v1/states with both close() behaviors"""
+    objects = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    os.chdir(tempfile.mkdtemp())
+    write_store(objects)
+    from api.v1.app import app
+    from models.engine.file_storage import FileStorage
+    from unittest import mock
+    client = app.test_client()
+    print("{} objects, {} requests".format(objects, requests))
+    print("close()                      req/s")
+    print("reload only if changed  {:10.1f}".format(
+        measure(client, requests)))
+    with mock.patch.object(FileStorage, "close", FileStorage.reload):
+        print("reload every time       {:10.1f}".format(
+            measure(client, requests)))
+
+
+if __name__ == "__main__":
+    main()
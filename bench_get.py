@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""
+Benchmark of the DBStorage lookups by id: get() by primary key, get()
+scanning all(cls) as it did before, and get_many() of every id at once.
+
+Usage: ./bench_get.py [rows] [lookups]
+
+The database is the one of HBNB_DB_URL, by default a SQLite file in a
+temporary directory, filled with rows states (10000 by default). The
+session is closed before each lookup, as at the end of an API request.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+def main():
+    """times the lookups of random states"""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    os.environ["HBNB_TYPE_STORAGE"] = "db"
+    os.environ.setdefault("HBNB_DB_URL", "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(), "hbnb_bench_get.db"))
+    from models import storage
+    from models.state import State
+    if storage.count(State) < rows:
+        storage.bulk_new(State(name="State {}".format(i))
+                         for i in range(rows - storage.count(State)))
+    storage.close()
+    ids = random.sample([state.id for state in storage.all(State).values()],
+                        lookups)
+    storage.close()
+
+    def scan(cls, id):
+        """get() before, through all(cls)"""
+        for obj in storage.all(cls).values():
+            if obj.id == id:
+                return obj
+
+    print("{} rows, {} lookups".format(rows, lookups))
+    for label, get in (("get, primary key", storage.get),
+                       ("get, all() scan", scan)):
+        start = time.perf_counter()
+        for id in ids:
+            assert get(State, id).id == id
+            storage.close()
+        print("{:18} {:8.2f} ms/op".format(
+            label, (time.perf_counter() - start) * 1000 / lookups))
+    start = time.perf_counter()
+    assert len(storage.get_many(State, ids)) == lookups
+    print("{:18} {:8.2f} ms for {} ids".format(
+        "get_many", (time.perf_counter() - start) * 1000, lookups))
+
+
+if __name__ == "__main__":
+    main()
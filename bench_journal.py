@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+"""
+Benchmark of the FileStorage journal: processes saving states at once,
+with close() between their saves, and how many of the states are found;
+then saves of one review each per second, rewriting the whole JSON file
+as save() did before, and appending to the journal from 1 and 8
+threads.
+
+Usage: ./bench_journal.py [objects] [saves] [processes]
+
+Each of the processes (3 by default) does saves saves (200 by default),
+starting from an empty store in a temporary directory; the threads then
+save as many times, objects reviews (10000 by default) being added. A
+save() finding the edits of the other threads already written returns
+without writing, so the 8 threads share the appends to the journal.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+def rewrite(storage):
+    """save() before: dumps every object to a JSON file, not file.json
+    which the storage would then reload as changed by another process"""
+    with open("rewrite.json", "w") as f:
+        json.dump({key: obj.to_dict()
+                   for key, obj in storage.all().items()}, f)
+
+
+def measure(reviews, saves, save):
+    """returns the saves per second of a thread per review, each saving
+    its review saves times"""
+    def work(review):
+        """edits and saves review"""
+        for i in range(saves):
+            review.text = "Edited {}".format(i)
+            save()
+
+    threads = [threading.Thread(target=work, args=(review,))
+               for review in reviews]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(reviews) * saves / (time.perf_counter() - start)
+
+
+def write(name, saves):
+    """saves states in this process, prints their ids"""
+    import models
+    from models.state import State
+    for i in range(saves):
+        state = State(name="{} {}".format(name, i))
+        state.save()
+        print(state.id)
+        models.storage.close()
+
+
+def main():
+    """runs the saves of processes, then of threads"""
+    if len(sys.argv) > 1 and sys.argv[1] == "--write":
+        return write(sys.argv[2], int(sys.argv[3]))
+    objects = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    saves = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    os.chdir(tempfile.mkdtemp())
+    writers = [subprocess.Popen([sys.executable, os.path.abspath(__file__),
+                                 "--write", str(i), str(saves)],
+                                stdout=subprocess.PIPE, text=True)
+               for i in range(processes)]
+    ids = []
+    for writer in writers:
+        ids.extend(writer.communicate()[0].split())
+    from models import storage
+    from models.review import Review
+    from models.state import State
+    found = sum(storage.get(State, id) is not None for id in ids)
+    print("{} processes saving {} states each: {} of {} found".format(
+        processes, saves, found, len(ids)))
+    storage.bulk_new(Review(place_id="place", user_id="user",
+                            text="Review {}".format(i))
+                     for i in range(objects))
+    reviews = list(storage.all(Review).values())
+    print("{} objects, {} saves per thread".format(storage.count(), saves))
+    print("save                        saves/s")
+    print("full rewrite, 1 thread  {:11.0f}".format(
+        measure(reviews[:1], max(saves // 20, 1),
+                lambda: rewrite(storage))))
+    for threads in (1, 8):
+        print("journal, {} thread{}    {:11.0f}".format(
+            threads, "s" if threads > 1 else " ",
+            measure(reviews[:threads], saves, storage.save)))
+
+
+if __name__ == "__main__":
+    main()
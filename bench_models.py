@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+"""
+Benchmark of the memory of the file storage models: the bytes per Review
+built from snapshot records, and once to_dict() has been called on each,
+with the default instances and with the compact ones of
+HBNB_COMPACT_MODELS=1.
+
+Usage: ./bench_models.py [reviews]
+
+The reviews (100000 by default) are traced with tracemalloc, the records
+being built beforehand; each mode runs in a new process, as the models
+are defined when imported.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+import uuid
+
+
+def measure(reviews):
+    """prints the bytes per Review built, then after to_dict()"""
+    import models
+    from models.review import Review
+    now = "2017-01-01T00:00:00.000000"
+    records = [{"__class__": "Review", "id": str(uuid.uuid4()),
+                "created_at": now, "updated_at": now,
+                "place_id": str(uuid.uuid4()), "user_id": str(uuid.uuid4()),
+                "text": "Review"} for i in range(reviews)]
+    # as at reload, building them does not mark them changed
+    models.storage.touch = lambda obj: None
+    tracemalloc.start()
+    objs = [Review(**record) for record in records]
+    built = tracemalloc.get_traced_memory()[0]
+    for obj in objs:
+        obj.to_dict()
+    print(built // reviews, tracemalloc.get_traced_memory()[0] // reviews)
+
+
+def main():
+    """measures the reviews in each mode"""
+    if len(sys.argv) > 1 and sys.argv[1] == "--measure":
+        return measure(int(sys.argv[2]))
+    reviews = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print("{} reviews".format(reviews))
+    directory = tempfile.mkdtemp()
+    print("models    bytes/Review  after to_dict()")
+    for label, compact in (("default", "0"), ("compact", "1")):
+        env = dict(os.environ, HBNB_COMPACT_MODELS=compact)
+        env.pop("HBNB_TYPE_STORAGE", None)
+        output = subprocess.run([sys.executable, os.path.abspath(__file__),
+                                 "--measure", str(reviews)],
+                                cwd=directory, env=env,
+                                stdout=subprocess.PIPE, text=True,
+                                check=True)
+        print("{:9} {:12} {:16}".format(label, *output.stdout.split()))
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/python3
+"""
+Benchmark of storage.search_places(), as POST /api/v1/places_search runs
+it: the indexes of FileStorage against a scan of every place, and the
+single query of DBStorage on SQLite with its indexes and without them.
+
+Usage: ./bench_places_search.py [places]
+
+The stores hold places (100000 by default) spread over 50 states, 1000
+cities and 5 of 50 amenities each. The file storage runs in memory, the
+DBStorage in a new process on a SQLite file in a temporary directory;
+the best of 3 searches is kept for each case.
+"""
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+CASES = ("1 state", "1 state + 2 amenities", "2 amenities", "3 amenities",
+         "1 city + 1 amenity")
+
+
+def build(places):
+    """returns states, cities, amenities, a user and places, each place
+    with the ids of 5 amenities"""
+    from models.amenity import Amenity
+    from models.city import City
+    from models.place import Place
+    from models.state import State
+    from models.user import User
+    random.seed(1)
+    states = [State(name="State {}".format(i)) for i in range(50)]
+    cities = [City(name="City {}".format(i), state_id=states[i % 50].id)
+              for i in range(1000)]
+    amenities = [Amenity(name="Amenity {}".format(i)) for i in range(50)]
+    user = User(email="user@hbnb.io", password="pwd")
+    objs = []
+    links = []
+    for i in range(places):
+        place = Place(name="Place {}".format(i), user_id=user.id,
+                      city_id=cities[i % 1000].id)
+        links.append([amenity.id for amenity in
+                      random.sample(amenities, 5)])
+        objs.append(place)
+    return states, cities, amenities, user, objs, links
+
+
+def cases(states, cities, amenities):
+    """returns the (states, cities, amenities) ids of each case"""
+    ids = [amenity.id for amenity in amenities]
+    return ([states[0].id], [], []), ([states[0].id], [], ids[:2]), \
+        ([], [], ids[:2]), ([], [], ids[:3]), ([], [cities[5].id], ids[7:8])
+
+
+def best(search, args):
+    """returns the places found and the least ms of 3 searches"""
+    times = []
+    for i in range(3):
+        start = time.perf_counter()
+        found = search(*args)
+        times.append((time.perf_counter() - start) * 1000)
+    return len(found), min(times)
+
+
+def file_search(places):
+    """returns the places found, the ms of a scan and of search_places()
+    for each case, with the file storage"""
+    from models import storage
+    from models.city import City
+    from models.place import Place
+    states, cities, amenities, user, objs, links = build(places)
+    for obj in states + cities + amenities + [user]:
+        storage.new(obj)
+    for place, ids in zip(objs, links):
+        place.amenity_ids = ids
+        storage.new(place)
+
+    def scan(states=(), cities=(), amenities=()):
+        """search_places() as a scan of every city and place"""
+        city_ids = set(cities) | {city.id for city in
+                                  storage.all(City).values()
+                                  if city.state_id in states}
+        return sorted((place for place in storage.all(Place).values()
+                       if (not city_ids or place.city_id in city_ids) and
+                       set(amenities).issubset(place.amenity_ids)),
+                      key=lambda place: (place.created_at, place.id))
+
+    results = []
+    for args in cases(states, cities, amenities):
+        count, indexed = best(storage.search_places, args)
+        scanned, ms = best(scan, args)
+        assert scanned == count
+        results.append((count, ms, indexed))
+    return results
+
+
+def db_search(places):
+    """prints the ms of search_places() for each case with the DBStorage,
+    with the indexes and once they are dropped"""
+    from models import storage
+    from models.place import place_amenity
+    states, cities, amenities, user, objs, links = build(places)
+    storage.bulk_new(states + cities + amenities + [user] + objs)
+    path = os.environ["HBNB_DB_URL"][len("sqlite:///"):]
+    db = sqlite3.connect(path)
+    with db:
+        db.executemany("INSERT INTO {} VALUES (?, ?)".format(
+            place_amenity.name), ((place.id, id) for place, ids in
+                                  zip(objs, links) for id in ids))
+    searches = cases(states, cities, amenities)
+
+    def search(*args):
+        """search_places() in a new session, as in an API request"""
+        storage.close()
+        return storage.search_places(*args)
+
+    for args in searches:
+        print(best(search, args)[1])
+    indexes = [name for name, in db.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' "
+        "AND name LIKE 'ix_%'")]
+    with db:
+        for name in indexes:
+            db.execute("DROP INDEX {}".format(name))
+    db.close()
+    for args in searches:
+        print(best(search, args)[1])
+
+
+def main():
+    """runs the searches in the file storage, then in SQLite"""
+    if len(sys.argv) > 1 and sys.argv[1] == "--db":
+        return db_search(int(sys.argv[2]))
+    places = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    directory = tempfile.mkdtemp()
+    os.chdir(directory)
+    env = dict(os.environ, HBNB_TYPE_STORAGE="db",
+               HBNB_DB_URL="sqlite:///" + os.path.join(directory, "db"))
+    output = subprocess.run([sys.executable, os.path.abspath(__file__),
+                             "--db", str(places)], env=env,
+                            stdout=subprocess.PIPE, text=True, check=True)
+    db = [float(ms) for ms in output.stdout.split()]
+    os.environ.pop("HBNB_TYPE_STORAGE", None)
+    results = file_search(places)
+    print("{} places (ms)".format(places))
+    print("case                    found  file scan  file indexed  "
+          "sqlite  sqlite no indexes")
+    for i, (label, (count, scan, indexed)) in enumerate(zip(CASES,
+                                                            results)):
+        print("{:22} {:6} {:10.1f} {:13.2f} {:7.1f} {:18.1f}".format(
+            label, count, scan, indexed, db[i], db[i + len(CASES)]))
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+"""
+Benchmark of the FileStorage snapshot formats: the size of the snapshot,
+the time of compact() writing it and of eager and lazy reloads reading
+it, for the JSON file and the binary snapshot of HBNB_FILE_FORMAT=binary.
+
+Usage: ./bench_snapshot.py [objects]
+
+The store holds 50 states and filler reviews up to objects (100000 by
+default), in a temporary directory per format. Each step runs in a new
+process, the formats being chosen when the storage is imported.
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+
+def write_store(objects):
+    """writes a file.json of 50 states and objects - 50 reviews"""
+    now = "2017-01-01T00:00:00.000000"
+    store = {}
+    for i in range(objects):
+        name = "State" if i < 50 else "Review"
+        id = str(uuid.uuid4())
+        obj = {"__class__": name, "id": id, "created_at": now,
+               "updated_at": now}
+        if name == "State":
+            obj["name"] = "State {}".format(i)
+        else:
+            obj.update(place_id="place", user_id="user", text="Review")
+        store[name + "." + id] = obj
+    with open("file.json", "w") as f:
+        json.dump(store, f)
+
+
+def step(action):
+    """times compact() or reload() of the storage, in this process"""
+    from models import storage
+    from models.state import State
+    start = time.perf_counter()
+    if action == "compact":
+        storage.compact()
+    else:
+        storage.reload()
+        assert len(storage.all(State)) == 50
+    print(time.perf_counter() - start)
+
+
+def run(directory, action, file_format, reload):
+    """returns the seconds of action in directory, in a new process"""
+    env = dict(os.environ, HBNB_FILE_FORMAT=file_format,
+               HBNB_FILE_RELOAD=reload)
+    env.pop("HBNB_TYPE_STORAGE", None)
+    output = subprocess.run([sys.executable, os.path.abspath(__file__),
+                             "--" + action], cwd=directory, env=env,
+                            stdout=subprocess.PIPE, text=True, check=True)
+    return float(output.stdout)
+
+
+def main():
+    """compacts and reloads a store in each format"""
+    if len(sys.argv) > 1 and sys.argv[1].startswith("--"):
+        return step(sys.argv[1][2:])
+    objects = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    directory = tempfile.mkdtemp()
+    os.chdir(directory)
+    write_store(objects)
+    print("{} objects".format(objects))
+    print("format   size MB  compact s  eager s  lazy s")
+    for file_format, path in (("json", "file.json"), ("binary", "file.bin")):
+        os.mkdir(file_format)
+        shutil.copy("file.json", file_format)
+        here = os.path.join(directory, file_format)
+        compact = run(here, "compact", file_format, "eager")
+        print("{:8} {:8.1f} {:10.2f} {:8.2f} {:7.2f}".format(
+            file_format, os.path.getsize(os.path.join(here, path)) / 1e6,
+            compact, run(here, "reload", file_format, "eager"),
+            run(here, "reload", file_format, "lazy")))
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/python3
+"""
+Benchmark of storage.within_bbox() and storage.nearest() on places,
+against a scan of every place, with the Morton order of FileStorage and
+with the (latitude, longitude) index of DBStorage on SQLite.
+
+Usage: ./bench_spatial.py [places]
+
+Half of the places (100000 by default) are clustered around 200 cities,
+the others spread over the globe. The file storage runs in memory, the
+DBStorage in a new process on a SQLite file in a temporary directory,
+where the scan loads every place through the ORM.
+"""
+import heapq
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+CASES = (("city viewport 2x2 km", "box"),
+         ("city viewport 20x20 km", "box"),
+         ("region 5x5 deg", "box"),
+         ("antimeridian 10x10 deg", "box"),
+         ("continent 40x60 deg", "box"),
+         ("nearest 10, in a city", "near"),
+         ("nearest 10, open sea", "near"),
+         ("nearest 1000, in a city", "near"))
+
+
+def build(places):
+    """returns the places, and the center of the first city"""
+    from models.place import Place
+    random.seed(1)
+    cities = [(random.uniform(-50, 60), random.uniform(-180, 180))
+              for i in range(200)]
+    objs = []
+    for i in range(places):
+        if i % 2:
+            lat, lng = random.choice(cities)
+            lat += random.gauss(0, 0.05)
+            lng += random.gauss(0, 0.05)
+        else:
+            lat, lng = random.uniform(-60, 70), random.uniform(-180, 180)
+        objs.append(Place(name="Place {}".format(i), city_id="city",
+                          user_id="user", latitude=lat, longitude=lng))
+    return objs, cities[0]
+
+
+def measure(center, all_places, close):
+    """prints the places found and the ms of the scan and of the query of
+    each case around the city center, all_places() returning every place,
+    close() ending the session as an API request would"""
+    from models import storage
+    from models.engine import spatial
+    from models.place import Place
+    lat, lng = center
+
+    def scan_box(min_lat, min_lng, max_lat, max_lng):
+        """within_bbox() as a scan of every place"""
+        return sorted((place for place in all_places()
+                       if spatial.in_bbox(place.latitude, place.longitude,
+                                          min_lat, min_lng, max_lat,
+                                          max_lng)),
+                      key=lambda place: (place.created_at, place.id))
+
+    def scan_near(lat, lng, k):
+        """nearest() as a scan of every place"""
+        return [place for d, id, place in heapq.nsmallest(
+            k, ((spatial.distance(lat, lng, place.latitude,
+                                  place.longitude), place.id, place)
+                for place in all_places()))]
+
+    args = ((lat - 0.009, lng - 0.012, lat + 0.009, lng + 0.012),
+            (lat - 0.09, lng - 0.12, lat + 0.09, lng + 0.12),
+            (40, 0, 45, 5), (-5, 175, 5, -175), (10, -20, 50, 40),
+            (lat, lng, 10), (-40.0, -120.0, 10), (lat, lng, 1000))
+    for (label, kind), case in zip(CASES, args):
+        query = storage.within_bbox if kind == "box" else storage.nearest
+        scan = scan_box if kind == "box" else scan_near
+        times = []
+        found = []
+        for search in (lambda: scan(*case), lambda: query(Place, *case)):
+            close()
+            start = time.perf_counter()
+            found.append([place.id for place in search()])
+            times.append((time.perf_counter() - start) * 1000)
+        assert found[0] == found[1], label
+        print(len(found[1]), *times)
+
+
+def file_measure(places):
+    """measures the cases with the file storage"""
+    from models import storage
+    from models.place import Place
+    objs, center = build(places)
+    for place in objs:
+        storage.new(place)
+    # the Morton order is built on the first query
+    storage.within_bbox(Place, 0, 0, 1, 1)
+    measure(center, lambda: storage.all(Place).values(), lambda: None)
+
+
+def db_measure(places):
+    """measures the cases with the DBStorage"""
+    from models import storage
+    from models.place import Place
+    objs, center = build(places)
+    storage.bulk_new(objs)
+    measure(center, lambda: storage.all(Place).values(), storage.close)
+
+
+def main():
+    """runs the cases in the file storage, then in SQLite"""
+    if len(sys.argv) > 1 and sys.argv[1] == "--db":
+        return db_measure(int(sys.argv[2]))
+    if len(sys.argv) > 1 and sys.argv[1] == "--file":
+        return file_measure(int(sys.argv[2]))
+    places = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    directory = tempfile.mkdtemp()
+    results = []
+    for mode, env in (("--file", {}),
+                      ("--db", {"HBNB_TYPE_STORAGE": "db",
+                                "HBNB_DB_URL": "sqlite:///" + os.path.join(
+                                    directory, "db")})):
+        env = dict(os.environ, **env)
+        if mode == "--file":
+            env.pop("HBNB_TYPE_STORAGE", None)
+        output = subprocess.run([sys.executable, os.path.abspath(__file__),
+                                 mode, str(places)], cwd=directory, env=env,
+                                stdout=subprocess.PIPE, text=True,
+                                check=True)
+        results.append([line.split() for line in output.stdout.splitlines()])
+    print("{} places (ms)".format(places))
+    print("case                       found  file scan  file index  "
+          "sqlite scan  sqlite index")
+    for (label, kind), (found, file_scan, file_index), \
+            (db_found, db_scan, db_index) in zip(CASES, *results):
+        assert found == db_found, label
+        print("{:26} {:6} {:10.1f} {:11.2f} {:12.1f} {:13.2f}".format(
+            label, int(found), float(file_scan), float(file_index),
+            float(db_scan), float(db_index)))
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
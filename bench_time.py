@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+"""
+Benchmark of the timestamps of the models: parse_time() and
+format_time() against strptime() and strftime() with the time format
+as the models used before, on one timestamp, then the eager reload of
+a JSON file and compact() with either pair of functions.
+
+Usage: ./bench_time.py [objects] [calls]
+
+The store holds 50 states and filler reviews up to objects (100000 by
+default), written to a temporary directory; the best of 3 runs of
+calls calls (200000 by default) is kept for each function.
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+import uuid
+from datetime import datetime
+from unittest import mock
+
+
+def write_store(objects):
+    """writes a file.json of 50 states and objects - 50 reviews"""
+    now = "2017-01-01T00:00:00.000000"
+    store = {}
+    for i in range(objects):
+        name = "State" if i < 50 else "Review"
+        id = str(uuid.uuid4())
+        obj = {"__class__": name, "id": id, "created_at": now,
+               "updated_at": now}
+        if name == "State":
+            obj["name"] = "State {}".format(i)
+        else:
+            obj.update(place_id="place", user_id="user", text="Review")
+        store[name + "." + id] = obj
+    with open("file.json", "w") as f:
+        json.dump(store, f)
+
+
+def seconds(function):
+    """returns the seconds function takes to run"""
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    """times the timestamp functions, then reload() and compact()"""
+    objects = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    directory = tempfile.mkdtemp()
+    os.chdir(directory)
+    write_store(objects)
+    for name in ("HBNB_TYPE_STORAGE", "HBNB_FILE_FORMAT", "HBNB_FILE_RELOAD"):
+        os.environ.pop(name, None)
+    from models import base_model, storage
+    from models.engine import file_storage
+
+    def strptime(string):
+        """parse_time() before"""
+        return datetime.strptime(string, base_model.time)
+
+    def strftime(value):
+        """format_time() before"""
+        return value.strftime(base_model.time)
+
+    string = "2017-01-01T00:00:00.000001"
+    value = base_model.parse_time(string)
+    print("{} calls".format(calls))
+    for label, function, arg in (
+            ("strptime", strptime, string),
+            ("parse_time", base_model.parse_time, string),
+            ("strftime", strftime, value),
+            ("format_time", base_model.format_time, value)):
+        best = min(timeit.repeat(lambda: function(arg), number=calls,
+                                 repeat=3))
+        print("{:12} {:7.0f} ns".format(label, best * 1e9 / calls))
+    print("{} objects".format(objects))
+    print("functions              reload s  compact s")
+    with mock.patch.object(base_model, "parse_time", strptime), \
+            mock.patch.object(file_storage, "parse_time", strptime), \
+            mock.patch.object(base_model, "format_time", strftime):
+        print("strptime, strftime     {:8.2f} {:10.2f}".format(
+            seconds(storage.reload), seconds(storage.compact)))
+    print("parse/format_time      {:8.2f} {:10.2f}".format(
+        seconds(storage.reload), seconds(storage.compact)))
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
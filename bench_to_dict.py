@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+"""
+Benchmark of the to_dict() cache of the file storage models: GET
+/api/v1/users through the Flask test client, with the dictionaries kept
+from a request to the next, and with every cache cleared before each
+request as if to_dict() built them every time as it did before.
+
+Usage: ./bench_to_dict.py [users] [requests]
+
+The store holds users (100000 by default), written to a temporary
+directory; the requests (5 by default) follow a warm-up request, with
+HBNB_TO_DICT_CACHE set so that every user is cached.
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+
+def write_store(users):
+    """writes a file.json of users"""
+    now = "2017-01-01T00:00:00.000000"
+    store = {}
+    for i in range(users):
+        id = str(uuid.uuid4())
+        store["User." + id] = {
+            "__class__": "User", "id": id, "created_at": now,
+            "updated_at": now, "email": "user{}@hbnb.io".format(i),
+            "password": "pwd", "first_name": "First", "last_name": "Last"}
+    with open("file.json", "w") as f:
+        json.dump(store, f)
+
+
+def measure(client, requests, before):
+    """returns the seconds per GET /api/v1/users, before() being called
+    ahead of each request"""
+    client.get("/api/v1/users").get_data()
+    total = 0
+    for i in range(requests):
+        before()
+        start = time.perf_counter()
+        response = client.get("/api/v1/users")
+        assert response.status_code == 200
+        response.get_data()
+        total += time.perf_counter() - start
+    return total / requests
+
+
+def main():
+    """runs GET /api/v1/users with and without the cache"""
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    directory = tempfile.mkdtemp()
+    os.chdir(directory)
+    write_store(users)
+    for name in ("HBNB_TYPE_STORAGE", "HBNB_COMPACT_MODELS"):
+        os.environ.pop(name, None)
+    # every user cached, the requests listing them all
+    os.environ["HBNB_TO_DICT_CACHE"] = str(users)
+    from api.v1.app import app
+    from models import base_model, storage
+    from models.user import User
+    client = app.test_client()
+
+    def clear():
+        """empties the cache of every user"""
+        for user in storage.all(User).values():
+            user._forget_dict()
+
+    print("{} users, {} requests".format(users, requests))
+    print("to_dict()          s/request  hit rate")
+    for label, before in (("built every time", clear),
+                          ("cached", lambda: None)):
+        base_model.cache_stats.update(hits=0, misses=0)
+        seconds = measure(client, requests, before)
+        stats = base_model.cache_stats
+        print("{:18} {:9.2f} {:8.0%}".format(
+            label, seconds,
+            stats["hits"] / max(stats["hits"] + stats["misses"], 1)))
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+"""
+Benchmark of the memory of API workers sharing a FileStorage: spawned
+processes each reload the store lazily and look a few states up, and
+their RSS and PSS (the shared pages being split between the processes)
+are reported, for the JSON file and for the mapped binary snapshot of
+HBNB_FILE_FORMAT=binary.
+
+Usage: ./bench_workers.py [objects] [workers...]
+
+The store holds 50 states and filler reviews up to objects (100000 by
+default), in a temporary directory per format; the workers are 1, 4
+and 16 by default.
+"""
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import uuid
+
+
+def write_store(objects):
+    """writes a file.json of 50 states and objects - 50 reviews"""
+    now = "2017-01-01T00:00:00.000000"
+    store = {}
+    for i in range(objects):
+        name = "State" if i < 50 else "Review"
+        id = str(uuid.uuid4())
+        obj = {"__class__": name, "id": id, "created_at": now,
+               "updated_at": now}
+        if name == "State":
+            obj["name"] = "State {}".format(i)
+        else:
+            obj.update(place_id="place", user_id="user", text="Review")
+        store[name + "." + id] = obj
+    with open("file.json", "w") as f:
+        json.dump(store, f)
+
+
+def memory():
+    """returns the RSS and PSS of this process, in kB"""
+    sizes = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("Rss", "Pss"):
+                sizes[key] = int(value.split()[0])
+    return sizes["Rss"], sizes["Pss"]
+
+
+def work(queue, done):
+    """reloads the storage, looks states up, reports the memory used"""
+    from models import storage
+    from models.state import State
+    for state in list(storage.all(State).values())[:20]:
+        storage.get(State, state.id)
+    queue.put(memory())
+    done.wait()
+
+
+def measure(workers):
+    """returns the mean RSS and PSS of workers spawned processes, in MB"""
+    queue = multiprocessing.Queue()
+    done = multiprocessing.Event()
+    processes = [multiprocessing.Process(target=work, args=(queue, done))
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+    sizes = [queue.get() for process in processes]
+    done.set()
+    for process in processes:
+        process.join()
+    return (sum(rss for rss, pss in sizes) / workers / 1024,
+            sum(pss for rss, pss in sizes) / workers / 1024)
+
+
+def main():
+    """measures the workers of the store in each format"""
+    if len(sys.argv) > 1 and sys.argv[1] == "--compact":
+        from models import storage
+        return storage.compact()
+    objects = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    counts = [int(arg) for arg in sys.argv[2:]] or [1, 4, 16]
+    multiprocessing.set_start_method("spawn")
+    directory = tempfile.mkdtemp()
+    os.chdir(directory)
+    write_store(objects)
+    os.environ.pop("HBNB_TYPE_STORAGE", None)
+    os.environ["HBNB_FILE_RELOAD"] = "lazy"
+    print("{} objects".format(objects))
+    print("format   workers  RSS MB  PSS MB (per worker)")
+    for file_format in ("json", "binary"):
+        os.environ["HBNB_FILE_FORMAT"] = file_format
+        os.mkdir(file_format)
+        shutil.copy("file.json", file_format)
+        os.chdir(os.path.join(directory, file_format))
+        subprocess.run([sys.executable, os.path.abspath(__file__),
+                        "--compact"], check=True)
+        for workers in counts:
+            print("{:8} {:7} {:7.0f} {:7.0f}".format(
+                file_format, workers, *measure(workers)))
+        os.chdir(directory)
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
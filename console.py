@@ -2,7 +2,9 @@
 """ console """
 
 import cmd
+import csv
 from datetime import datetime
+import json
 import models
 from models.amenity import Amenity
 from models.base_model import BaseModel
@@ -96,7 +98,7 @@ class HBNBCommand(cmd.Cmd):
             if len(args) > 1:
                 key = args[0] + "." + args[1]
                 if key in models.storage.all():
-                    models.storage.all().pop(key)
+                    models.storage.delete(models.storage.all()[key])
                     models.storage.save()
                 else:
                     print("** no instance found **")
@@ -160,5 +162,54 @@ class HBNBCommand(cmd.Cmd):
         else:
             print("** class doesn't exist **")
 
+    def do_load(self, arg):
+        """Stores the objects of a class read from a NDJSON or CSV file,
+        updating those already stored under their id: load <class> <path>"""
+        args = shlex.split(arg)
+        if len(args) == 0:
+            print("** class name missing **")
+        elif args[0] in classes:
+            if len(args) > 1:
+                try:
+                    # none of the rows is stored if one of them is invalid
+                    with open(args[1], newline="") as f, \
+                            models.storage.transaction():
+                        if args[1].endswith(".csv"):
+                            rows = self._csv_rows(classes[args[0]], f)
+                        else:
+                            rows = (json.loads(line) for line in f
+                                    if line.strip())
+                        print(models.storage.bulk_upsert(classes[args[0]],
+                                                         rows))
+                except OSError:
+                    print("** file doesn't exist **")
+                except ValueError:
+                    print("** invalid file **")
+            else:
+                print("** file path missing **")
+        else:
+            print("** class doesn't exist **")
+
+    def _csv_rows(self, cls, f):
+        """yields the rows of a CSV file whose header holds the attribute
+        names, the numbers converted to the type of their attribute and
+        the empty cells left out"""
+        reader = csv.reader(f)
+        keys = next(reader, [])
+        types = [self._attribute_type(cls, key) for key in keys]
+        types = [kind if kind in (int, float) else None for kind in types]
+        for row in reader:
+            yield {key: kind(value) if kind else value
+                   for key, kind, value in zip(keys, types, row) if value}
+
+    def _attribute_type(self, cls, key):
+        """returns the type of the attribute key of cls"""
+        if models.storage_t == "db":
+            column = cls.__table__.columns.get(key)
+            return str if column is None else column.type.python_type
+        # compact models keep the declared defaults aside for their slots
+        return type(getattr(cls, "_defaults", {}).get(key,
+                                                      getattr(cls, key, "")))
+
 if __name__ == '__main__':
     HBNBCommand().cmdloop()
@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+"""
+Load test of the DBStorage connection pool: threads look states up, each
+holding its connection for a while as a request to the API does, and the
+throughput and latency are reported for each pool size.
+
+Usage: ./load_test_pool.py [threads] [seconds] [hold in ms] [pool sizes...]
+
+The database is the one of the HBNB_MYSQL_* variables, or HBNB_DB_URL,
+by default a SQLite file standing in for MySQL. The other HBNB_MYSQL_POOL_*
+variables apply to every pool size, HBNB_MYSQL_MAX_OVERFLOW defaulting
+to 0 so that the pool size alone bounds the connections.
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+
+def run(threads, seconds, hold, pool_size):
+    """returns the lookups done and their latencies, and the pool
+    statistics, of threads hammering a pool of pool_size connections"""
+    from models.engine.db_storage import DBStorage
+    from models.state import State
+    os.environ["HBNB_MYSQL_POOL_SIZE"] = str(pool_size)
+    db = DBStorage()
+    db.reload()
+    ids = [state.id for state in db.all(State).values()]
+    db.close()
+    latencies = []
+    deadline = time.perf_counter() + seconds
+
+    def work():
+        """looks random states up until the deadline"""
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            db.get(State, random.choice(ids))
+            time.sleep(hold)
+            db.close()
+            latencies.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=work) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return sorted(latencies), db.pool_stats()
+
+
+def main():
+    """runs the load test for each pool size"""
+    os.environ["HBNB_TYPE_STORAGE"] = "db"
+    if not os.getenv("HBNB_DB_URL") and not os.getenv("HBNB_MYSQL_HOST"):
+        os.environ["HBNB_DB_URL"] = "sqlite:///" + os.path.join(
+            tempfile.gettempdir(), "hbnb_load_test.db")
+    os.environ.setdefault("HBNB_MYSQL_MAX_OVERFLOW", "0")
+    from models import storage
+    from models.state import State
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    hold = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.01
+    sizes = [int(size) for size in sys.argv[4:]] or [1, 2, 5, 10, 20, 40]
+    if not storage.count(State):
+        for i in range(100):
+            storage.new(State(name="State {}".format(i)))
+        storage.save()
+    storage.close()
+    print("{} threads, {:g} s, connections held {:g} ms".format(
+        threads, seconds, hold * 1000))
+    print("pool  lookups/s  p50 ms  p99 ms  wait avg ms  wait max ms"
+          "  timeouts")
+    for size in sizes:
+        latencies, stats = run(threads, seconds, hold, size)
+        if not latencies:
+            print("{:4}  no lookup done".format(size))
+            continue
+        print("{:4}  {:9.0f}  {:6.1f}  {:6.1f}  {:11.1f}  {:11.1f}  {:8}"
+              .format(size, len(latencies) / seconds,
+                      1000 * latencies[len(latencies) // 2],
+                      1000 * latencies[len(latencies) * 99 // 100],
+                      stats["wait_avg_ms"], stats["wait_max_ms"],
+                      stats["timeouts"]))
+
+
+if __name__ == "__main__":
+    main()
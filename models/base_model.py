@@ -3,28 +3,95 @@
 Contains class BaseModel
 """
 
-from datetime import datetime
+from collections import OrderedDict
+from datetime import datetime, timezone
 import models
 from os import getenv
 import sqlalchemy
 from sqlalchemy import Column, String, DateTime
 from sqlalchemy.ext.declarative import declarative_base
+import threading
 import uuid
 
 time = "%Y-%m-%dT%H:%M:%S.%f"
 
+
+def parse_time(string):
+    """returns the datetime of a string in the time format, as naive UTC
+    if it holds a UTC offset"""
+    try:
+        value = datetime.fromisoformat(string)
+    except ValueError:
+        return datetime.strptime(string, time)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def format_time(value):
+    """returns a datetime as a string in the time format"""
+    return value.isoformat(timespec="microseconds")
+
+
 if models.storage_t == "db":
     Base = declarative_base()
 else:
     Base = object
 
+# boolean - whether file storage models keep their attributes in slots
+compact = models.storage_t != "db" and getenv("HBNB_COMPACT_MODELS") == "1"
+# dictionary - to_dict() calls served from / missing the cache of the models,
+# instances holding one and the most that do
+cache_stats = {"hits": 0, "misses": 0, "size": 0,
+               "max_size": int(getenv("HBNB_TO_DICT_CACHE", 10000))}
+# OrderedDict - id() -> instance holding a to_dict() cache, least recently
+# used first, and its lock
+cached = OrderedDict()
+cache_lock = threading.Lock()
+
+
+def copy_dict(attrs):
+    """returns a copy of a to_dict() dictionary, its lists copied too"""
+    return {key: list(value) if type(value) is list else value
+            for key, value in attrs.items()}
+
+
+class CompactModel(type):
+    """metaclass of the models when compact: the attributes a model declares
+    with a default become slots, the others go to an overflow dict"""
+
+    def __new__(mcs, name, bases, namespace):
+        """moves the declared defaults of namespace aside for slots"""
+        defaults = {}
+        for base in reversed(bases):
+            defaults.update(getattr(base, "_defaults", {}))
+        slots = []
+        for key, value in list(namespace.items()):
+            if not key.startswith("_") and \
+                    isinstance(value, (str, int, float, list)):
+                defaults[key] = namespace.pop(key)
+                slots.append(key)
+        if not any(isinstance(base, CompactModel) for base in bases):
+            slots += ["id", "created_at", "updated_at", "_overflow",
+                      "_cache"]
+        namespace["__slots__"] = tuple(slots)
+        namespace["_defaults"] = defaults
+        cls = super().__new__(mcs, name, bases, namespace)
+        cls._slots = tuple(key for base in reversed(cls.__mro__)
+                           for key in base.__dict__.get("__slots__", ())
+                           if key not in ("_overflow", "_cache"))
+        return cls
 
-class BaseModel:
+
+class BaseModel(metaclass=CompactModel if compact else type):
     """The BaseModel class from which future classes will be derived"""
     if models.storage_t == "db":
         id = Column(String(60), primary_key=True)
         created_at = Column(DateTime, default=datetime.utcnow)
         updated_at = Column(DateTime, default=datetime.utcnow)
+    elif not compact:
+        # the cache of to_dict() is kept out of __dict__
+        __slots__ = ("__dict__", "__weakref__", "_cache")
 
     def __init__(self, *args, **kwargs):
         """Initialization of the base model"""
@@ -33,12 +100,12 @@ class BaseModel:
                 if key != "__class__":
                     setattr(self, key, value)
             if kwargs.get("created_at", None) and type(self.created_at) is str:
-                self.created_at = datetime.strptime(kwargs["created_at"], time)
-            else:
+                self.created_at = parse_time(kwargs["created_at"])
+            elif type(kwargs.get("created_at")) is not datetime:
                 self.created_at = datetime.utcnow()
             if kwargs.get("updated_at", None) and type(self.updated_at) is str:
-                self.updated_at = datetime.strptime(kwargs["updated_at"], time)
-            else:
+                self.updated_at = parse_time(kwargs["updated_at"])
+            elif type(kwargs.get("updated_at")) is not datetime:
                 self.updated_at = datetime.utcnow()
             if kwargs.get("id", None) is None:
                 self.id = str(uuid.uuid4())
@@ -47,10 +114,91 @@ class BaseModel:
             self.created_at = datetime.utcnow()
             self.updated_at = self.created_at
 
+    if models.storage_t != "db":
+        def __setattr__(self, name, value):
+            """sets an attribute and tells the storage the instance changed"""
+            super().__setattr__(name, value)
+            self._forget_dict()
+            models.storage.touch(self)
+
+        def __delattr__(self, name):
+            """deletes an attribute and tells the storage the instance
+            changed"""
+            super().__delattr__(name)
+            self._forget_dict()
+            models.storage.touch(self)
+
+    if compact:
+        def __setattr__(self, name, value):
+            """sets a declared attribute in its slot, any other in the
+            overflow dict, and tells the storage the instance changed"""
+            try:
+                object.__setattr__(self, name, value)
+            except AttributeError:
+                if hasattr(type(self), name):
+                    raise
+                try:
+                    overflow = object.__getattribute__(self, "_overflow")
+                except AttributeError:
+                    overflow = {}
+                    object.__setattr__(self, "_overflow", overflow)
+                overflow[name] = value
+            self._forget_dict()
+            models.storage.touch(self)
+
+        def __getattr__(self, name):
+            """returns an attribute of the overflow dict, or the default of
+            a declared attribute not set yet"""
+            try:
+                return object.__getattribute__(self, "_overflow")[name]
+            except (AttributeError, KeyError):
+                pass
+            try:
+                return self._defaults[name]
+            except KeyError:
+                raise AttributeError("'{}' object has no attribute '{}'"
+                                     .format(type(self).__name__, name))
+
+        def __delattr__(self, name):
+            """deletes an attribute from its slot or the overflow dict"""
+            try:
+                object.__delattr__(self, name)
+            except AttributeError:
+                try:
+                    del object.__getattribute__(self, "_overflow")[name]
+                except (AttributeError, KeyError):
+                    raise AttributeError(name)
+            self._forget_dict()
+            models.storage.touch(self)
+
+        @property
+        def __dict__(self):
+            """returns a copy of the attributes of the instance, as the
+            __dict__ of a model that is not compact would hold them"""
+            return self._attributes()
+
+        def _attributes(self):
+            """returns the attributes of the instance, slots included"""
+            attributes = {}
+            for key in self._slots:
+                try:
+                    attributes[key] = object.__getattribute__(self, key)
+                except AttributeError:
+                    pass
+            try:
+                attributes.update(object.__getattribute__(self, "_overflow"))
+            except AttributeError:
+                pass
+            return attributes
+    else:
+        def _attributes(self):
+            """returns the attributes of the instance"""
+            return self.__dict__.copy()
+
     def __str__(self):
         """String representation of the BaseModel class"""
         return "[{:s}] ({:s}) {}".format(self.__class__.__name__, self.id,
-                                         self.__dict__)
+                                         self._attributes())
 
     def save(self):
         """updates the attribute 'updated_at' with the current datetime"""
@@ -59,17 +207,53 @@ class BaseModel:
         models.storage.save()
 
     def to_dict(self):
-        """returns a dictionary containing all keys/values of the instance"""
-        new_dict = self.__dict__.copy()
+        """returns a dictionary containing all keys/values of the instance,
+        built once until the instance changes in file storage"""
+        if models.storage_t != "db":
+            try:
+                cache = object.__getattribute__(self, "_cache")
+            except AttributeError:
+                cache = None
+            with cache_lock:
+                if cache is not None:
+                    if id(self) in cached:
+                        # unless evicted meanwhile
+                        cached.move_to_end(id(self))
+                    cache_stats["hits"] += 1
+                else:
+                    cache_stats["misses"] += 1
+            if cache is not None:
+                return copy_dict(cache)
+        new_dict = self._attributes()
         if "created_at" in new_dict:
-            new_dict["created_at"] = new_dict["created_at"].strftime(time)
+            new_dict["created_at"] = format_time(new_dict["created_at"])
         if "updated_at" in new_dict:
-            new_dict["updated_at"] = new_dict["updated_at"].strftime(time)
+            new_dict["updated_at"] = format_time(new_dict["updated_at"])
         new_dict["__class__"] = self.__class__.__name__
         if "_sa_instance_state" in new_dict:
             del new_dict["_sa_instance_state"]
+        if models.storage_t != "db" and cache_stats["max_size"] > 0:
+            object.__setattr__(self, "_cache", copy_dict(new_dict))
+            with cache_lock:
+                cached[id(self)] = self
+                while len(cached) > cache_stats["max_size"]:
+                    obj = cached.popitem(False)[1]
+                    object.__setattr__(obj, "_cache", None)
+                cache_stats["size"] = len(cached)
         return new_dict
 
+    def _forget_dict(self):
+        """drops the to_dict() cache of the instance, if it holds one"""
+        try:
+            cache = object.__getattribute__(self, "_cache")
+        except AttributeError:
+            return
+        if cache is not None:
+            object.__setattr__(self, "_cache", None)
+            with cache_lock:
+                cached.pop(id(self), None)
+                cache_stats["size"] = len(cached)
+
     def delete(self):
         """delete the current instance from the storage"""
         models.storage.delete(self)
@@ -4,7 +4,7 @@ import models
 from models.base_model import BaseModel, Base
 from os import getenv
 import sqlalchemy
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 
@@ -12,6 +12,12 @@ class City(BaseModel, Base):
     """Representation of city """
     if models.storage_t == "db":
         __tablename__ = 'cities'
+        # pages in the (created_at, id) order, of every city or of those
+        # of a state
+        __table_args__ = (Index('ix_cities_created_at_id',
+                                'created_at', 'id'),
+                          Index('ix_cities_state_id_created_at_id',
+                                'state_id', 'created_at', 'id'))
         state_id = Column(String(60), ForeignKey('states.id'), nullable=False)
         name = Column(String(128), nullable=False)
         places = relationship("Place", backref="cities")
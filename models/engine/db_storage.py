@@ -3,21 +3,94 @@
 Contains the class DBStorage
 """
 
+from contextlib import contextmanager
 import models
 from models.amenity import Amenity
-from models.base_model import BaseModel, Base
+from models.base_model import BaseModel, Base, parse_time
 from models.city import City
+from models.engine import fulltext
+from models.engine import spatial
 from models.place import Place
 from models.review import Review
 from models.state import State
 from models.user import User
+from datetime import datetime
 from os import getenv
 import sqlalchemy
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+import threading
+import time
+import uuid
+from sqlalchemy import BigInteger, Column, DateTime, MetaData, String, \
+    Table, create_engine, event, func, insert, literal, or_, select, \
+    tuple_, union_all
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import make_transient_to_detached, scoped_session, \
+    selectinload, sessionmaker
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, StaticPool
 
 classes = {"Amenity": Amenity, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
+# integer - most rows inserted or upserted by one statement
+BATCH_SIZE = 10000
+# Table - <class name> -> version and datetime of the last change to its
+# rows, bumped in the transaction making it so that every process sees it
+versions = Table("versions", MetaData(),
+                 Column("name", String(60), primary_key=True),
+                 Column("version", BigInteger, nullable=False),
+                 Column("updated_at", DateTime, nullable=False))
+
+
+class TimedPool:
+    """pool recording how long checkouts wait for a connection, mixed in
+    before the pool class"""
+
+    def __init__(self, *args, **kwargs):
+        """creates the pool with its checkout statistics at zero"""
+        super().__init__(*args, **kwargs)
+        self.stats_lock = threading.Lock()
+        # integers - connections checked out, checkouts timed out,
+        # connections checked out and not returned yet
+        self.checkouts = 0
+        self.timeouts = 0
+        self.checked_out = 0
+        event.listen(self, "checkin", self._checkin)
+        # floats - total and longest wait for a connection, in seconds
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def connect(self):
+        """checks a connection out, timing the wait"""
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except sqlalchemy.exc.TimeoutError:
+            with self.stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            with self.stats_lock:
+                self.checkouts += 1
+                self.wait_total += wait
+                self.wait_max = max(self.wait_max, wait)
+        with self.stats_lock:
+            self.checked_out += 1
+        return connection
+
+    def _checkin(self, dbapi_connection, connection_record):
+        """counts a connection returned"""
+        with self.stats_lock:
+            self.checked_out -= 1
+
+
+class TimedQueuePool(TimedPool, QueuePool):
+    """QueuePool recording how long checkouts wait for a connection"""
+
+
+class TimedStaticPool(TimedPool, StaticPool):
+    """StaticPool recording how long checkouts wait for the connection"""
 
 
 class DBStorage:
@@ -32,32 +105,418 @@ class DBStorage:
         HBNB_MYSQL_HOST = getenv('HBNB_MYSQL_HOST')
         HBNB_MYSQL_DB = getenv('HBNB_MYSQL_DB')
         HBNB_ENV = getenv('HBNB_ENV')
-        self.__engine = create_engine('mysql+mysqldb://{}:{}@{}/{}'.
-                                      format(HBNB_MYSQL_USER,
-                                             HBNB_MYSQL_PWD,
-                                             HBNB_MYSQL_HOST,
-                                             HBNB_MYSQL_DB))
+        # HBNB_DB_URL points to another database, e.g. a SQLite file
+        url = getenv('HBNB_DB_URL') or 'mysql+mysqldb://{}:{}@{}/{}'.\
+            format(HBNB_MYSQL_USER, HBNB_MYSQL_PWD, HBNB_MYSQL_HOST,
+                   HBNB_MYSQL_DB)
+        self.__pool_options = {
+            # MySQL closes connections idle for wait_timeout (8 hours)
+            "pool_recycle": int(getenv('HBNB_MYSQL_POOL_RECYCLE', 3600)),
+            "pool_pre_ping": getenv('HBNB_MYSQL_POOL_PRE_PING', '1') != '0'
+        }
+        connect_args = {}
+        if self._in_memory(url):
+            # each connection would open a database of its own, all the
+            # threads share the only one
+            poolclass = TimedStaticPool
+            connect_args["check_same_thread"] = False
+        else:
+            poolclass = TimedQueuePool
+            self.__pool_options.update({
+                "pool_size": int(getenv('HBNB_MYSQL_POOL_SIZE', 5)),
+                "max_overflow": int(getenv('HBNB_MYSQL_MAX_OVERFLOW', 10)),
+                "pool_timeout": float(getenv('HBNB_MYSQL_POOL_TIMEOUT', 30))
+            })
+        self.__engine = create_engine(url, poolclass=poolclass,
+                                      connect_args=connect_args,
+                                      **self.__pool_options)
         if HBNB_ENV == "test":
             Base.metadata.drop_all(self.__engine)
+        self.__fulltext = fulltext.FullText(getenv('HBNB_SEARCH_PATH',
+                                                   'hbnb.search'))
+        # threading.local - depth of the transaction() of each thread, the
+        # sessions being per thread
+        self.__local = threading.local()
+
+    def _in_memory(self, url):
+        """returns whether url is that of a SQLite database in memory"""
+        url = make_url(url)
+        return url.get_backend_name() == "sqlite" and \
+            (url.database in (None, "", ":memory:") or
+             url.query.get("mode") == "memory")
 
-    def all(self, cls=None):
-        """query on the current database session"""
+    def all(self, cls=None, include=()):
+        """query on the current database session, loading the relationships
+        of cls in include with one more query each instead of one per
+        object"""
         new_dict = {}
         for clss in classes:
             if cls is None or cls is classes[clss] or cls is clss:
-                objs = self.__session.query(classes[clss]).all()
+                query = self.__session.query(classes[clss])
+                grouped = []
+                for relationship in include if cls is not None else ():
+                    attr = getattr(classes[clss], relationship)
+                    if attr.property.secondary is None and \
+                            len(attr.property.local_remote_pairs) == 1:
+                        grouped.append(attr)
+                    else:
+                        query = query.options(selectinload(attr))
+                objs = query.all()
+                for attr in grouped:
+                    self._include(objs, attr)
                 for obj in objs:
                     key = "{}.{}".format(obj.__class__.__name__, obj.id)
                     new_dict[key] = obj
         return (new_dict)
 
+    def _include(self, objs, attr):
+        """sets the one-to-many relationship attr of objs, every object of
+        its class, from a single query of the objects it lists grouped by
+        their foreign key, which beats selectinload's batches of IN lists
+        when the whole class is loaded"""
+        local, remote = attr.property.local_remote_pairs[0]
+        groups = {getattr(obj, local.key): [] for obj in objs}
+        query = self.__session.query(attr.property.mapper.class_)
+        for related in query.filter(remote.isnot(None)):
+            group = groups.get(getattr(related, remote.key))
+            if group is not None:
+                group.append(related)
+        for obj in objs:
+            set_committed_value(obj, attr.key, groups[getattr(obj, local.key)])
+
+    def all_by(self, cls, attr, value):
+        """query the objects of cls whose attribute attr equals value"""
+        new_dict = {}
+        cls = classes.get(cls, cls)
+        objs = self.__session.query(cls).filter(getattr(cls, attr) == value)
+        for obj in objs:
+            key = "{}.{}".format(obj.__class__.__name__, obj.id)
+            new_dict[key] = obj
+        return new_dict
+
+    def search_places(self, states=(), cities=(), amenities=()):
+        """query the places in the states or cities of ids, or all of them
+        if neither are given, having every amenity of ids amenities, in a
+        single query"""
+        from models.place import place_amenity
+        query = self.__session.query(Place)
+        if states or cities:
+            query = query.join(City, Place.city_id == City.id).filter(
+                or_(City.state_id.in_(set(states)),
+                    City.id.in_(set(cities))))
+        if amenities:
+            amenities = set(amenities)
+            having = select(place_amenity.c.place_id).where(
+                place_amenity.c.amenity_id.in_(amenities)).group_by(
+                place_amenity.c.place_id).having(
+                func.count(place_amenity.c.amenity_id) == len(amenities))
+            query = query.filter(Place.id.in_(having))
+        return query.order_by(Place.created_at, Place.id).all()
+
+    def page(self, cls, limit=None, after=None, attr=None, value=None):
+        """query up to limit objects of cls ordered by (created_at, id),
+        only those coming after the (created_at, id) after, and only those
+        whose attribute attr equals value if attr is given"""
+        return self._page_query(cls, limit, after, attr, value).all()
+
+    def iter_page(self, cls, limit=None, after=None, attr=None, value=None):
+        """yields the objects page() returns from a server side cursor,
+        fetching them 1000 at a time"""
+        return iter(self._page_query(cls, limit, after, attr, value)
+                    .yield_per(1000))
+
+    def page_range(self, cls, ranges, order_by="created_at", limit=None,
+                   after=None):
+        """query up to limit objects of cls whose attributes lie within
+        ranges, a dictionary attribute -> (low, high) where a None bound is
+        open, ordered by (order_by, id), only those coming after the
+        (value, id) after"""
+        cls = classes.get(cls, cls)
+        order = getattr(cls, order_by)
+        query = self.__session.query(cls).filter(order.isnot(None))
+        for attr, (low, high) in ranges.items():
+            column = getattr(cls, attr)
+            query = query.filter(column.isnot(None))
+            if low is not None:
+                query = query.filter(column >= low)
+            if high is not None:
+                query = query.filter(column <= high)
+        if after is not None:
+            query = query.filter(tuple_(order, cls.id) > tuple_(*after))
+        query = query.order_by(order, cls.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def within_bbox(self, cls, min_lat, min_lng, max_lat, max_lng,
+                    limit=None, after=None):
+        """query up to limit objects of cls whose latitude and longitude lie
+        in the box, min_lng > max_lng if it crosses the antimeridian,
+        ordered by (created_at, id), only those coming after after"""
+        cls = classes.get(cls, cls)
+        query = self._within_query(cls, min_lat, min_lng, max_lat, max_lng)
+        if after is not None:
+            query = query.filter(tuple_(cls.created_at, cls.id) >
+                                 tuple_(*after))
+        query = query.order_by(cls.created_at, cls.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def nearest(self, cls, lat, lng, k):
+        """query the k objects of cls nearest to lat, lng, nearest first"""
+        cls = classes.get(cls, cls)
+        return spatial.nearest(lambda *box: self._within_query(cls, *box),
+                               lat, lng, k)
+
+    def _within_query(self, cls, min_lat, min_lng, max_lat, max_lng):
+        """builds the query of the objects of cls in the box, a range of
+        the (latitude, longitude) index"""
+        query = self.__session.query(cls).filter(
+            cls.latitude.between(min_lat, max_lat))
+        if min_lng <= max_lng:
+            return query.filter(cls.longitude.between(min_lng, max_lng))
+        return query.filter(or_(cls.longitude >= min_lng,
+                                cls.longitude <= max_lng))
+
+    def _collect_texts(self, session, flush_context):
+        """keeps the searched texts flushed until they are committed"""
+        texts = session.info.setdefault("texts", [])
+        for objs, deleted in ((session.new, False), (session.dirty, False),
+                              (session.deleted, True)):
+            for obj in objs:
+                name = obj.__class__.__name__
+                if name in fulltext.FIELDS:
+                    texts.append((name, obj.id, None if deleted else
+                                  getattr(obj, fulltext.FIELDS[name])))
+
+    def _collect_flushed(self, session, flush_context):
+        """keeps the classes of the rows flushed until they are committed"""
+        names = session.info.setdefault("bumps", set())
+        names.update(obj.__class__.__name__ for obj in session.new)
+        names.update(obj.__class__.__name__ for obj in session.deleted)
+        names.update(obj.__class__.__name__ for obj in session.dirty
+                     if session.is_modified(obj))
+
+    def _bump_committed(self, session):
+        """bumps the versions of the classes of the rows committed, once
+        per commit and right before it, so that their rows stay locked
+        briefly, and in the order of their names, so that two commits lock
+        them in the same order"""
+        session.flush()
+        now = datetime.utcnow()
+        for name in sorted(session.info.pop("bumps", ())):
+            session.connection().execute(
+                versions.update().where(versions.c.name == name)
+                .values(version=versions.c.version + 1, updated_at=now))
+
+    def _forget(self, session):
+        """drops the texts and classes kept for a commit rolled back"""
+        session.info.pop("texts", None)
+        session.info.pop("bumps", None)
+
+    def _journal_texts(self, session):
+        """journals the searched texts committed"""
+        self.__fulltext.update(session.info.pop("texts", []))
+
+    def _texts(self):
+        """yields the (class name, id, text) of every row whose text is
+        searched"""
+        for name, attr in fulltext.FIELDS.items():
+            cls = classes[name]
+            query = self.__session.query(cls.id, getattr(cls, attr))
+            for id, text in query.yield_per(1000):
+                yield (name, id, text)
+
+    def _page_query(self, cls, limit, after, attr, value):
+        """builds the query of page()"""
+        cls = classes.get(cls, cls)
+        query = self.__session.query(cls)
+        if attr is not None:
+            query = query.filter(getattr(cls, attr) == value)
+        if after is not None:
+            query = query.filter(tuple_(cls.created_at, cls.id) >
+                                 tuple_(*after))
+        query = query.order_by(cls.created_at, cls.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    def search(self, text, cls=None, limit=10):
+        """query the [(score, obj)] of the limit places or reviews, only
+        those of cls if given, whose text best matches text, best first"""
+        names = list(fulltext.FIELDS) if cls is None else \
+            [cls if type(cls) is str else cls.__name__]
+        hits = self.__fulltext.search(text, names, limit, self._texts)
+        objs = {}
+        for name in names:
+            ids = [id for score, hit_name, id in hits if hit_name == name]
+            if ids:
+                objs.update(self.get_many(classes[name], ids))
+        return [(score, objs[name + "." + id]) for score, name, id in hits
+                if name + "." + id in objs]
+
     def new(self, obj):
         """add the object to the current database session"""
         self.__session.add(obj)
 
     def save(self):
-        """commit all changes of the current database session"""
-        self.__session.commit()
+        """commit all changes of the current database session, only flush
+        them inside a transaction()"""
+        if getattr(self.__local, "depth", 0):
+            self.__session.flush()
+        else:
+            self.__session.commit()
+
+    @contextmanager
+    def transaction(self):
+        """commits the changes made inside at once at the end, or rolls
+        them back if an exception escapes"""
+        depth = getattr(self.__local, "depth", 0)
+        self.__local.depth = depth + 1
+        try:
+            yield self
+        except BaseException:
+            self.__local.depth = depth
+            if not depth:
+                self.__session.rollback()
+            raise
+        self.__local.depth = depth
+        if not depth:
+            self.save()
+
+    def bulk_new(self, objs):
+        """inserts the columns of every object of objs, BATCH_SIZE rows per
+        statement, commits them at once and adds the objects to the
+        session as if they had been loaded; their relationships are not
+        inserted"""
+        objs = list(objs)
+        groups = {}
+        for obj in objs:
+            groups.setdefault(obj.__class__, []).append(obj)
+        texts = self.__session.info.setdefault("texts", [])
+        tables = Base.metadata.sorted_tables
+        try:
+            # parents first, for the foreign keys
+            for cls in sorted(groups,
+                              key=lambda cls: tables.index(cls.__table__)):
+                group = groups[cls]
+                keys = cls.__table__.columns.keys()
+                # an executemany sends the None of the unset attributes,
+                # the defaults of their columns are set as a flush would
+                defaults = [(key, column.default.arg) for key, column
+                            in cls.__table__.columns.items()
+                            if column.default is not None and
+                            column.default.is_scalar]
+                for obj in group:
+                    for key, value in defaults:
+                        if getattr(obj, key) is None:
+                            setattr(obj, key, value)
+                for start in range(0, len(group), BATCH_SIZE):
+                    self.__session.execute(
+                        insert(cls.__table__),
+                        [{key: getattr(obj, key) for key in keys}
+                         for obj in group[start:start + BATCH_SIZE]])
+                name = cls.__name__
+                if name in fulltext.FIELDS:
+                    texts.extend((name, obj.id,
+                                  getattr(obj, fulltext.FIELDS[name]))
+                                 for obj in group)
+            self.__session.info.setdefault("bumps", set()).update(
+                cls.__name__ for cls in groups)
+            for obj in objs:
+                make_transient_to_detached(obj)
+                self.__session.add(obj)
+            self.save()
+        except Exception:
+            self.__session.rollback()
+            raise
+
+    def bulk_upsert(self, cls, rows):
+        """inserts the rows, dictionaries of attributes, as rows of cls,
+        updating those already stored under their id, BATCH_SIZE rows per
+        statement, commits them at once and returns the number of rows"""
+        cls = classes.get(cls, cls)
+        table = cls.__table__
+        columns = set(table.columns.keys())
+        mapper = sqlalchemy.inspect(cls)
+        identity_map = self.__session.identity_map
+        name = cls.__name__
+        texts = self.__session.info.setdefault("texts", [])
+        count = 0
+        batch = {}
+        try:
+            for row in rows:
+                values = {key: value for key, value in row.items()
+                          if key in columns}
+                if values.get("id") is None:
+                    values["id"] = str(uuid.uuid4())
+                now = datetime.utcnow()
+                for key in ("created_at", "updated_at"):
+                    if values.get(key) is None:
+                        values[key] = now
+                    elif type(values[key]) is str:
+                        values[key] = parse_time(values[key])
+                # objects loaded before would keep the values replaced
+                obj = identity_map.get(
+                    mapper.identity_key_from_primary_key((values["id"],)))
+                if obj is not None:
+                    for key, value in values.items():
+                        set_committed_value(obj, key, value)
+                if fulltext.FIELDS.get(name) in values:
+                    texts.append((name, values["id"],
+                                  values[fulltext.FIELDS[name]]))
+                # rows of a statement must set the same columns, those
+                # they leave out are not overwritten when they are updated
+                keys = tuple(values)
+                group = batch.setdefault(keys, [])
+                group.append(values)
+                if len(group) == BATCH_SIZE:
+                    self.__session.execute(self._upsert(table, keys),
+                                           batch.pop(keys))
+                count += 1
+            for keys, group in batch.items():
+                self.__session.execute(self._upsert(table, keys), group)
+            if count:
+                self.__session.info.setdefault("bumps", set()).add(name)
+            self.save()
+        except Exception:
+            self.__session.rollback()
+            raise
+        return count
+
+    def _upsert(self, table, keys):
+        """returns the statement inserting rows of table, updating the
+        columns of keys but id and created_at when the id exists"""
+        update = [key for key in keys if key not in ("id", "created_at")]
+        if self.__engine.dialect.name == "sqlite":
+            stmt = sqlite.insert(table)
+            return stmt.on_conflict_do_update(
+                index_elements=["id"],
+                set_={key: stmt.excluded[key] for key in update})
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update(
+            {key: stmt.inserted[key] for key in update})
+
+    @contextmanager
+    def pinned(self):
+        """keeps the objects loaded or added inside alive until the end, so
+        that getting them again is served by the session without a
+        query"""
+        objs = []
+
+        def pin(session, obj):
+            """keeps a reference to obj"""
+            objs.append(obj)
+
+        session = self.__session()
+        event.listen(session, "loaded_as_persistent", pin)
+        event.listen(session, "pending_to_persistent", pin)
+        try:
+            yield self
+        finally:
+            event.remove(session, "loaded_as_persistent", pin)
+            event.remove(session, "pending_to_persistent", pin)
 
     def delete(self, obj=None):
         """delete from the current database session obj if not None"""
@@ -67,25 +526,92 @@ class DBStorage:
     def reload(self):
         """reloads data from the database"""
         Base.metadata.create_all(self.__engine)
+        versions.create(self.__engine, checkfirst=True)
+        try:
+            with self.__engine.begin() as connection:
+                names = set(connection.execute(
+                    select(versions.c.name)).scalars())
+                missing = [{"name": name, "version": 0,
+                            "updated_at": datetime.utcnow()}
+                           for name in classes if name not in names]
+                if missing:
+                    connection.execute(insert(versions), missing)
+        except sqlalchemy.exc.IntegrityError:
+            # inserted by another process meanwhile
+            pass
         sess_factory = sessionmaker(bind=self.__engine, expire_on_commit=False)
+        event.listen(sess_factory, "after_flush", self._collect_texts)
+        event.listen(sess_factory, "after_flush", self._collect_flushed)
+        event.listen(sess_factory, "before_commit", self._bump_committed)
+        event.listen(sess_factory, "after_commit", self._journal_texts)
+        event.listen(sess_factory, "after_rollback", self._forget)
         Session = scoped_session(sess_factory)
         self.__session = Session
 
+    def pool_stats(self):
+        """returns the options and the state of the connection pool, and
+        how long checkouts waited for a connection"""
+        pool = self.__engine.pool
+        with pool.stats_lock:
+            checkouts = pool.checkouts
+            wait_total = pool.wait_total
+            wait_max = pool.wait_max
+            timeouts = pool.timeouts
+            checked_out = pool.checked_out
+        stats = dict(self.__pool_options)
+        if isinstance(pool, QueuePool):
+            stats.update({"checked_in": pool.checkedin(),
+                          "overflow": max(0, pool.overflow())})
+        stats.update({
+            "checked_out": checked_out,
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_avg_ms": 1000 * wait_total / checkouts if checkouts else 0,
+            "wait_max_ms": 1000 * wait_max
+        })
+        return stats
+
     def close(self):
         """call remove() method on the private session attribute"""
         self.__session.remove()
 
+    def version(self, cls):
+        """returns the (version, datetime) of the last change to the rows of
+        cls, read from the versions table by its primary key"""
+        name = cls if type(cls) is str else cls.__name__
+        row = self.__session.execute(
+            select(versions.c.version, versions.c.updated_at)
+            .where(versions.c.name == name)).first()
+        return tuple(row) if row is not None else (0, datetime(1970, 1, 1))
+
     def get(self, cls, id):
-        """call the count() method to retrieve one object"""
+        """retrieve one object by its primary key"""
         if cls and id:
-            key_name = "{}.{}".format(cls.__name__, id)
-            return self.all(cls).get(key_name)
+            return self.__session.get(cls, id)
         else:
             return None
 
+    def get_many(self, cls, ids):
+        """retrieve the objects of cls having one of ids, in one query"""
+        new_dict = {}
+        objs = self.__session.query(cls).filter(cls.id.in_(set(ids))).all()
+        for obj in objs:
+            key = "{}.{}".format(obj.__class__.__name__, obj.id)
+            new_dict[key] = obj
+        return new_dict
+
     def count(self, cls=None):
-        """call the count() method to count the number of objects"""
+        """count the number of objects with SELECT COUNT(*)"""
         if cls is None:
-            return len(self.all())
+            return sum(self.counts().values())
         else:
-            return len(self.all(cls))
+            cls = classes.get(cls, cls)
+            return self.__session.query(func.count(cls.id)).scalar()
+
+    def counts(self):
+        """count the objects of every class in a single UNION ALL query"""
+        query = union_all(*[select(literal(clss).label("name"),
+                                   func.count().label("count"))
+                            .select_from(classes[clss])
+                            for clss in classes])
+        return {name: count for name, count in self.__session.execute(query)}
@@ -3,9 +3,20 @@
 Contains the FileStorage class
 """
 
+import bisect
+from contextlib import contextmanager
+from datetime import datetime
+import fcntl
 import json
+import math
+import mmap
+import os
+import threading
 from models.amenity import Amenity
-from models.base_model import BaseModel
+from models.base_model import BaseModel, format_time, parse_time
+from models.engine import fulltext
+from models.engine import snapshot
+from models.engine import spatial
 from models.city import City
 from models.place import Place
 from models.review import Review
@@ -19,67 +30,1157 @@ classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
 class FileStorage:
     """serializes instances to a JSON file & deserializes back to instances"""
 
-    # string - path to the JSON file
-    __file_path = "file.json"
+    # string - path to the JSON file, the other files are named after it
+    __file_path = os.getenv("HBNB_FILE_PATH", "file.json")
     # dictionary - empty but will store all objects by <class name>.id
     __objects = {}
+    # string - path to the binary snapshot written instead of the JSON file
+    __binary_path = os.path.splitext(__file_path)[0] + ".bin"
+    # boolean - whether saves write the binary snapshot or the JSON file
+    __binary = os.getenv("HBNB_FILE_FORMAT") == "binary"
+    # string - path to the position of each object in the JSON file
+    __positions_path = __file_path + ".positions"
+    # FullText - the indexes of the texts searched, kept next to the file
+    __fulltext = fulltext.FullText(__file_path + ".search")
+    # string - path to the journal of changes made since the JSON file
+    __journal_path = __file_path + ".journal"
+    # string - path the journal is moved to while it is being compacted
+    __compacting_path = __journal_path + ".compacting"
+    # strings - paths to the files locked by the process writing the files
+    # and by the one compacting the journal
+    __lock_path = __file_path + ".lock"
+    __compact_lock_path = __file_path + ".compact.lock"
+    # integers - descriptor of __lock_path, the process that opened it (a
+    # child must not share it) and the number of _locked() blocks holding
+    # its lock
+    __lock_fd = None
+    __lock_pid = None
+    __lock_depth = 0
+    # tuple - (inode, size, mtime) of the files when __objects last held
+    # every record in them
+    __file_stat = None
+    # file - the journal opened for appending, None until the first save
+    __journal = None
+    # integer - number of records in the journal
+    __journal_len = 0
+    # integers - records appended to / fsynced in the journal by this process
+    __written = 0
+    __synced = 0
+    # locks - serialize the writes to the files / the fsyncs of the journal
+    __lock = threading.RLock()
+    __sync_lock = threading.Lock()
+    # lock - serializes the changes to __objects and its indexes, so that
+    # no thread sees an object stored but not indexed yet
+    __objects_lock = threading.RLock()
+    # threading.local - the changes made in the transaction() of each
+    # thread (dirty, as __dirty), saved at the end of the outermost one
+    __local = threading.local()
+    # thread - the background compaction in progress, if any
+    __compaction = None
+    # dictionary - <class name>.id -> obj changed (None if deleted) since save
+    __dirty = {}
+    # boolean - whether the next save must rewrite the whole JSON file
+    __rewrite = False
+    # boolean - whether __objects was replaced by another dictionary, and so
+    # is written as is by the next save rather than merged with the files
+    __replaced = False
+    # dictionary - <class name> -> {id: obj}, a partition of __objects
+    __partitions = {}
+    # tuple - attributes linking objects together, indexed by value, or by
+    # each of their items for lists
+    __indexed = ("state_id", "city_id", "place_id", "user_id", "amenity_ids")
+    # dictionary - <class name> -> relationship -> <class name> of the
+    # objects it lists, found through __indexes
+    __relations = {"State": {"cities": "City"},
+                   "Place": {"reviews": "Review", "amenities": "Amenity"}}
+    # dictionary - <class name> -> attribute -> value -> {<class name>.id: obj}
+    __indexes = {}
+    # dictionary - <class name>.id -> (obj, values of its indexed and ranged
+    # attributes and its created_at)
+    __index_values = {}
+    # dictionary - <class name> -> sorted [(created_at, id)] of its objects,
+    # built the first time a page of the class is asked for
+    __orders = {}
+    # tuple - numeric attributes kept sorted for range queries
+    __ranged = ("price_by_night", "max_guest", "number_rooms", "latitude",
+                "longitude")
+    # dictionary - <class name> -> attribute -> sorted [(value, id)] of its
+    # objects holding a number there, built the first time a range of the
+    # attribute is asked for
+    __ranges = {}
+    # dictionary - <class name> -> sorted [(Morton code, id)] of its objects
+    # holding numbers in latitude and longitude, built the first time an
+    # area is asked for
+    __areas = {}
+    # integer - position of the latitude, then longitude, among the values
+    # of an object in __index_values
+    __area_position = len(__indexed) + __ranged.index("latitude")
+    # dictionary - the __objects the indexes were built from
+    __indexed_objects = __objects
+    # boolean - whether reload() leaves objects unbuilt until they are used
+    __lazy = os.getenv("HBNB_FILE_RELOAD") == "lazy"
+    # dictionary - <class name> -> {id: offset << 32 | length} of the objects
+    # of the JSON file not built yet, a snapshot.Positions if it is binary
+    __pending = {}
+    # integer - file descriptor of the JSON file the offsets point into
+    __snapshot_fd = None
+    # mmap - the binary snapshot the offsets point into, shared by processes
+    __snapshot_map = None
+    # boolean - whether the offsets point into __snapshot_map
+    __snapshot_binary = False
+    # dictionary - <class name> -> (version, datetime) of the last change to
+    # its objects, journaled by the saves so that every process reading the
+    # files agrees on them
+    __versions = {}
+    # tuple - the version of the classes never changed in the files
+    __unversioned = (0, datetime(1970, 1, 1))
 
-    def all(self, cls=None):
-        """returns the dictionary __objects"""
+    def all(self, cls=None, include=()):
+        """returns the dictionary __objects, or the objects of cls with the
+        objects of its relationships in include loaded and grouped by the
+        objects of cls, so that reading them does not scan their class"""
         if cls is not None:
-            new_dict = {}
-            for key, value in self.__objects.items():
-                if cls == value.__class__ or cls == value.__class__.__name__:
-                    new_dict[key] = value
-            return new_dict
+            name = cls if type(cls) is str else cls.__name__
+            for relationship in include:
+                related = self.__relations.get(name, {}).get(relationship)
+                if related is not None:
+                    self._partition(related)
+            return {name + "." + id: obj
+                    for id, obj in self._partition(name).items()}
+        for name in list(self.__pending):
+            self._load(name)
         return self.__objects
 
+    def all_by(self, cls, attr, value):
+        """returns the objects of cls whose attribute attr equals value, or
+        holds it if attr is a list"""
+        if attr in self.__indexed:
+            name = cls if type(cls) is str else cls.__name__
+            self._partition(name)
+            objs = self.__indexes.get(name, {}).get(attr, {}).get(value, {})
+        else:
+            objs = self.all(cls)
+        new_dict = {}
+        for key, obj in objs.items():
+            obj_value = getattr(obj, attr, None)
+            if obj_value == value or \
+                    type(obj_value) is list and value in obj_value:
+                new_dict[key] = obj
+        return new_dict
+
+    def search_places(self, states=(), cities=(), amenities=()):
+        """returns the places in the states or cities of ids, or all of them
+        if neither are given, having every amenity of ids amenities"""
+        self._partition(Place.__name__)
+        places = None
+        if states or cities:
+            city_ids = set(cities)
+            for state_id in states:
+                city_ids.update(city.id for city in
+                                self.all_by(City, "state_id", state_id)
+                                .values())
+            places = {}
+            for city_id in city_ids:
+                places.update(self.all_by(Place, "city_id", city_id))
+        if amenities:
+            # the amenity -> places index, walking the smallest set only
+            index = self.__indexes.get(Place.__name__, {})
+            index = index.get("amenity_ids", {})
+            sets = sorted((index.get(id, {}) for id in set(amenities)),
+                          key=len)
+            if places is not None:
+                sets.append(places)
+                sets.sort(key=len)
+            keys = sets[0].keys()
+            for other in sets[1:]:
+                keys = keys & other.keys()
+            places = {key: sets[0][key] for key in keys}
+        elif places is None:
+            places = self.all(Place)
+        return sorted(places.values(),
+                      key=lambda obj: self._order_key(obj.created_at, obj.id))
+
+    def page(self, cls, limit=None, after=None, attr=None, value=None):
+        """returns up to limit objects of cls ordered by (created_at, id),
+        only those coming after the (created_at, id) after, and only those
+        whose attribute attr equals value if attr is given"""
+        return list(self.iter_page(cls, limit, after, attr, value))
+
+    def iter_page(self, cls, limit=None, after=None, attr=None, value=None):
+        """yields the objects page() returns, looking up the order a chunk
+        at a time so that objects can come and go in between"""
+        name = cls if type(cls) is str else cls.__name__
+        if attr is not None:
+            objs = {obj.id: obj
+                    for obj in self.all_by(cls, attr, value).values()}
+            order = sorted(self._order_key(obj.created_at, id)
+                           for id, obj in objs.items())
+        else:
+            objs = self._partition(name)
+            order = self.__orders.get(name)
+            if order is None:
+                order = sorted(self._order_key(obj.created_at, id)
+                               for id, obj in objs.items())
+                self.__orders[name] = order
+        while limit is None or limit > 0:
+            start = 0 if after is None else bisect.bisect_right(order, after)
+            size = 1000 if limit is None else min(limit, 1000)
+            chunk = order[start:start + size]
+            if not chunk:
+                return
+            for created_at, id in chunk:
+                if id in objs:
+                    yield objs[id]
+            after = chunk[-1]
+            if limit is not None:
+                limit -= len(chunk)
+
+    def page_range(self, cls, ranges, order_by="created_at", limit=None,
+                   after=None):
+        """returns up to limit objects of cls whose attributes lie within
+        ranges, a dictionary attribute -> (low, high) where a None bound is
+        open, ordered by (order_by, id), only those coming after the
+        (value, id) after"""
+        name = cls if type(cls) is str else cls.__name__
+        objs = self._partition(name)
+        ranges = dict(ranges)
+        if order_by != "created_at":
+            ranges.setdefault(order_by, (None, None))
+        elif not ranges:
+            return self.page(cls, limit, after)
+        # the fewest objects of a sorted attribute or of an area within
+        # bounds, the other bounds are checked on each of them
+        best, best_size = None, None
+        for attr, (low, high) in ranges.items():
+            if attr not in self.__ranged:
+                continue
+            order = self._range_order(name, attr)
+            start = 0 if low is None else bisect.bisect_left(order, (low,))
+            end = len(order) if high is None else bisect.bisect_left(
+                order, (math.nextafter(high, math.inf),))
+            if best is None or end - start < best_size:
+                best, best_size = (attr, [(start, end)]), end - start
+        min_lat, max_lat = ranges.get("latitude", (None, None))
+        min_lng, max_lng = ranges.get("longitude", (None, None))
+        box = (min_lat, min_lng, max_lat, max_lng)
+        if None not in box and min_lng <= max_lng:
+            slices = self._area_slices(name, box)
+            size = sum(end - start for start, end in slices)
+            if best is None or size < best_size:
+                best, best_size = (None, slices), size
+        if best is None:
+            candidates = objs.values()
+        else:
+            attr, slices = best
+            if attr is None:
+                order = self.__areas[name]
+            else:
+                order = self.__ranges[name][attr]
+            if attr == order_by:
+                # already in order, stops at the limit-th match
+                start, end = slices[0]
+                if after is not None:
+                    start = max(start, bisect.bisect_right(order, after))
+                found = []
+                for i in range(start, end):
+                    obj = objs[order[i][1]]
+                    if self._in_ranges(obj, ranges):
+                        found.append(obj)
+                        if len(found) == limit:
+                            break
+                return found
+            candidates = [objs[order[i][1]] for start, end in slices
+                          for i in range(start, end)]
+        if order_by == "created_at":
+            def key(obj):
+                return self._order_key(obj.created_at, obj.id)
+        else:
+            def key(obj):
+                return (getattr(obj, order_by), obj.id)
+        found = sorted((obj for obj in candidates
+                        if self._in_ranges(obj, ranges)), key=key)
+        if after is not None:
+            found = [obj for obj in found if key(obj) > after]
+        return found if limit is None else found[:limit]
+
+    def within_bbox(self, cls, min_lat, min_lng, max_lat, max_lng,
+                    limit=None, after=None):
+        """returns up to limit objects of cls whose latitude and longitude
+        lie in the box, min_lng > max_lng if it crosses the antimeridian,
+        ordered by (created_at, id), only those coming after after"""
+        name = cls if type(cls) is str else cls.__name__
+        found = sorted(self._within(name, min_lat, min_lng, max_lat, max_lng),
+                       key=lambda obj: self._order_key(obj.created_at, obj.id))
+        if after is not None:
+            found = [obj for obj in found
+                     if self._order_key(obj.created_at, obj.id) > after]
+        return found if limit is None else found[:limit]
+
+    def nearest(self, cls, lat, lng, k):
+        """returns the k objects of cls nearest to lat, lng, nearest first"""
+        name = cls if type(cls) is str else cls.__name__
+        return spatial.nearest(lambda *box: self._within(name, *box),
+                               lat, lng, k)
+
+    def search(self, text, cls=None, limit=10):
+        """returns the [(score, obj)] of the limit places or reviews, only
+        those of cls if given, whose text best matches text, best first"""
+        names = list(fulltext.FIELDS) if cls is None else \
+            [cls if type(cls) is str else cls.__name__]
+        found = []
+        for score, name, id in self.__fulltext.search(text, names, limit,
+                                                      self._texts):
+            obj = self.get(classes[name], id)
+            if obj is not None:
+                found.append((score, obj))
+        return found
+
     def new(self, obj):
         """sets in __objects the obj with key <obj class name>.id"""
         if obj is not None:
+            self._sync_indexes()
             key = "{}.{}".format(obj.__class__.__name__, obj.id)
-            self.__objects[key] = obj
+            with self.__objects_lock:
+                self.__pending.get(obj.__class__.__name__, {}).pop(obj.id,
+                                                                   None)
+                self.__objects[key] = obj
+                self._index(key, obj)
+                self._dirty()[key] = obj
+                self._bump(obj.__class__.__name__)
+
+    def bulk_new(self, objs):
+        """stores every object of objs and saves them at once"""
+        names = set()
+        for obj in objs:
+            name = obj.__class__.__name__
+            if name not in names:
+                names.add(name)
+                self._drop_orders(name)
+            self.new(obj)
+        self._bulk_save()
+
+    def bulk_upsert(self, cls, rows):
+        """stores the rows, dictionaries of attributes, as objects of cls,
+        updating the objects already stored under their id, saves them at
+        once and returns the number of rows"""
+        name = cls if type(cls) is str else cls.__name__
+        cls = classes[name]
+        partition = self._partition(name)
+        self._drop_orders(name)
+        count = 0
+        for row in rows:
+            obj = partition.get(row.get("id"))
+            if obj is None:
+                self.new(cls(**row))
+            else:
+                # set aside so that it is indexed once, not per attribute
+                self._remove(name + "." + obj.id)
+                try:
+                    for attr, value in row.items():
+                        if attr not in ("id", "__class__", "created_at",
+                                        "updated_at"):
+                            setattr(obj, attr, value)
+                    updated_at = row.get("updated_at")
+                    obj.updated_at = parse_time(updated_at) \
+                        if type(updated_at) is str else \
+                        updated_at or datetime.utcnow()
+                finally:
+                    self.new(obj)
+            count += 1
+        self._bulk_save()
+        return count
+
+    def touch(self, obj):
+        """flags obj as changed since the last save if it is stored here"""
+        key = "{}.{}".format(obj.__class__.__name__, getattr(obj, "id", ""))
+        with self.__objects_lock:
+            if self.__objects.get(key) is obj:
+                self._index(key, obj)
+                self._dirty()[key] = obj
+                self._bump(obj.__class__.__name__)
 
     def save(self):
-        """serializes __objects to the JSON file (path: __file_path)"""
-        json_objects = {}
-        for key in self.__objects:
-            json_objects[key] = self.__objects[key].to_dict()
-        with open(self.__file_path, 'w') as f:
-            json.dump(json_objects, f)
+        """appends the objects changed since the last save to the journal,
+        at the end of the transaction() of the thread if it is in one"""
+        if getattr(self.__local, "dirty", None) is not None:
+            return
+        with self._locked():
+            self._sync_indexes()
+            rewrite = self.__rewrite
+            if not rewrite and self.__dirty:
+                # records of other processes in the files are not loaded
+                in_sync = self._file_stat() == self.__file_stat
+                dirty = self.__dirty
+                FileStorage.__dirty = {}
+                lines = []
+                for key, obj in dirty.items():
+                    value = obj.to_dict() if obj is not None else None
+                    lines.append(json.dumps({key: value}) + "\n")
+                lines.append(self._versions_record(
+                    set(key.split(".", 1)[0] for key in dirty)))
+                journal = self._journal()
+                journal.writelines(lines)
+                journal.flush()
+                self.__fulltext.update(self._text_changes(dirty))
+                FileStorage.__journal_len += len(lines)
+                FileStorage.__written += len(lines)
+                if self.__journal_len >= self.count() and \
+                        self.__compaction is None:
+                    # left to the process compacting already, if any
+                    lock = self._lock_compaction(False)
+                    if lock is not None:
+                        if not in_sync:
+                            self._catch_up()
+                        binary, data = self._rotate_journal()
+                        FileStorage.__compaction = threading.Thread(
+                            target=self._write_snapshot,
+                            args=(binary, data, lock), daemon=True)
+                        self.__compaction.start()
+                        in_sync = True
+                if in_sync:
+                    FileStorage.__file_stat = self._file_stat()
+            written = self.__written
+        if rewrite:
+            self.__fulltext.invalidate()
+            self.compact()
+        else:
+            self._sync(written)
+
+    @contextmanager
+    def transaction(self):
+        """saves the changes made inside at once at the end, or drops them,
+        restoring the objects saved, if an exception escapes; the other
+        threads do not save until it ends, and their changes are kept"""
+        if getattr(self.__local, "dirty", None) is not None:
+            yield self
+            return
+        with self.__lock:
+            self.__local.dirty = {}
+            try:
+                yield self
+            except BaseException:
+                self._rollback()
+                raise
+            finally:
+                changes = self.__local.dirty
+                self.__local.dirty = None
+            self.__dirty.update(changes)
+        self.save()
+
+    @contextmanager
+    def pinned(self):
+        """does nothing, every object loaded is kept in memory anyway"""
+        yield self
+
+    def compact(self):
+        """serializes __objects to the JSON file and empties the journal"""
+        while True:
+            compaction = self.__compaction
+            if compaction is not None:
+                compaction.join()
+            lock = self._lock_compaction(True)
+            with self._locked():
+                if self.__compaction is None:
+                    self._sync_indexes()
+                    if not self.__replaced and \
+                            self._file_stat() != self.__file_stat:
+                        self._catch_up()
+                    binary, data = self._rotate_journal()
+                    self._write_snapshot(binary, data, lock)
+                    return
+            os.close(lock)
 
     def reload(self):
-        """deserializes the JSON file to __objects"""
+        """deserializes the JSON file and replays its journal to __objects,
+        keeping the changes of the transaction() of the thread if it is in
+        one"""
+        with self._locked():
+            if getattr(self.__local, "dirty", None) is None:
+                self._reload()
+            else:
+                self._catch_up()
+
+    def _reload(self):
+        """reload() with the files locked"""
+        FileStorage.__file_stat = self._file_stat()
+        self.__orders.clear()
+        self.__ranges.clear()
+        self.__areas.clear()
+        try:
+            jo = self._read_snapshot()
+        except (OSError, ValueError):
+            # missing, or not a snapshot
+            jo = {}
+        journal_len = 0
+        versions = {}
+        for path in (self.__compacting_path, self.__journal_path):
+            try:
+                with open(path, 'r') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            # record torn by a crash while it was written
+                            continue
+                        if "." not in next(iter(record), "."):
+                            # versions of classes, keyed by their names
+                            versions.update(record)
+                        else:
+                            jo.update(record)
+                        journal_len += 1
+            except OSError:
+                pass
+        FileStorage.__journal_len = journal_len
         try:
-            with open(self.__file_path, 'r') as f:
-                jo = json.load(f)
             for key in jo:
-                self.__objects[key] = classes[jo[key]["__class__"]](**jo[key])
+                name, id = key.split(".", 1)
+                self.__pending.get(name, {}).pop(id, None)
+                if jo[key] is not None:
+                    self.new(classes[jo[key]["__class__"]](**jo[key]))
+                    del self._dirty()[key]
+                else:
+                    # deleted by another process
+                    self._remove(key)
         except:
             pass
+        # as recorded, rather than bumped by the objects built again
+        FileStorage.__versions = {
+            name: (version, parse_time(modified))
+            for name, (version, modified) in versions.items()}
 
     def delete(self, obj=None):
         """delete obj from __objects if it’s inside"""
         if obj is not None:
+            self._sync_indexes()
             key = "{}.{}".format(obj.__class__.__name__, obj.id)
-            if key in self.__objects:
-                del self.__objects[key]
+            pending = self.__pending.get(obj.__class__.__name__, {})
+            with self.__objects_lock:
+                if pending.pop(obj.id, None) is not None or \
+                        self._remove(key):
+                    self._dirty()[key] = None
+                    self._bump(obj.__class__.__name__)
 
     def close(self):
-        """call reload() method for deserializing the JSON file to objects"""
-        self.reload()
+        """call reload() only if the JSON file was changed by someone else,
+        checked again with the files locked: a compaction of this process
+        replaces them before it records their new stat"""
+        if self._file_stat() != self.__file_stat:
+            with self._locked():
+                if self._file_stat() != self.__file_stat:
+                    self.reload()
+
+    @contextmanager
+    def _locked(self):
+        """holds __lock and the lock of the files, so that no other thread
+        or process writes them meanwhile"""
+        with self.__lock:
+            if not self.__lock_depth:
+                if self.__lock_pid != os.getpid():
+                    FileStorage.__lock_fd = os.open(
+                        self.__lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+                    FileStorage.__lock_pid = os.getpid()
+                fcntl.flock(self.__lock_fd, fcntl.LOCK_EX)
+            FileStorage.__lock_depth += 1
+            try:
+                yield
+            finally:
+                FileStorage.__lock_depth -= 1
+                if not self.__lock_depth:
+                    fcntl.flock(self.__lock_fd, fcntl.LOCK_UN)
+
+    def _lock_compaction(self, blocking):
+        """returns a descriptor holding the lock of the process compacting
+        the journal until it is closed, or None if another process holds
+        it and blocking is False"""
+        fd = os.open(self.__compact_lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else
+                        fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            if blocking:
+                raise
+            return None
+        return fd
+
+    def _catch_up(self):
+        """reloads the records the other processes wrote in the files,
+        keeping the changes not saved yet, those of the transaction() of
+        the thread included; the files must be locked"""
+        dirty = self.__dirty
+        changes = getattr(self.__local, "dirty", None)
+        FileStorage.__dirty = {}
+        self.__local.dirty = None
+        kept = dict(dirty)
+        kept.update(changes or {})
+        try:
+            self._reload()
+            for key, obj in kept.items():
+                if obj is not None:
+                    self.new(obj)
+                    continue
+                name, id = key.split(".", 1)
+                self.__pending.get(name, {}).pop(id, None)
+                self._remove(key)
+        finally:
+            FileStorage.__dirty = dirty
+            self.__local.dirty = changes
+
+    def _read_snapshot(self):
+        """returns the objects of the snapshot, the JSON file or the binary
+        one, or only records where they are when reloading lazily"""
+        jo = {}
+        if os.path.exists(self.__binary_path) and \
+                (self.__binary or not os.path.exists(self.__file_path)):
+            with open(self.__binary_path, 'rb') as f:
+                if not self.__lazy:
+                    return snapshot.read_objects(f.read())
+                self._open_snapshot(f, True)
+                self.__pending.update(
+                    snapshot.map_positions(self.__snapshot_map))
+        elif not self.__lazy:
+            with open(self.__file_path, 'r') as f:
+                return json.load(f)
+        else:
+            jo = self._scan()
+        for key in list(self.__objects):
+            name, _, id = key.partition(".")
+            if id in self.__pending.get(name, ()):
+                self._remove(key)
+                self.__dirty.pop(key, None)
+        return jo
+
+    def _open_snapshot(self, f, binary):
+        """keeps the snapshot f to read pending objects from, mapped if it is
+        binary so that the processes reading it share its pages"""
+        self.__pending.clear()
+        if self.__snapshot_fd is not None:
+            os.close(self.__snapshot_fd)
+            FileStorage.__snapshot_fd = None
+        FileStorage.__snapshot_map = None
+        if binary:
+            FileStorage.__snapshot_map = mmap.mmap(f.fileno(), 0,
+                                                   access=mmap.ACCESS_READ)
+        else:
+            FileStorage.__snapshot_fd = os.dup(f.fileno())
+        FileStorage.__snapshot_binary = binary
+
+    def _scan(self):
+        """records where each object of the JSON file is instead of building
+        it, when the file holds one object per line"""
+        with open(self.__file_path, 'rb') as f:
+            first = f.readline()
+            if first.strip() != b"{":
+                f.seek(0)
+                return json.load(f)
+            self._open_snapshot(f, False)
+            pending = self.__pending
+            if not self._read_positions():
+                offset = len(first)
+                for line in f:
+                    if line[:1] == b'"':
+                        end = line.index(b'": ') + 1
+                        if b"\\" not in line[:end]:
+                            key = line[1:end - 1].decode()
+                        else:
+                            text = line.decode()
+                            key, end = json.JSONDecoder().raw_decode(text)
+                            end = len(text[:end].encode())
+                        length = len(line) - end - 2
+                        while line[end + 1 + length] in b",\r\n":
+                            length -= 1
+                        name, _, id = key.partition(".")
+                        if name not in pending:
+                            pending[name] = {}
+                        pending[name][id] = (offset + end + 2) << 32 | length
+                    offset += len(line)
+        return {}
+
+    def _read_positions(self):
+        """fills __pending from the positions saved with the JSON file,
+        returns False if they are missing or belong to another file"""
+        st = os.fstat(self.__snapshot_fd)
+        try:
+            with open(self.__positions_path, 'r') as f:
+                positions = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if positions["stat"] != [st.st_ino, st.st_size, st.st_mtime_ns]:
+            return False
+        for name, entries in positions["classes"].items():
+            self.__pending[name] = dict(zip(entries["ids"],
+                                            entries["positions"]))
+        return True
+
+    def _read(self, name, id):
+        """returns the body of a pending object of the binary snapshot or its
+        JSON text in the JSON file"""
+        position = self.__pending[name][id]
+        if self.__snapshot_binary:
+            return snapshot.body(self.__snapshot_map, position)
+        return os.pread(self.__snapshot_fd, position & 0xffffffff,
+                        position >> 32).decode()
+
+    def _read_as(self, name, id, binary):
+        """returns a pending object as a body if binary, else as JSON text"""
+        data = self._read(name, id)
+        if binary == self.__snapshot_binary:
+            return data
+        if binary:
+            return snapshot.encode(json.loads(data))
+        return snapshot.to_json(snapshot.decode(name, id, data))
+
+    def _load(self, name, ids=None):
+        """builds the pending objects of class name, or only those of ids"""
+        pending = self.__pending.get(name)
+        if not pending:
+            return
+        for id in list(pending) if ids is None else ids:
+            if id in pending:
+                try:
+                    data = self._read(name, id)
+                except KeyError:
+                    continue
+                if self.__snapshot_binary:
+                    jo = snapshot.decode(name, id, data)
+                else:
+                    jo = json.loads(data)
+                obj = classes[jo["__class__"]](**jo)
+                # stored as new() does, but unchanged
+                with self.__objects_lock:
+                    if id in pending:
+                        del pending[id]
+                        self.__objects[name + "." + id] = obj
+                        self._index(name + "." + id, obj)
+
+    def _journal(self):
+        """returns the journal opened for appending, on a fresh line; the
+        files must be locked"""
+        journal = self.__journal
+        if journal is not None:
+            try:
+                moved = os.stat(self.__journal_path).st_ino != \
+                    os.fstat(journal.fileno()).st_ino
+            except OSError:
+                moved = True
+            if moved:
+                # moved aside by another process compacting it, which
+                # wrote the records appended to it in its snapshot
+                journal.close()
+                FileStorage.__journal = None
+        if self.__journal is None:
+            journal = open(self.__journal_path, 'a')
+            if journal.tell() > 0:
+                with open(self.__journal_path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        journal.write("\n")
+            FileStorage.__journal = journal
+        return self.__journal
+
+    def _sync(self, written):
+        """fsyncs the journal up to record written, one fsync for many saves"""
+        with self.__sync_lock:
+            if self.__synced >= written:
+                return
+            with self.__lock:
+                synced = self.__written
+                if self.__journal is None:
+                    # fsynced when it was closed
+                    FileStorage.__synced = synced
+                    return
+                fd = os.dup(self.__journal.fileno())
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            FileStorage.__synced = synced
+
+    def _rotate_journal(self):
+        """moves the journal aside and returns what to compact it into"""
+        FileStorage.__rewrite = False
+        FileStorage.__replaced = False
+        for name in set(key.split(".", 1)[0] for key in self.__dirty):
+            self._bump(name)
+        self.__dirty.clear()
+        binary = self.__binary
+        data = []
+        for name, pending in self.__pending.items():
+            for id in pending:
+                data.append((name + "." + id,
+                             self._read_as(name, id, binary)))
+        for key, obj in self.__objects.items():
+            if binary:
+                data.append((key, snapshot.encode(obj._attributes())))
+            else:
+                data.append((key, json.dumps(obj.to_dict())))
+        if self.__journal is not None:
+            self.__journal.flush()
+            os.fsync(self.__journal.fileno())
+            self.__journal.close()
+            FileStorage.__journal = None
+        if os.path.exists(self.__compacting_path):
+            # left over by a crash, keep its records until the snapshot
+            with open(self.__compacting_path, 'a') as f:
+                try:
+                    with open(self.__journal_path, 'r') as journal:
+                        f.write("\n" + journal.read())
+                except OSError:
+                    pass
+                f.flush()
+                os.fsync(f.fileno())
+            open(self.__journal_path, 'w').close()
+        elif os.path.exists(self.__journal_path):
+            os.rename(self.__journal_path, self.__compacting_path)
+        FileStorage.__journal_len = 0
+        if self.__versions:
+            # the versions are only journaled, carried over to the new one
+            with open(self.__journal_path, 'a') as f:
+                f.write(self._versions_record(()))
+                f.flush()
+                os.fsync(f.fileno())
+            FileStorage.__journal_len = 1
+        return binary, data
+
+    def _write_snapshot(self, binary, data, lock):
+        """atomically replaces the snapshot with the (key, body) pairs of
+        data if binary, else with the JSON file of its (key, JSON text)
+        pairs, drops the journal records it contains and closes lock, the
+        descriptor holding the compaction lock"""
+        try:
+            path = self.__binary_path if binary else self.__file_path
+            with open(path + ".tmp", 'wb') as f:
+                if binary:
+                    snapshot.write_binary(f, data)
+                else:
+                    positions = snapshot.write_json(f, data)
+                f.flush()
+                os.fsync(f.fileno())
+                st = os.fstat(f.fileno())
+            if not binary:
+                with open(self.__positions_path + ".tmp", 'w') as f:
+                    json.dump({"stat": [st.st_ino, st.st_size,
+                                        st.st_mtime_ns],
+                               "classes": positions}, f)
+            with self._locked():
+                in_sync = self._file_stat() == self.__file_stat
+                if not binary:
+                    os.replace(self.__positions_path + ".tmp",
+                               self.__positions_path)
+                os.replace(path + ".tmp", path)
+                # the snapshot in the other format is older now
+                for old_path in ((self.__file_path, self.__positions_path)
+                                 if binary else (self.__binary_path,)):
+                    if os.path.exists(old_path):
+                        os.remove(old_path)
+                if os.path.exists(self.__compacting_path):
+                    os.remove(self.__compacting_path)
+                fd = os.open(os.path.dirname(os.path.abspath(
+                    self.__file_path)), os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                if in_sync:
+                    FileStorage.__file_stat = self._file_stat()
+        finally:
+            os.close(lock)
+            with self.__lock:
+                if self.__compaction is threading.current_thread():
+                    FileStorage.__compaction = None
+
+    def _file_stat(self):
+        """returns the (inode, size, mtime) of the JSON file and journals"""
+        stats = []
+        for path in (self.__file_path, self.__binary_path,
+                     self.__journal_path, self.__compacting_path):
+            try:
+                st = os.stat(path)
+                stats.append((st.st_ino, st.st_size, st.st_mtime_ns))
+            except OSError:
+                stats.append(None)
+        return tuple(stats)
+
+    def _text_changes(self, dirty):
+        """yields the (class name, id, text, None if deleted) of the objects
+        of dirty whose text is searched"""
+        for key, obj in dirty.items():
+            name, id = key.split(".", 1)
+            if name in fulltext.FIELDS:
+                yield (name, id, None if obj is None else
+                       getattr(obj, fulltext.FIELDS[name], None))
+
+    def _texts(self):
+        """yields the (class name, id, text) of every object whose text is
+        searched"""
+        for name, attr in fulltext.FIELDS.items():
+            for id, obj in self._partition(name).items():
+                yield (name, id, getattr(obj, attr, None))
+
+    def _index(self, key, obj):
+        """files obj under the current values of its indexed attributes"""
+        values = tuple(getattr(obj, attr, None)
+                       for attr in self.__indexed + self.__ranged)
+        values = tuple(tuple(value) if type(value) is list else value
+                       for value in values)
+        values += (getattr(obj, "created_at", None),)
+        if self.__index_values.get(key) == (obj, values):
+            return
+        self._unindex(key)
+        name, id = key.split(".", 1)
+        self.__partitions.setdefault(name, {})[id] = obj
+        if name in self.__orders:
+            bisect.insort(self.__orders[name],
+                          self._order_key(values[-1], id))
+        indexes = self.__indexes.setdefault(name, {})
+        for attr, value in zip(self.__indexed, values):
+            for value in self._indexed_values(value):
+                index = indexes.setdefault(attr, {})
+                index.setdefault(value, {})[key] = obj
+        ranges = self.__ranges.get(name, {})
+        for attr, value in zip(self.__ranged, values[len(self.__indexed):]):
+            if attr in ranges and self._is_number(value):
+                bisect.insort(ranges[attr], (value, id))
+        area = self._area(values)
+        if name in self.__areas and area is not None:
+            bisect.insort(self.__areas[name], (area, id))
+        self.__index_values[key] = (obj, values)
+
+    def _rollback(self):
+        """drops the objects changed in the transaction() of the thread and
+        reloads those saved, keeping the changes of the other threads"""
+        with self._locked():
+            self._sync_indexes()
+            changes = self.__local.dirty
+            self.__local.dirty = {}
+            for key in changes:
+                self._remove(key)
+            self._catch_up()
+
+    def _dirty(self):
+        """returns where the changes not saved yet are recorded, the
+        changes of the transaction() of the thread if it is in one"""
+        changes = getattr(self.__local, "dirty", None)
+        return self.__dirty if changes is None else changes
+
+    def _drop_orders(self, name):
+        """drops the sorted orders of the class called name, rebuilt the
+        next time they are asked for, rather than inserting many objects
+        in them one at a time"""
+        self.__orders.pop(name, None)
+        self.__ranges.pop(name, None)
+        self.__areas.pop(name, None)
+
+    def _bulk_save(self):
+        """saves the objects changed, rewriting the snapshot at once if
+        journaling them would make the journal compacted anyway"""
+        if self.__journal_len + len(self._dirty()) >= self.count():
+            FileStorage.__rewrite = True
+        self.save()
+
+    def _indexed_values(self, value):
+        """returns the values an attribute equal to value is indexed under,
+        one per item of a list"""
+        if type(value) is tuple:
+            return set(item for item in value if item and type(item) is str)
+        return (value,) if value and type(value) is str else ()
+
+    def _remove(self, key):
+        """removes the object stored under key from __objects and the
+        indexes, returns whether there was one"""
+        with self.__objects_lock:
+            if self.__objects.pop(key, None) is None:
+                return False
+            self._unindex(key)
+            return True
+
+    def _unindex(self, key):
+        """removes the object stored under key from the indexes"""
+        obj, values = self.__index_values.pop(key, (None, ()))
+        if obj is None:
+            return
+        name, id = key.split(".", 1)
+        del self.__partitions[name][id]
+        if name in self.__orders:
+            order = self.__orders[name]
+            del order[bisect.bisect_left(order,
+                                         self._order_key(values[-1], id))]
+        indexes = self.__indexes[name]
+        for attr, value in zip(self.__indexed, values):
+            for value in self._indexed_values(value):
+                del indexes[attr][value][key]
+                if not indexes[attr][value]:
+                    del indexes[attr][value]
+        ranges = self.__ranges.get(name, {})
+        for attr, value in zip(self.__ranged, values[len(self.__indexed):]):
+            if attr in ranges and self._is_number(value):
+                order = ranges[attr]
+                del order[bisect.bisect_left(order, (value, id))]
+        area = self._area(values)
+        if name in self.__areas and area is not None:
+            order = self.__areas[name]
+            del order[bisect.bisect_left(order, (area, id))]
+
+    def _order_key(self, created_at, id):
+        """returns the (created_at, id) an object is ordered by in pages"""
+        if type(created_at) is not datetime:
+            created_at = datetime.min
+        return (created_at, id)
+
+    def _range_order(self, name, attr):
+        """returns the sorted [(value, id)] of the objects of the class
+        called name holding a number in attribute attr"""
+        ranges = self.__ranges.setdefault(name, {})
+        if attr not in ranges:
+            position = len(self.__indexed) + self.__ranged.index(attr)
+            order = []
+            for id in self._partition(name):
+                value = self.__index_values[name + "." + id][1][position]
+                if self._is_number(value):
+                    order.append((value, id))
+            order.sort()
+            ranges[attr] = order
+        return ranges[attr]
+
+    def _area_order(self, name):
+        """returns the sorted [(Morton code, id)] of the objects of the class
+        called name holding numbers in latitude and longitude"""
+        if name not in self.__areas:
+            order = []
+            for id in self._partition(name):
+                area = self._area(self.__index_values[name + "." + id][1])
+                if area is not None:
+                    order.append((area, id))
+            order.sort()
+            self.__areas[name] = order
+        return self.__areas[name]
+
+    def _area(self, values):
+        """returns the Morton code of the latitude and longitude among the
+        indexed values of an object, None if they are not numbers"""
+        lat, lng = values[self.__area_position:self.__area_position + 2]
+        if self._is_number(lat) and self._is_number(lng):
+            return spatial.morton(lat, lng)
+        return None
+
+    def _area_slices(self, name, box):
+        """returns the [start, end) slices of the area order of the class
+        called name covering the box"""
+        order = self._area_order(name)
+        return [(bisect.bisect_left(order, (start,)),
+                 bisect.bisect_left(order, (end,)))
+                for start, end in spatial.cover(*box)]
+
+    def _within(self, name, *box):
+        """yields the objects of the class called name whose latitude and
+        longitude lie in the box"""
+        objs = self._partition(name)
+        order = self._area_order(name)
+        for start, end in self._area_slices(name, box):
+            for i in range(start, end):
+                obj = objs[order[i][1]]
+                if spatial.in_bbox(obj.latitude, obj.longitude, *box):
+                    yield obj
+
+    def _in_ranges(self, obj, ranges):
+        """tells whether each attribute of obj in ranges is a number lying
+        within its (low, high) bounds"""
+        for attr, (low, high) in ranges.items():
+            value = getattr(obj, attr, None)
+            if not self._is_number(value) or \
+                    low is not None and value < low or \
+                    high is not None and value > high:
+                return False
+        return True
+
+    def _is_number(self, value):
+        """tells whether value can be kept in a sorted range"""
+        return type(value) in (int, float) and not math.isnan(value)
+
+    def _partition(self, name):
+        """returns the {id: obj} partition of the class called name"""
+        self._sync_indexes()
+        self._load(name)
+        return self.__partitions.get(name, {})
+
+    def _size(self, name):
+        """returns the number of objects of the class called name"""
+        self._sync_indexes()
+        return len(self.__partitions.get(name, {})) + \
+            len(self.__pending.get(name, {}))
+
+    def _sync_indexes(self):
+        """rebuilds the indexes if __objects was replaced by another
+        dictionary"""
+        if self.__indexed_objects is self.__objects:
+            return
+        with self.__objects_lock:
+            if self.__indexed_objects is self.__objects:
+                return
+            self.__partitions.clear()
+            self.__indexes.clear()
+            self.__index_values.clear()
+            self.__pending.clear()
+            self.__orders.clear()
+            self.__ranges.clear()
+            self.__areas.clear()
+            FileStorage.__rewrite = True
+            FileStorage.__replaced = True
+            for key, obj in self.__objects.items():
+                self._index(key, obj)
+            for name in set(self.__versions) | set(self.__partitions):
+                self._bump(name)
+            FileStorage.__indexed_objects = self.__objects
+
+    def version(self, cls):
+        """returns the (version, datetime) of the last change to the objects
+        of cls, both changing whenever one of them does"""
+        name = cls if type(cls) is str else cls.__name__
+        return self.__versions.get(name, self.__unversioned)
+
+    def _bump(self, name):
+        """records a change to the objects of the class called name"""
+        self.__versions[name] = (self.version(name)[0] + 1,
+                                 datetime.utcnow())
+
+    def _versions_record(self, names):
+        """bumps the classes called names and returns the journal record of
+        the versions of every class, or of those classes only if any"""
+        for name in names:
+            self._bump(name)
+        return json.dumps({name: [version, format_time(modified)]
+                           for name, (version, modified)
+                           in self.__versions.items()
+                           if not names or name in names}) + "\n"
 
     def get(self, cls, id):
         """call get() method to retrieve one object"""
         if cls and id:
-            key_name = "{}.{}".format(cls.__name__, id)
-            return self.__objects.get(key_name)
+            self._sync_indexes()
+            self._load(cls.__name__, [id])
+            return self.__partitions.get(cls.__name__, {}).get(id)
         else:
             return None
 
+    def get_many(self, cls, ids):
+        """retrieve the objects of cls having one of ids"""
+        new_dict = {}
+        self._sync_indexes()
+        self._load(cls.__name__, ids)
+        partition = self.__partitions.get(cls.__name__, {})
+        for id in ids:
+            if id in partition:
+                new_dict[cls.__name__ + "." + id] = partition[id]
+        return new_dict
+
     def count(self, cls=None):
         """call count() method to count the number of objects"""
         if cls is None:
-            return len(self.all())
+            return sum(self.counts().values())
         else:
-            return len(self.all(cls))
+            name = cls if type(cls) is str else cls.__name__
+            return self._size(name)
+
+    def counts(self):
+        """count the objects of every class from the partition sizes"""
+        return {name: self._size(name) for name in classes}
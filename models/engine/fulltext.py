@@ -0,0 +1,397 @@
+#!/usr/bin/python3
+"""
+Full-text search of the place descriptions and review texts: an inverted
+index of each field ranked with BM25, kept on disk as a snapshot and a
+journal of the changes made since, shared by the processes using it
+"""
+
+from array import array
+import bisect
+from collections import Counter
+import fcntl
+import heapq
+import json
+import math
+import os
+import re
+import struct
+import sys
+import threading
+
+# dictionary - <class name> -> the attribute of its objects that is indexed
+FIELDS = {"Place": "description", "Review": "text"}
+# floats - BM25 saturation of the word frequency and weight of the length
+K1 = 1.2
+B = 0.75
+# bytes - first bytes of a snapshot of the indexes
+MAGIC = b"HBNBTEXT"
+# integer - bytes the journal grows to, or to the size of the snapshot if
+# larger, before an update compacts it into the snapshot
+JOURNAL_SIZE = 1 << 20
+# frozenset - words too common to be indexed
+STOPWORDS = frozenset("""a an and are as at be but by for from had has have
+he her his i if in into is it its me my no not of on or our she so than
+that the their them then there these they this to too very was we were
+what when which who will with you your""".split())
+
+_word = re.compile(r"[^\W_]+")
+
+
+def tokenize(text):
+    """returns the indexed words of text, lowercased, in order"""
+    if type(text) is not str:
+        return []
+    return [word for word in _word.findall(text.lower())
+            if word not in STOPWORDS]
+
+
+class TextIndex:
+    """inverted index of the texts of one attribute"""
+
+    def __init__(self):
+        """creates an empty index"""
+        # list - document number -> id of its object, None once removed
+        self.ids = []
+        # dictionary - id -> document number
+        self.numbers = {}
+        # array - document number -> number of words
+        self.lengths = array("I")
+        # dictionary - word -> (array of the numbers of the documents
+        # holding it, in increasing order, array of its frequency in each)
+        self.postings = {}
+        # integers - documents, words in them, documents removed since
+        # the index was compacted
+        self.count = 0
+        self.total = 0
+        self.removed = 0
+
+    def add(self, id, text):
+        """indexes text as the document of id, replacing the previous one"""
+        self.remove(id)
+        words = tokenize(text)
+        if not words:
+            return
+        number = len(self.ids)
+        self.ids.append(id)
+        self.numbers[id] = number
+        self.lengths.append(len(words))
+        for word, frequency in Counter(words).items():
+            postings = self.postings.get(word)
+            if postings is None:
+                postings = self.postings[word] = (array("I"), array("H"))
+            postings[0].append(number)
+            postings[1].append(min(frequency, 0xffff))
+        self.count += 1
+        self.total += len(words)
+
+    def remove(self, id):
+        """removes the document of id, its postings are only dropped when
+        the index is compacted"""
+        number = self.numbers.pop(id, None)
+        if number is None:
+            return
+        self.ids[number] = None
+        self.count -= 1
+        self.total -= self.lengths[number]
+        self.removed += 1
+
+    def search(self, words, limit):
+        """returns the [(score, id)] of the limit documents best matching
+        words, best first"""
+        if not self.count:
+            return []
+        lists = []
+        for word in set(words):
+            postings = self.postings.get(word)
+            if postings is not None:
+                df = len(postings[0])
+                idf = math.log(1 + (self.count - df + 0.5) / (df + 0.5))
+                lists.append((idf, postings))
+        # rarest words first, their documents are the likeliest best
+        lists.sort(key=lambda item: -item[0])
+        rest = [0.0] * (len(lists) + 1)
+        for i in range(len(lists) - 1, -1, -1):
+            rest[i] = rest[i + 1] + lists[i][0] * (K1 + 1)
+        ids = self.ids
+        lengths = self.lengths
+        base = K1 * (1 - B)
+        slope = K1 * B * self.count / self.total
+        scores = {}
+        for i, (idf, (docs, frequencies)) in enumerate(lists):
+            weight = idf * (K1 + 1)
+            if len(scores) >= limit:
+                threshold = heapq.nlargest(limit, scores.values())[-1]
+                if threshold >= rest[i]:
+                    # MaxScore: the words left cannot bring another document
+                    # in, only those that can still make it are scored
+                    scores = {number: score for number, score
+                              in scores.items() if score + rest[i] > threshold}
+                    if len(scores) * 8 < len(docs):
+                        for number in list(scores):
+                            j = bisect.bisect_left(docs, number)
+                            if j < len(docs) and docs[j] == number:
+                                tf = frequencies[j]
+                                scores[number] += weight * tf / (
+                                    tf + base + slope * lengths[number])
+                    else:
+                        for number, tf in zip(docs, frequencies):
+                            if number in scores:
+                                scores[number] += weight * tf / (
+                                    tf + base + slope * lengths[number])
+                    continue
+            if not scores:
+                scores = {number: weight * tf / (
+                    tf + base + slope * lengths[number])
+                    for number, tf in zip(docs, frequencies)}
+                if self.removed:
+                    scores = {number: score for number, score
+                              in scores.items() if ids[number] is not None}
+                continue
+            get = scores.get
+            for number, tf in zip(docs, frequencies):
+                if ids[number] is not None:
+                    scores[number] = get(number, 0) + weight * tf / (
+                        tf + base + slope * lengths[number])
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(score, ids[number]) for number, score in best]
+
+    def compacted(self):
+        """returns a copy of the index without the removed documents"""
+        index = TextIndex()
+        numbers = array("I", bytes(4 * len(self.ids)))
+        for number, id in enumerate(self.ids):
+            if id is not None:
+                numbers[number] = len(index.ids)
+                index.numbers[id] = len(index.ids)
+                index.ids.append(id)
+                index.lengths.append(self.lengths[number])
+        for word, (docs, frequencies) in self.postings.items():
+            postings = (array("I"), array("H"))
+            for number, tf in zip(docs, frequencies):
+                if self.ids[number] is not None:
+                    postings[0].append(numbers[number])
+                    postings[1].append(tf)
+            if postings[0]:
+                index.postings[word] = postings
+        index.count = self.count
+        index.total = self.total
+        return index
+
+
+class FullText:
+    """the indexes of FIELDS, kept in the snapshot at path and the journal
+    of the changes made since by every process"""
+
+    def __init__(self, path):
+        """uses the snapshot at path, read the first time it is searched"""
+        self.path = path
+        self.journal_path = path + ".journal"
+        # dictionary - <class name> -> TextIndex, None until searched
+        self.indexes = None
+        # tuple - (inode, position) of the journal replayed so far
+        self.replayed = None
+        # integer - records of the journal replayed so far
+        self.records = 0
+        self.lock = threading.Lock()
+
+    def update(self, changes):
+        """journals the (class name, id, text, None if deleted) changes, the
+        indexes replay them when they are searched next; nothing is
+        journaled without a snapshot, the indexes are then built from the
+        objects, and a journal grown past JOURNAL_SIZE and the snapshot is
+        compacted into a new snapshot"""
+        lines = [json.dumps({name + "." + id: text}) + "\n"
+                 for name, id, text in changes if name in FIELDS]
+        if not lines:
+            return
+        with self.lock:
+            with self._journal(fcntl.LOCK_EX) as f:
+                try:
+                    size = os.stat(self.path).st_size
+                except OSError:
+                    return
+                f.write("".join(lines).encode())
+                if f.seek(0, os.SEEK_END) <= max(JOURNAL_SIZE, size):
+                    return
+                if self.indexes is None:
+                    self._read()
+                self._replay(f)
+                if self.indexes is not None:
+                    self._write()
+                else:
+                    # unreadable, rebuilt the next time they are searched
+                    os.remove(self.path)
+
+    def search(self, text, names, limit, source):
+        """returns the [(score, class name, id)] of the limit documents of
+        the classes of names best matching text, best first, building the
+        indexes from the (class name, id, text) that source() yields if
+        there is no snapshot yet"""
+        words = tokenize(text)
+        with self.lock:
+            with self._journal(fcntl.LOCK_SH) as f:
+                if self.indexes is None:
+                    self._read()
+                self._replay(f)
+            if self.indexes is None or self.records >= max(
+                    1000, sum(index.count for index in self.indexes.values())):
+                with self._journal(fcntl.LOCK_EX) as f:
+                    if self.indexes is None:
+                        self._read()
+                    if self.indexes is None:
+                        self._build(f, source)
+                    self._replay(f)
+                    self._write()
+            hits = []
+            for name in names:
+                hits.extend((score, name, id) for score, id in
+                            self.indexes[name].search(words, limit))
+        return heapq.nlargest(limit, hits, key=lambda hit: hit[0])
+
+    def invalidate(self):
+        """drops the indexes, rebuilt the next time they are searched"""
+        with self.lock:
+            with self._journal(fcntl.LOCK_EX):
+                self.indexes = None
+                self.replayed = None
+                for path in (self.path, self.journal_path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+    def _journal(self, lock):
+        """returns the journal opened and locked, the one at journal_path
+        even if a compaction replaces it meanwhile"""
+        while True:
+            f = open(self.journal_path, "a+b")
+            fcntl.flock(f.fileno(), lock)
+            try:
+                if os.stat(self.journal_path).st_ino == \
+                        os.fstat(f.fileno()).st_ino:
+                    return f
+            except OSError:
+                pass
+            f.close()
+
+    def _replay(self, f):
+        """applies the records of the journal f not replayed yet, from the
+        start if it is not the journal replayed so far"""
+        if self.indexes is None:
+            return
+        inode = os.fstat(f.fileno()).st_ino
+        if self.replayed is None or self.replayed[0] != inode:
+            if self.replayed is not None:
+                # compacted by another process, the snapshot has it all
+                self._read()
+                if self.indexes is None:
+                    return
+            self.replayed = (inode, 0)
+        f.seek(self.replayed[1])
+        data = f.read()
+        # a record torn by a crash is skipped, one being written is waited
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            for key, text in record.items():
+                name, _, id = key.partition(".")
+                index = self.indexes.get(name)
+                if index is None:
+                    continue
+                if text is None:
+                    index.remove(id)
+                else:
+                    index.add(id, text)
+            self.records += 1
+        self.replayed = (inode, self.replayed[1] + end)
+
+    def _build(self, f, source):
+        """indexes every text source() yields, the records of the journal f
+        being older than the objects they come from"""
+        self.indexes = {name: TextIndex() for name in FIELDS}
+        for name, id, text in source():
+            self.indexes[name].add(id, text)
+        self.replayed = (os.fstat(f.fileno()).st_ino, f.seek(0, os.SEEK_END))
+
+    def _read(self):
+        """reads the snapshot, leaves indexes None if it is missing"""
+        self.indexes = None
+        self.replayed = None
+        self.records = 0
+        try:
+            with open(self.path, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    return
+                size, = struct.unpack("<Q", f.read(8))
+                header = json.loads(f.read(size))
+                indexes = {}
+                for name in FIELDS:
+                    entry = header[name]
+                    index = TextIndex()
+                    index.ids = entry["ids"]
+                    index.numbers = {id: number for number, id in
+                                     enumerate(index.ids) if id is not None}
+                    index.count = entry["count"]
+                    index.total = entry["total"]
+                    index.removed = entry["removed"]
+                    index.lengths = self._array(f, "I", len(index.ids),
+                                                header["byteorder"])
+                    docs = self._array(f, "I", sum(entry["sizes"]),
+                                       header["byteorder"])
+                    frequencies = self._array(f, "H", len(docs),
+                                              header["byteorder"])
+                    start = 0
+                    for word, size in zip(entry["words"], entry["sizes"]):
+                        index.postings[word] = (docs[start:start + size],
+                                                frequencies[start:
+                                                            start + size])
+                        start += size
+                    indexes[name] = index
+                self.indexes = indexes
+        except (OSError, ValueError, KeyError, EOFError, struct.error):
+            return
+
+    def _array(self, f, typecode, length, byteorder):
+        """reads an array of length items written in byteorder"""
+        items = array(typecode)
+        data = f.read(length * items.itemsize)
+        if len(data) != length * items.itemsize:
+            raise EOFError("truncated snapshot")
+        items.frombytes(data)
+        if byteorder != sys.byteorder:
+            items.byteswap()
+        return items
+
+    def _write(self):
+        """atomically replaces the snapshot with the indexes, compacted if
+        they hold more removed documents than documents, and starts an
+        empty journal; the journal must be locked"""
+        header = {"byteorder": sys.byteorder}
+        for name, index in self.indexes.items():
+            if index.removed > index.count:
+                index = self.indexes[name] = index.compacted()
+            header[name] = {"ids": index.ids, "count": index.count,
+                            "total": index.total, "removed": index.removed,
+                            "words": list(index.postings),
+                            "sizes": [len(docs) for docs, frequencies
+                                      in index.postings.values()]}
+        header = json.dumps(header).encode()
+        with open(self.path + ".tmp", "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+            for name in FIELDS:
+                index = self.indexes[name]
+                index.lengths.tofile(f)
+                for docs, frequencies in index.postings.values():
+                    docs.tofile(f)
+                for docs, frequencies in index.postings.values():
+                    frequencies.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.path + ".tmp", self.path)
+        open(self.journal_path + ".tmp", "wb").close()
+        os.replace(self.journal_path + ".tmp", self.journal_path)
+        self.replayed = (os.stat(self.journal_path).st_ino, 0)
+        self.records = 0
@@ -0,0 +1,339 @@
+#!/usr/bin/python3
+"""
+Contains the binary snapshot format of FileStorage
+
+A snapshot is MAGIC, then one body per object, then a footer made of the
+JSON list of class names and one entry per object, then a trailer.
+A body is the created_at and updated_at microseconds since EPOCH as two
+int64, followed by the JSON of the other attributes. An entry holds the
+class index, whether the id is a UUID, the offset and length of the body
+and the 16 bytes of the UUID; ids that are not UUIDs stay in the JSON and
+the entry holds their MD5 instead. Entries are sorted by class and by those
+16 bytes, so that an id can be looked up in a mapped snapshot without
+reading the whole footer.
+
+The format saves size rather than time: a snapshot is about 40% of the
+JSON file, a bit faster to write, but as long to load eagerly, most of
+it spent building the models either way.
+
+Run as `python3 -m models.engine.snapshot <source> <destination>` to
+convert a snapshot to the other format.
+"""
+
+from collections.abc import MutableMapping
+from datetime import datetime, timedelta
+import hashlib
+import json
+from models.base_model import format_time, parse_time
+import struct
+import sys
+
+MAGIC = b"HBNBSNAP"
+EPOCH = datetime(1970, 1, 1)
+times = struct.Struct("<qq")
+entry = struct.Struct("<HBQI16s")
+trailer = struct.Struct("<QQQ8s")
+# int64 - stands for a missing timestamp
+NO_TIME = -2 ** 63
+
+
+def to_micros(value):
+    """returns a datetime or its string as microseconds since EPOCH"""
+    if value is None:
+        return NO_TIME
+    if type(value) is str:
+        value = parse_time(value)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(micros):
+    """returns the datetime of microseconds since EPOCH"""
+    if micros == NO_TIME:
+        return None
+    return EPOCH + timedelta(microseconds=micros)
+
+
+def uuid_bytes(id):
+    """returns the 16 bytes of id if it is written as a UUID, else None"""
+    if type(id) is not str or len(id) != 36:
+        return None
+    try:
+        raw_id = bytes.fromhex(id.replace("-", ""))
+    except ValueError:
+        return None
+    # as uuid.UUID() writes it, not only hex digits and dashes
+    return raw_id if len(raw_id) == 16 and uuid_str(raw_id) == id else None
+
+
+def id_key(id, raw_id=None):
+    """returns the 16 bytes entries of id are sorted by, raw_id being its
+    uuid_bytes() if already known"""
+    if raw_id is None:
+        raw_id = uuid_bytes(id)
+    if raw_id is None:
+        return hashlib.md5(id.encode()).digest()
+    return raw_id
+
+
+def uuid_str(raw_id):
+    """returns the UUID of 16 bytes as a string"""
+    h = raw_id.hex()
+    return "-".join((h[:8], h[8:12], h[12:16], h[16:20], h[20:]))
+
+
+def encode(attrs):
+    """returns the body of an object from its attributes"""
+    extras = {}
+    for key, value in attrs.items():
+        if key not in ("created_at", "updated_at", "__class__",
+                       "_sa_instance_state"):
+            extras[key] = value
+    if uuid_bytes(extras.get("id")) is not None:
+        del extras["id"]
+    return times.pack(to_micros(attrs.get("created_at")),
+                      to_micros(attrs.get("updated_at"))) + \
+        json.dumps(extras).encode()
+
+
+def decode(name, id, body):
+    """returns the attributes of an object of class name from its body"""
+    created_at, updated_at = times.unpack_from(body)
+    attrs = json.loads(body[times.size:])
+    if id is not None:
+        attrs["id"] = id
+    attrs["created_at"] = from_micros(created_at)
+    attrs["updated_at"] = from_micros(updated_at)
+    attrs["__class__"] = name
+    return attrs
+
+
+def to_json(attrs):
+    """returns the JSON text of decoded attributes, like to_dict() does"""
+    attrs = attrs.copy()
+    for key in ("created_at", "updated_at"):
+        if attrs.get(key) is not None:
+            attrs[key] = format_time(attrs[key])
+    return json.dumps(attrs)
+
+
+def write_json(f, texts):
+    """writes the (<class name>.id, JSON text) pairs of texts to the binary
+    file f as a JSON object, one per line, and returns the
+    {class name: {"ids": [...], "positions": [offset << 32 | length]}}"""
+    positions = {}
+    f.write(b"{")
+    offset = 1
+    separator = "\n"
+    for key, text in texts:
+        prefix = (separator + json.dumps(key) + ": ").encode()
+        text = text.encode()
+        f.write(prefix + text)
+        offset += len(prefix)
+        name, _, id = key.partition(".")
+        entries = positions.setdefault(name, {"ids": [], "positions": []})
+        entries["ids"].append(id)
+        entries["positions"].append(offset << 32 | len(text))
+        offset += len(text)
+        separator = ",\n"
+    f.write(b"\n}\n")
+    return positions
+
+
+def write_binary(f, bodies):
+    """writes the (<class name>.id, body) pairs of bodies to the binary
+    file f and returns the {class name: {id: offset << 32 | length}}"""
+    names = []
+    numbers = {}
+    entries = []
+    positions = {}
+    f.write(MAGIC)
+    offset = len(MAGIC)
+    for key, body in bodies:
+        name, _, id = key.partition(".")
+        if name not in numbers:
+            numbers[name] = len(names)
+            names.append(name)
+            positions[name] = {}
+        raw_id = uuid_bytes(id)
+        entries.append((numbers[name], id_key(id, raw_id), raw_id is not None,
+                        offset, len(body)))
+        positions[name][id] = offset << 32 | len(body)
+        f.write(body)
+        offset += len(body)
+    names_offset = offset
+    names = json.dumps(names).encode()
+    f.write(names)
+    entries_offset = names_offset + len(names)
+    entries.sort()
+    f.write(b"".join(entry.pack(number, is_uuid, offset, length, key)
+                     for number, key, is_uuid, offset, length in entries))
+    f.write(trailer.pack(names_offset, entries_offset, len(entries), MAGIC))
+    return positions
+
+
+def read_footer(data):
+    """returns the class names, the offset of the entries and their number
+    in the binary snapshot held by the bytes-like data"""
+    if len(data) < len(MAGIC) + trailer.size:
+        raise ValueError("not a binary snapshot")
+    names_offset, entries_offset, count, magic = trailer.unpack_from(
+        data, len(data) - trailer.size)
+    if data[:len(MAGIC)] != MAGIC or magic != MAGIC:
+        raise ValueError("not a binary snapshot")
+    names = json.loads(bytes(data[names_offset:entries_offset]))
+    return names, entries_offset, count
+
+
+def entry_id(data, is_uuid, offset, length, key):
+    """returns the id of an entry of the bytes-like data"""
+    if is_uuid:
+        return uuid_str(key)
+    return json.loads(bytes(data[offset + times.size:offset + length]))["id"]
+
+
+def read_positions(data):
+    """returns the {class name: {id: offset << 32 | length}} of the binary
+    snapshot held by the bytes-like data"""
+    names, entries_offset, count = read_footer(data)
+    positions = {name: {} for name in names}
+    for number, is_uuid, offset, length, key in entry.iter_unpack(
+            data[entries_offset:entries_offset + count * entry.size]):
+        id = entry_id(data, is_uuid, offset, length, key)
+        positions[names[number]][id] = offset << 32 | length
+    return positions
+
+
+def map_positions(data):
+    """returns the {class name: Positions} of the binary snapshot held by
+    the bytes-like data, without reading its entries"""
+    names, entries_offset, count = read_footer(data)
+    positions = {}
+    start = 0
+    for number, name in enumerate(names):
+        stop = count
+        low = start
+        while low < stop:
+            middle = (low + stop) // 2
+            if entry.unpack_from(data, entries_offset +
+                                 middle * entry.size)[0] > number:
+                stop = middle
+            else:
+                low = middle + 1
+        positions[name] = Positions(data, entries_offset, start, stop)
+        start = stop
+    return positions
+
+
+class Positions(MutableMapping):
+    """the {id: offset << 32 | length} of the objects of one class, read
+    from the entries of a mapped binary snapshot when asked"""
+
+    def __init__(self, data, entries_offset, start, stop):
+        """keeps where the entries of the class are in data"""
+        self.data = data
+        self.entries_offset = entries_offset
+        self.start = start
+        self.stop = stop
+        self.removed = set()
+
+    def _entry(self, i):
+        """returns the (class, is UUID, offset, length, key) of entry i"""
+        return entry.unpack_from(self.data,
+                                 self.entries_offset + i * entry.size)
+
+    def __getitem__(self, id):
+        """returns the position of id, found by a binary search"""
+        if id in self.removed or type(id) is not str:
+            raise KeyError(id)
+        key = id_key(id)
+        low, high = self.start, self.stop
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry(middle)[4] < key:
+                low = middle + 1
+            else:
+                high = middle
+        for i in range(low, self.stop):
+            number, is_uuid, offset, length, entry_key = self._entry(i)
+            if entry_key != key:
+                break
+            if entry_id(self.data, is_uuid, offset, length, key) == id:
+                return offset << 32 | length
+        raise KeyError(id)
+
+    def __setitem__(self, id, position):
+        """positions are only read from the snapshot"""
+        raise TypeError("the positions of a snapshot are read-only")
+
+    def __delitem__(self, id):
+        """forgets id, whose object was built or deleted"""
+        self[id]
+        self.removed.add(id)
+
+    def __iter__(self):
+        """yields the ids of the class not removed"""
+        for i in range(self.start, self.stop):
+            number, is_uuid, offset, length, key = self._entry(i)
+            id = entry_id(self.data, is_uuid, offset, length, key)
+            if id not in self.removed:
+                yield id
+
+    def __len__(self):
+        """returns the number of ids of the class not removed"""
+        return self.stop - self.start - len(self.removed)
+
+
+def body(data, position):
+    """returns the body found at position in the bytes-like data"""
+    offset = position >> 32
+    return bytes(data[offset:offset + (position & 0xffffffff)])
+
+
+def read_objects(data):
+    """returns the attributes of every object of the binary snapshot held by
+    the bytes-like data by <class name>.id, the JSON of their bodies parsed
+    at once"""
+    names, entries_offset, count = read_footer(data)
+    keys = []
+    stamps = []
+    texts = []
+    for number, is_uuid, offset, length, key in entry.iter_unpack(
+            data[entries_offset:entries_offset + count * entry.size]):
+        keys.append((names[number], uuid_str(key) if is_uuid else None))
+        stamps.append(times.unpack_from(data, offset))
+        texts.append(data[offset + times.size:offset + length])
+    objects = {}
+    for (name, id), (created_at, updated_at), attrs in zip(
+            keys, stamps, json.loads(b"[" + b",".join(texts) + b"]")):
+        if id is not None:
+            attrs["id"] = id
+        attrs["created_at"] = from_micros(created_at)
+        attrs["updated_at"] = from_micros(updated_at)
+        attrs["__class__"] = name
+        objects[name + "." + attrs["id"]] = attrs
+    return objects
+
+
+def convert(src_path, dst_path):
+    """rewrites the JSON or binary snapshot src_path in the other format"""
+    with open(src_path, 'rb') as f:
+        data = f.read()
+    if data[:len(MAGIC)] == MAGIC:
+        with open(dst_path, 'wb') as f:
+            write_json(f, ((name + "." + id,
+                            to_json(decode(name, id, body(data, position))))
+                           for name, ids in read_positions(data).items()
+                           for id, position in ids.items()))
+    else:
+        objects = json.loads(data)
+        with open(dst_path, 'wb') as f:
+            write_binary(f, ((key, encode(attrs))
+                             for key, attrs in objects.items()))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: {} <source snapshot> <destination snapshot>".format(
+            sys.argv[0]))
+        sys.exit(1)
+    convert(sys.argv[1], sys.argv[2])
@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+"""
+Geographic helpers of the storage engines: great circle distances,
+bounding boxes and the Morton codes the areas of places are indexed by
+"""
+
+import heapq
+import math
+
+# float - mean radius of the Earth, in km
+EARTH_RADIUS = 6371.0
+# integer - bits of the latitude and of the longitude in a Morton code
+BITS = 26
+# integer - most cells a bounding box is covered with
+MAX_CELLS = 16
+# integer - number of cells each coordinate is divided in
+_SCALE = 1 << BITS
+
+
+def distance(lat1, lng1, lat2, lng2):
+    """returns the great circle distance between two points, in km"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * \
+        math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(min(1, a)))
+
+
+def bbox_around(lat, lng, radius):
+    """returns the (min_lat, min_lng, max_lat, max_lng) box holding the
+    circle of radius km around lat, lng, with min_lng > max_lng if it
+    crosses the antimeridian"""
+    delta = math.degrees(radius / EARTH_RADIUS)
+    min_lat, max_lat = max(-90, lat - delta), min(90, lat + delta)
+    if abs(lat) + delta >= 90:
+        return (min_lat, -180, max_lat, 180)
+    delta = math.degrees(math.asin(min(1, math.sin(radius / EARTH_RADIUS) /
+                                       math.cos(math.radians(lat)))))
+    if delta >= 180:
+        return (min_lat, -180, max_lat, 180)
+    min_lng, max_lng = lng - delta, lng + delta
+    if min_lng < -180:
+        min_lng += 360
+    if max_lng > 180:
+        max_lng -= 360
+    return (min_lat, min_lng, max_lat, max_lng)
+
+
+def in_bbox(lat, lng, min_lat, min_lng, max_lat, max_lng):
+    """tells whether lat, lng lies in the box"""
+    if not min_lat <= lat <= max_lat:
+        return False
+    if min_lng <= max_lng:
+        return min_lng <= lng <= max_lng
+    return lng >= min_lng or lng <= max_lng
+
+
+def morton(lat, lng):
+    """returns the Morton code of lat, lng, whose bits interleave those of
+    the longitude and of the latitude so that close points share a prefix"""
+    # _cell() inlined, this runs for every place when the index is built
+    x = int((lng + 180) * _SCALE / 360)
+    y = int((lat + 90) * _SCALE / 180)
+    x = 0 if x < 0 else _SCALE - 1 if x >= _SCALE else x
+    y = 0 if y < 0 else _SCALE - 1 if y >= _SCALE else y
+    return _spread(x) | _spread(y) << 1
+
+
+def cover(min_lat, min_lng, max_lat, max_lng):
+    """returns the sorted [start, end) ranges of the Morton codes of the
+    cells covering the box, the smallest cells that are at most MAX_CELLS
+    on each side of the antimeridian"""
+    if min_lng > max_lng:
+        return _merge(cover(min_lat, min_lng, max_lat, 180) +
+                      cover(min_lat, -180, max_lat, max_lng))
+    x0, x1 = _cell(min_lng, -180, 360), _cell(max_lng, -180, 360)
+    y0, y1 = _cell(min_lat, -90, 180), _cell(max_lat, -90, 180)
+    shift = 0
+    while ((x1 >> shift) - (x0 >> shift) + 1) * \
+            ((y1 >> shift) - (y0 >> shift) + 1) > MAX_CELLS:
+        shift += 1
+    size = 1 << 2 * shift
+    return _merge([((_spread(x) | _spread(y) << 1) << 2 * shift,
+                    ((_spread(x) | _spread(y) << 1) << 2 * shift) + size)
+                   for x in range(x0 >> shift, (x1 >> shift) + 1)
+                   for y in range(y0 >> shift, (y1 >> shift) + 1)])
+
+
+def nearest(within, lat, lng, k):
+    """returns the k objects nearest to lat, lng, nearest first, where
+    within(min_lat, min_lng, max_lat, max_lng) yields the objects of a box,
+    searching around circles 4 times larger each time until k are found"""
+    radius = 1.0
+    while True:
+        found = []
+        for obj in within(*bbox_around(lat, lng, radius)):
+            obj_distance = distance(lat, lng, obj.latitude, obj.longitude)
+            if obj_distance <= radius:
+                found.append((obj_distance, obj.id, obj))
+        if len(found) >= k or radius >= math.pi * EARTH_RADIUS:
+            return [obj for obj_distance, id, obj in heapq.nsmallest(k, found)]
+        radius *= 4
+
+
+def _cell(value, low, span):
+    """returns the index of the cell of value among the 2 ** BITS cells
+    dividing [low, low + span]"""
+    cell = int((value - low) * _SCALE / span)
+    return min(max(cell, 0), _SCALE - 1)
+
+
+def _spread(value):
+    """returns value with a 0 bit inserted before each of its bits"""
+    value = (value | value << 16) & 0x0000FFFF0000FFFF
+    value = (value | value << 8) & 0x00FF00FF00FF00FF
+    value = (value | value << 4) & 0x0F0F0F0F0F0F0F0F
+    value = (value | value << 2) & 0x3333333333333333
+    return (value | value << 1) & 0x5555555555555555
+
+
+def _merge(ranges):
+    """returns the sorted ranges, those touching each other merged"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and merged[-1][1] >= start:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
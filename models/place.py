@@ -4,7 +4,8 @@ import models
 from models.base_model import BaseModel, Base
 from os import getenv
 import sqlalchemy
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, Table
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, Index, \
+    Table
 from sqlalchemy.orm import relationship
 
 if models.storage_t == 'db':
@@ -16,13 +17,26 @@ if models.storage_t == 'db':
                           Column('amenity_id', String(60),
                                  ForeignKey('amenities.id', onupdate='CASCADE',
                                             ondelete='CASCADE'),
-                                 primary_key=True))
+                                 primary_key=True, index=True))
 
 
 class Place(BaseModel, Base):
     """Representation of Place """
     if models.storage_t == 'db':
         __tablename__ = 'places'
+        # price ranges sorted by price, guests ranges filtered on the price
+        # from the index, bounding boxes checked on the index alone, pages
+        # in the (created_at, id) order of every place or of those of a city
+        __table_args__ = (Index('ix_places_price_by_night_id',
+                                'price_by_night', 'id'),
+                          Index('ix_places_max_guest_price_by_night',
+                                'max_guest', 'price_by_night'),
+                          Index('ix_places_latitude_longitude',
+                                'latitude', 'longitude'),
+                          Index('ix_places_created_at_id',
+                                'created_at', 'id'),
+                          Index('ix_places_city_id_created_at_id',
+                                'city_id', 'created_at', 'id'))
         city_id = Column(String(60), ForeignKey('cities.id'), nullable=False)
         user_id = Column(String(60), ForeignKey('users.id'), nullable=False)
         name = Column(String(128), nullable=False)
@@ -59,20 +73,12 @@ class Place(BaseModel, Base):
         def reviews(self):
             """getter attribute returns the list of Review instances"""
             from models.review import Review
-            review_list = []
-            all_reviews = models.storage.all(Review)
-            for review in all_reviews.values():
-                if review.place_id == self.id:
-                    review_list.append(review)
-            return review_list
+            reviews = models.storage.all_by(Review, "place_id", self.id)
+            return list(reviews.values())
 
         @property
         def amenities(self):
             """getter attribute returns the list of Amenity instances"""
             from models.amenity import Amenity
-            amenity_list = []
-            all_amenities = models.storage.all(Amenity)
-            for amenity in all_amenities.values():
-                if amenity.place_id == self.id:
-                    amenity_list.append(amenity)
-            return amenity_list
+            amenities = models.storage.get_many(Amenity, self.amenity_ids)
+            return list(amenities.values())
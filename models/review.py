@@ -4,13 +4,19 @@ import models
 from models.base_model import BaseModel, Base
 from os import getenv
 import sqlalchemy
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, String, ForeignKey, Index
 
 
 class Review(BaseModel, Base):
     """Representation of Review """
     if models.storage_t == 'db':
         __tablename__ = 'reviews'
+        # pages in the (created_at, id) order, of every review or of
+        # those of a place
+        __table_args__ = (Index('ix_reviews_created_at_id',
+                                'created_at', 'id'),
+                          Index('ix_reviews_place_id_created_at_id',
+                                'place_id', 'created_at', 'id'))
         place_id = Column(String(60), ForeignKey('places.id'), nullable=False)
         user_id = Column(String(60), ForeignKey('users.id'), nullable=False)
         text = Column(String(1024), nullable=False)
@@ -0,0 +1,14 @@
+#!/usr/bin/python3
+"""
+Points the storage files to a temporary directory, removed at exit, before
+any test imports models
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+directory = tempfile.mkdtemp()
+atexit.register(shutil.rmtree, directory, True)
+os.environ["HBNB_FILE_PATH"] = os.path.join(directory, "file.json")
+os.environ["HBNB_SEARCH_PATH"] = os.path.join(directory, "hbnb.search")
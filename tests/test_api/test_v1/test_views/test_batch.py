@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+"""
+Contains the TestBatchDocs and TestBatch classes
+"""
+from api.v1.app import app
+import importlib
+import inspect
+from models import storage
+from models.state import State
+import pep8
+import unittest
+batch = importlib.import_module("api.v1.views.batch")
+
+
+class TestBatchDocs(unittest.TestCase):
+    """Tests to check the documentation and style of batch"""
+    @classmethod
+    def setUpClass(cls):
+        """Set up for the doc tests"""
+        cls.funcs = inspect.getmembers(batch, inspect.isfunction)
+
+    def test_pep8_conformance_batch(self):
+        """Test that api/v1/views/batch.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['api/v1/views/batch.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_batch(self):
+        """Test that test_batch.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_api/test_v1/test_views/'
+                                    'test_batch.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_batch_module_docstring(self):
+        """Test for the batch.py module docstring"""
+        self.assertIsNot(batch.__doc__, None,
+                         "batch.py needs a docstring")
+        self.assertTrue(len(batch.__doc__) >= 1,
+                        "batch.py needs a docstring")
+
+    def test_batch_func_docstrings(self):
+        """Test for the presence of docstrings in batch functions"""
+        for func in self.funcs:
+            if func[1].__module__ != batch.__name__:
+                continue
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} needs a docstring".format(func[0]))
+
+
+class TestBatch(unittest.TestCase):
+    """Test the batch endpoint"""
+    def setUp(self):
+        """Makes a test client and a state, remembers the states to
+        delete"""
+        self.client = app.test_client()
+        self.state = State(name="California")
+        self.state.save()
+        self.ids = [self.state.id]
+
+    def tearDown(self):
+        """Deletes the states the test made"""
+        for state_id in self.ids:
+            state = storage.get(State, state_id)
+            if state is not None:
+                storage.delete(state)
+        storage.save()
+
+    def post(self, data):
+        """posts data to the batch endpoint, returns the status and the
+        results of the response"""
+        response = self.client.post("/api/v1/batch", json=data)
+        return response.status_code, response.get_json()
+
+    def test_run(self):
+        """Test that the sub-requests run in order, whatever their status"""
+        status, results = self.post([
+            {"method": "POST", "path": "states", "body": {"name": "Nevada"}},
+            {"path": "/api/v1/states/missing"},
+            {"method": "PUT", "path": "/states/" + self.state.id,
+             "body": {"name": "Oregon"}},
+            {"path": "states/" + self.state.id}])
+        self.assertEqual(status, 200)
+        self.ids.append(results[0]["body"]["id"])
+        self.assertEqual([result["status"] for result in results],
+                         [201, 404, 200, 200])
+        self.assertEqual(results[3]["body"]["name"], "Oregon")
+        self.assertEqual(storage.get(State, self.ids[1]).name, "Nevada")
+
+    def test_atomic(self):
+        """Test that an atomic batch is saved at once or not at all"""
+        status, results = self.post({"atomic": True, "requests": [
+            {"method": "POST", "path": "states", "body": {"name": "Nevada"}},
+            {"method": "PUT", "path": "states/" + self.state.id,
+             "body": {"name": "Oregon"}}]})
+        self.assertEqual(status, 200)
+        self.ids.append(results[0]["body"]["id"])
+        self.assertEqual(storage.get(State, self.ids[1]).name, "Nevada")
+        storage.reload()
+        self.assertEqual(storage.get(State, self.state.id).name, "Oregon")
+
+        status, results = self.post({"atomic": True, "requests": [
+            {"method": "POST", "path": "states", "body": {"name": "Texas"}},
+            {"method": "PUT", "path": "states/" + self.state.id,
+             "body": {"name": "Utah"}},
+            {"method": "DELETE", "path": "states/missing"},
+            {"method": "DELETE", "path": "states/" + self.state.id}]})
+        self.assertEqual(status, 409)
+        self.ids.append(results[0]["body"]["id"])
+        self.assertEqual([result["status"] for result in results],
+                         [201, 200, 404, 424])
+        self.assertIsNone(storage.get(State, self.ids[2]))
+        self.assertEqual(storage.get(State, self.state.id).name, "Oregon")
+        storage.reload()
+        self.assertIsNone(storage.get(State, self.ids[2]))
+        self.assertEqual(storage.get(State, self.state.id).name, "Oregon")
+
+    def test_nested(self):
+        """Test that a batch cannot hold a batch, however it is spelled"""
+        for path in ("batch", "/api/v1/batch", "/api/v1/batch/",
+                     "/api/v1/%62atch", "/api/v1/batch?x=1"):
+            with self.subTest(path=path):
+                status, results = self.post([
+                    {"method": "POST", "path": path,
+                     "body": [{"method": "DELETE",
+                               "path": "states/" + self.state.id}]}])
+                self.assertEqual(status, 200)
+                self.assertEqual(results, [{
+                    "status": 400, "headers": {},
+                    "body": {"error": "Batches cannot be nested"}}])
+        self.assertIsNotNone(storage.get(State, self.state.id))
+
+    def test_invalid(self):
+        """Test that the body must be a list of requests"""
+        for data in ({"requests": "states"}, ["states"],
+                     {"atomic": "yes", "requests": []}):
+            with self.subTest(data=data):
+                status, results = self.post(data)
+                self.assertEqual(status, 400)
+                self.assertIn("error", results)
@@ -0,0 +1,143 @@
+#!/usr/bin/python3
+"""
+Contains the TestBulkDocs and TestBulk classes
+"""
+from api.v1.app import app
+import importlib
+import inspect
+from models import storage
+from models.city import City
+from models.state import State
+import pep8
+import unittest
+bulk = importlib.import_module("api.v1.views.bulk")
+
+
+class TestBulkDocs(unittest.TestCase):
+    """Tests to check the documentation and style of bulk"""
+    @classmethod
+    def setUpClass(cls):
+        """Set up for the doc tests"""
+        cls.funcs = inspect.getmembers(bulk, inspect.isfunction)
+
+    def test_pep8_conformance_bulk(self):
+        """Test that api/v1/views/bulk.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['api/v1/views/bulk.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_bulk(self):
+        """Test that test_bulk.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_api/test_v1/test_views/'
+                                    'test_bulk.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_bulk_module_docstring(self):
+        """Test for the bulk.py module docstring"""
+        self.assertIsNot(bulk.__doc__, None,
+                         "bulk.py needs a docstring")
+        self.assertTrue(len(bulk.__doc__) >= 1,
+                        "bulk.py needs a docstring")
+
+    def test_bulk_func_docstrings(self):
+        """Test for the presence of docstrings in bulk functions"""
+        for func in self.funcs:
+            if func[1].__module__ != bulk.__name__:
+                continue
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} needs a docstring".format(func[0]))
+
+
+class TestBulk(unittest.TestCase):
+    """Test the bulk endpoints"""
+    def setUp(self):
+        """Makes a test client and a state, remembers the objects to
+        delete"""
+        self.client = app.test_client()
+        self.state = State(name="California")
+        self.state.save()
+        self.made = [(State, self.state.id)]
+
+    def tearDown(self):
+        """Deletes the objects the test made"""
+        for cls, id in reversed(self.made):
+            obj = storage.get(cls, id)
+            if obj is not None:
+                storage.delete(obj)
+        storage.save()
+
+    def request(self, method, url, items):
+        """sends items to url, returns the status and results of the
+        response"""
+        response = self.client.open(url, method=method, json=items)
+        return response.status_code, response.get_json()
+
+    def test_post(self):
+        """Test that each valid item is created, the others rejected"""
+        status, results = self.request("POST", "/api/v1/cities/bulk", [
+            {"state_id": self.state.id, "name": "Fresno"},
+            {"name": "Nowhere"},
+            {"state_id": "missing", "name": "Lost"},
+            "Reno",
+            {"state_id": self.state.id, "name": "Napa"}])
+        self.assertEqual(status, 200)
+        self.assertEqual([result["status"] for result in results],
+                         [201, 400, 404, 400, 201])
+        self.assertEqual(results[1]["body"], {"error": "Missing state_id"})
+        self.assertEqual(results[2]["body"], {"error": "Not found"})
+        self.assertEqual(results[3]["body"], {"error": "Not a JSON"})
+        for result in (results[0], results[4]):
+            self.made.append((City, result["body"]["id"]))
+            city = storage.get(City, result["body"]["id"])
+            self.assertEqual(city.name, result["body"]["name"])
+            self.assertEqual(city.state_id, self.state.id)
+        storage.reload()
+        self.assertEqual(storage.get(City, results[4]["body"]["id"]).name,
+                         "Napa")
+
+    def test_patch(self):
+        """Test that each item found is updated, its id left alone"""
+        other = State(name="Nevada")
+        other.save()
+        self.made.append((State, other.id))
+        status, results = self.request("PATCH", "/api/v1/states/bulk", [
+            {"id": self.state.id, "name": "Oregon", "created_at": "x"},
+            {"id": "missing", "name": "Utah"},
+            {"name": "Texas"},
+            {"id": other.id, "name": "Idaho"}])
+        self.assertEqual(status, 200)
+        self.assertEqual([result["status"] for result in results],
+                         [200, 404, 400, 200])
+        self.assertEqual(results[2]["body"], {"error": "Missing id"})
+        storage.reload()
+        self.assertEqual(storage.get(State, self.state.id).name, "Oregon")
+        self.assertEqual(storage.get(State, other.id).name, "Idaho")
+
+    def test_delete(self):
+        """Test that each item found is deleted once"""
+        status, results = self.request("DELETE", "/api/v1/states/bulk", [
+            self.state.id, {"id": self.state.id}, "missing", 7])
+        self.assertEqual(status, 200)
+        self.assertEqual([result["status"] for result in results],
+                         [200, 404, 404, 400])
+        self.assertEqual(results[0]["body"], {})
+        self.assertIsNone(storage.get(State, self.state.id))
+        storage.reload()
+        self.assertIsNone(storage.get(State, self.state.id))
+
+    def test_invalid(self):
+        """Test that the body must be a list of at most MAX_ITEMS items"""
+        status, results = self.request("POST", "/api/v1/states/bulk",
+                                       {"name": "Nevada"})
+        self.assertEqual(status, 400)
+        self.assertEqual(results, {"error": "Not a list"})
+        status, results = self.request("DELETE", "/api/v1/states/bulk",
+                                       ["x"] * (bulk.MAX_ITEMS + 1))
+        self.assertEqual(status, 400)
+        self.assertIn("error", results)
+        self.assertIsNotNone(storage.get(State, self.state.id))
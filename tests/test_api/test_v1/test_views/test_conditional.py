@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+"""
+Contains the TestConditionalDocs and TestConditional classes
+"""
+from api.v1.app import app
+import importlib
+import inspect
+from models import storage
+from models.amenity import Amenity
+from models.state import State
+import pep8
+import unittest
+conditional = importlib.import_module("api.v1.views.conditional")
+
+
+class TestConditionalDocs(unittest.TestCase):
+    """Tests to check the documentation and style of conditional"""
+    @classmethod
+    def setUpClass(cls):
+        """Set up for the doc tests"""
+        cls.funcs = inspect.getmembers(conditional, inspect.isfunction)
+
+    def test_pep8_conformance_conditional(self):
+        """Test that api/v1/views/conditional.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['api/v1/views/conditional.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_conditional(self):
+        """Test that test_conditional.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_api/test_v1/test_views/'
+                                    'test_conditional.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_conditional_module_docstring(self):
+        """Test for the conditional.py module docstring"""
+        self.assertIsNot(conditional.__doc__, None,
+                         "conditional.py needs a docstring")
+        self.assertTrue(len(conditional.__doc__) >= 1,
+                        "conditional.py needs a docstring")
+
+    def test_conditional_func_docstrings(self):
+        """Test for the presence of docstrings in conditional functions"""
+        for func in self.funcs:
+            if func[1].__module__ != conditional.__name__:
+                continue
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} needs a docstring".format(func[0]))
+
+
+class TestConditional(unittest.TestCase):
+    """Test the conditional GET requests of the views"""
+    def setUp(self):
+        """Makes a test client and a state"""
+        self.client = app.test_client()
+        self.state = State(name="California")
+        self.state.save()
+        self.url = "/api/v1/states/" + self.state.id
+
+    def tearDown(self):
+        """Deletes the state"""
+        state = storage.get(State, self.state.id)
+        if state is not None:
+            storage.delete(state)
+            storage.save()
+
+    def test_etag(self):
+        """Test that an ETag still matching gets an empty 304"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+        self.assertIn("Accept", response.headers["Vary"])
+        response = self.client.get(self.url,
+                                   headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b"")
+        self.assertEqual(response.headers["ETag"], etag)
+        response = self.client.get("/api/v1/states",
+                                   headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(self.url,
+                                   headers={"If-None-Match": '"other"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["ETag"], etag)
+
+    def test_changed(self):
+        """Test that a change to an object of the class changes the ETag"""
+        etag = self.client.get(self.url).headers["ETag"]
+        response = self.client.put(self.url, json={"name": "Nevada"})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url,
+                                   headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["name"], "Nevada")
+        self.assertNotEqual(response.headers["ETag"], etag)
+        etag = response.headers["ETag"]
+        response = self.client.get("/api/v1/amenities")
+        self.assertNotEqual(response.headers["ETag"], etag)
+        response = self.client.post("/api/v1/amenities",
+                                    json={"name": "Wifi"})
+        storage.delete(storage.get(Amenity, response.get_json()["id"]))
+        storage.save()
+        response = self.client.get(self.url,
+                                   headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_accept(self):
+        """Test that the ETag depends on the media type asked for"""
+        etag = self.client.get("/api/v1/states").headers["ETag"]
+        response = self.client.get(
+            "/api/v1/states", headers={"If-None-Match": etag,
+                                       "Accept": "application/x-ndjson"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_last_modified(self):
+        """Test that a request not older than Last-Modified gets a 304"""
+        response = self.client.get(self.url)
+        last_modified = response.headers["Last-Modified"]
+        response = self.client.get(
+            self.url, headers={"If-Modified-Since": last_modified})
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(self.url, headers={
+            "If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.url, headers={
+            "If-Modified-Since": last_modified, "If-None-Match": '"other"'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_not_found(self):
+        """Test that only the 200 responses carry validators"""
+        response = self.client.get("/api/v1/states/missing")
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn("ETag", response.headers)
+        self.assertNotIn("Last-Modified", response.headers)
@@ -0,0 +1,193 @@
+#!/usr/bin/python3
+"""
+Contains the TestPaginationDocs and TestPagination classes
+"""
+from api.v1.app import app
+from api.v1.views import pagination
+import base64
+import inspect
+import json
+from models import storage
+from models.city import City
+from models.state import State
+import pep8
+import unittest
+from unittest import mock
+
+
+class TestPaginationDocs(unittest.TestCase):
+    """Tests to check the documentation and style of pagination"""
+    @classmethod
+    def setUpClass(cls):
+        """Set up for the doc tests"""
+        cls.funcs = inspect.getmembers(pagination, inspect.isfunction)
+
+    def test_pep8_conformance_pagination(self):
+        """Test that api/v1/views/pagination.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['api/v1/views/pagination.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pep8_conformance_test_pagination(self):
+        """Test that test_pagination.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['tests/test_api/test_v1/test_views/'
+                                    'test_pagination.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_pagination_module_docstring(self):
+        """Test for the pagination.py module docstring"""
+        self.assertIsNot(pagination.__doc__, None,
+                         "pagination.py needs a docstring")
+        self.assertTrue(len(pagination.__doc__) >= 1,
+                        "pagination.py needs a docstring")
+
+    def test_pagination_func_docstrings(self):
+        """Test for the presence of docstrings in pagination functions"""
+        for func in self.funcs:
+            if func[1].__module__ != pagination.__name__:
+                continue
+            self.assertIsNot(func[1].__doc__, None,
+                             "{:s} needs a docstring".format(func[0]))
+            self.assertTrue(len(func[1].__doc__) >= 1,
+                            "{:s} needs a docstring".format(func[0]))
+
+
+class TestPagination(unittest.TestCase):
+    """Test the pages of the list endpoints"""
+    def setUp(self):
+        """Makes a test client and remembers the objects to delete"""
+        self.client = app.test_client()
+        self.made = []
+
+    def tearDown(self):
+        """Deletes the objects the test made"""
+        for cls, id in reversed(self.made):
+            obj = storage.get(cls, id)
+            if obj is not None:
+                storage.delete(obj)
+        storage.save()
+
+    def post(self, cls, url, **kwargs):
+        """posts an object of cls to url and returns its dictionary"""
+        response = self.client.post(url, json=kwargs)
+        self.assertEqual(response.status_code, 201)
+        self.made.append((cls, response.get_json()["id"]))
+        return response.get_json()
+
+    def post_state(self, **kwargs):
+        """posts a state and returns its dictionary"""
+        return self.post(State, "/api/v1/states", **kwargs)
+
+    def post_cities(self, number):
+        """posts number cities of a new state, returns the url listing them
+        and their ids in the (created_at, id) order"""
+        state = self.post_state(name="Paged")
+        url = "/api/v1/states/{}/cities".format(state["id"])
+        ids = [self.post(City, url, name="City {}".format(i),
+                         created_at="2020-01-0{}T00:00:00".format(i))["id"]
+               for i in range(1, number + 1)]
+        return url, ids
+
+    def test_utc_offset_created_at(self):
+        """Test that a created_at with a UTC offset is stored as naive UTC"""
+        state = self.post_state(name="Offset",
+                                created_at="2020-01-01T02:00:00+02:00")
+        self.assertEqual(state["created_at"], "2020-01-01T00:00:00.000000")
+        response = self.client.get("/api/v1/states")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(state["id"],
+                      [obj["id"] for obj in response.get_json()])
+        response = self.client.get("/api/v1/states?limit=1")
+        self.assertEqual(response.status_code, 200)
+        storage.reload()
+        response = self.client.get("/api/v1/states")
+        self.assertEqual(response.status_code, 200)
+
+    def test_utc_offset_cursor(self):
+        """Test that a cursor with a UTC offset is read as naive UTC"""
+        state = self.post_state(name="Offset",
+                                created_at="2020-01-01T00:00:00.000000")
+        position = json.dumps(["2019-12-31T23:00:00-01:00", ""])
+        cursor = base64.urlsafe_b64encode(position.encode()).decode()
+        response = self.client.get(
+            "/api/v1/states?limit=1&cursor=" + cursor)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([obj["id"] for obj in response.get_json()],
+                         [state["id"]])
+
+    def test_invalid_cursor(self):
+        """Test that a cursor that does not decode is a 400 error"""
+        response = self.client.get("/api/v1/states?cursor=notacursor")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(), {"error": "Invalid cursor"})
+
+    def test_invalid_bbox(self):
+        """Test that a bbox not made of 4 finite numbers, or with a latitude
+        out of [-90, 90], is a 400 error"""
+        for bbox in ("nan,0,1,1", "0,inf,1,1", "0,0,1", "0,0,a,1",
+                     "-91,0,1,1", "0,0,90.5,1"):
+            with self.subTest(bbox=bbox):
+                response = self.client.get("/api/v1/places?bbox=" + bbox)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("bbox", response.get_json()["error"])
+        response = self.client.get("/api/v1/places?bbox=-90,-180,90,180")
+        self.assertEqual(response.status_code, 200)
+
+    def test_link_next(self):
+        """Test that full pages link to the next one until the last"""
+        url, ids = self.post_cities(5)
+        pages = []
+        response = self.client.get(url + "?limit=2&fields=id")
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append([obj["id"] for obj in response.get_json()])
+            link = response.headers.get("Link")
+            if link is None:
+                break
+            self.assertTrue(link.endswith('>; rel="next"'))
+            self.assertIn("fields=id", link)
+            response = self.client.get(link[1:link.index(">")])
+        self.assertEqual(pages, [ids[0:2], ids[2:4], ids[4:5]])
+        response = self.client.get(url + "?limit=5")
+        self.assertEqual(len(response.get_json()), 5)
+        self.assertIn("Link", response.headers)
+
+    def test_limit(self):
+        """Test that limits are positive and capped to MAX_LIMIT"""
+        url, ids = self.post_cities(3)
+        for limit in ("0", "-1", "two"):
+            with self.subTest(limit=limit):
+                response = self.client.get(url + "?limit=" + limit)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.get_json(),
+                                 {"error": "Invalid limit"})
+        with mock.patch.object(pagination, "MAX_LIMIT", 2):
+            response = self.client.get(url + "?limit=999999999999")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([obj["id"] for obj in response.get_json()],
+                         ids[:2])
+        self.assertIn("?limit=2&", response.headers["Link"])
+
+    def test_stream(self):
+        """Test that unpaged lists are streamed, as JSON or NDJSON"""
+        url, ids = self.post_cities(3)
+        with mock.patch.object(pagination, "CHUNK_SIZE", 2):
+            response = self.client.get(url)
+            self.assertNotIn("Content-Length", response.headers)
+            self.assertEqual(response.mimetype, "application/json")
+            self.assertEqual([obj["id"] for obj in response.get_json()], ids)
+            response = self.client.get(
+                url, headers={"Accept": pagination.NDJSON})
+            self.assertNotIn("Content-Length", response.headers)
+            self.assertEqual(response.mimetype, pagination.NDJSON)
+            lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], ids)
+        response = self.client.get(
+            url + "?limit=2", headers={"Accept": pagination.NDJSON})
+        self.assertIn("Content-Length", response.headers)
+        self.assertEqual(response.mimetype, pagination.NDJSON)
+        self.assertEqual(len(response.get_data(as_text=True).splitlines()),
+                         2)
@@ -5,8 +5,14 @@ Contains the class TestConsoleDocs
 
 import console
 import inspect
+import io
+import models
+from models.place import Place
+import os
 import pep8
+import tempfile
 import unittest
+from unittest import mock
 HBNBCommand = console.HBNBCommand
 
 
@@ -39,3 +45,24 @@ class TestConsoleDocs(unittest.TestCase):
                          "HBNBCommand class needs a docstring")
         self.assertTrue(len(HBNBCommand.__doc__) >= 1,
                         "HBNBCommand class needs a docstring")
+
+
+class TestConsoleLoad(unittest.TestCase):
+    """Class for testing the load command of the console"""
+    def test_load_invalid_row(self):
+        """Test that no row of a file with an invalid one is stored"""
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "places.csv")
+        with open(path, "w") as f:
+            f.write("name,city_id,user_id,max_guest\n"
+                    "Loft,city,user,2\n"
+                    "Barn,city,user,x\n")
+        count = models.storage.count(Place)
+        with mock.patch("sys.stdout", new=io.StringIO()) as out:
+            HBNBCommand().onecmd("load Place " + path)
+        self.assertEqual(out.getvalue(), "** invalid file **\n")
+        os.remove(path)
+        os.rmdir(directory)
+        models.storage.save()
+        models.storage.reload()
+        self.assertEqual(models.storage.count(Place), count)
@@ -3,7 +3,11 @@
 from datetime import datetime
 import inspect
 import models
+import os
 import pep8 as pycodestyle
+import subprocess
+import sys
+import tempfile
 import time
 import unittest
 from unittest import mock
@@ -158,3 +162,99 @@ class TestBaseModel(unittest.TestCase):
         self.assertEqual(old_created_at, new_created_at)
         self.assertTrue(mock_storage.new.called)
         self.assertTrue(mock_storage.save.called)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_compact_models(self):
+        """Test that compact models keep declared attributes in slots and
+        the others in the overflow dict"""
+        script = "\n".join([
+            "from models.place import Place",
+            "place = Place(name='Loft', city_id='c')",
+            "place.color = 'red'",
+            "assert type(place).__dictoffset__ == 0",
+            "assert place.__dict__ == place._attributes()",
+            "assert place.number_rooms == 0 and place.color == 'red'",
+            "d = place.to_dict()",
+            "assert d['name'] == 'Loft' and d['color'] == 'red'",
+            "assert 'number_rooms' not in d",
+            "assert Place(**d).to_dict() == d",
+            "del place.color",
+            "assert not hasattr(place, 'color')",
+        ])
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))))
+        env = dict(os.environ, HBNB_COMPACT_MODELS="1", PYTHONPATH=root)
+        with tempfile.TemporaryDirectory() as cwd:
+            result = subprocess.run([sys.executable, "-c", script], cwd=cwd,
+                                    env=env, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    @unittest.skipIf(models.storage_t == 'db' or models.base_model.compact,
+                     "not testing file storage, or already compact")
+    def test_models_compact(self):
+        """Test that the tests of the models pass with compact models"""
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))))
+        env = dict(os.environ, HBNB_COMPACT_MODELS="1", PYTHONPATH=root)
+        with tempfile.TemporaryDirectory() as cwd:
+            # the style checks read the files relative to the repository
+            result = subprocess.run(
+                [sys.executable, "-m", "pytest", "-q", "-p",
+                 "no:cacheprovider", "-k", "not pep8",
+                 os.path.join(root, "tests", "test_models")],
+                cwd=cwd, env=env, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stdout)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_to_dict_cache(self):
+        """Test that to_dict is cached until the instance changes"""
+        stats = models.base_model.cache_stats
+        inst = BaseModel()
+        inst.name = "Holberton"
+        hits, misses = stats["hits"], stats["misses"]
+        first = inst.to_dict()
+        first["name"] = "changed by the caller"
+        self.assertEqual(inst.to_dict()["name"], "Holberton")
+        self.assertEqual((stats["hits"], stats["misses"]),
+                         (hits + 1, misses + 1))
+        self.assertNotIn("_cache", inst.to_dict())
+        inst.name = "School"
+        self.assertEqual(inst.to_dict()["name"], "School")
+        del inst.name
+        self.assertNotIn("name", inst.to_dict())
+        self.assertEqual(stats["misses"], misses + 3)
+        inst.amenity_ids = ["1"]
+        inst.to_dict()["amenity_ids"].append("2")
+        self.assertEqual(inst.to_dict()["amenity_ids"], ["1"])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_to_dict_cache_size(self):
+        """Test that only the instances used last keep their to_dict cached"""
+        stats = models.base_model.cache_stats
+        insts = [BaseModel() for i in range(3)]
+        with mock.patch.dict(stats, max_size=2):
+            for inst in insts:
+                inst.to_dict()
+            self.assertLessEqual(stats["size"], 2)
+            self.assertIsNone(insts[0]._cache)
+            self.assertIsNotNone(insts[2]._cache)
+            insts[1].name = "changed"
+            self.assertIsNone(insts[1]._cache)
+            self.assertNotIn(id(insts[1]), models.base_model.cached)
+
+    def test_parse_time(self):
+        """Test that parse_time returns naive UTC datetimes"""
+        parse_time = models.base_model.parse_time
+        expected = datetime(2020, 1, 1, 12, 30, 0, 5)
+        for string in ("2020-01-01T12:30:00.000005",
+                       "2020-01-01T12:30:00.000005+00:00",
+                       "2020-01-01T14:30:00.000005+02:00",
+                       "2020-01-01T12:30:00.000005Z"):
+            with self.subTest(string=string):
+                value = parse_time(string)
+                self.assertIsNone(value.tzinfo)
+                self.assertEqual(value, expected)
+        inst = BaseModel(created_at="2020-01-01T07:30:00.000005-05:00")
+        self.assertEqual(inst.created_at, expected)
+        with self.assertRaises(ValueError):
+            parse_time("not a time")
@@ -7,6 +7,8 @@ from datetime import datetime
 import inspect
 import models
 from models.engine import file_storage
+from models.engine import fulltext
+from models.engine import snapshot
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
@@ -17,8 +19,23 @@ from models.user import User
 import json
 import os
 import pep8
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import unittest
+from unittest import mock
 FileStorage = file_storage.FileStorage
+
+
+def file_path(name):
+    """returns the path of the storage file called name, in the directory
+    of the JSON file of FileStorage"""
+    return os.path.join(
+        os.path.dirname(FileStorage._FileStorage__file_path), name)
+
+
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
 
@@ -110,7 +127,7 @@ class TestFileStorage(unittest.TestCase):
         for key, value in new_dict.items():
             new_dict[key] = value.to_dict()
         string = json.dumps(new_dict)
-        with open("file.json", "r") as f:
+        with open(file_path("file.json"), "r") as f:
             js = f.read()
         self.assertEqual(json.loads(string), json.loads(js))
 
@@ -134,3 +151,683 @@ class TestFileStorage(unittest.TestCase):
         models.storage.new(obj)
         result = models.storage.get(State, state_id)
         self.assertEqual(result, obj)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_close_keeps_objects_when_file_unchanged(self):
+        """Test that close does not re-read a file nobody else changed"""
+        obj = State(name="California")
+        obj.save()
+        key = "State." + obj.id
+        models.storage.close()
+        self.assertIs(models.storage.all()[key], obj)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_close_reloads_file_changed_elsewhere(self):
+        """Test that close picks up changes written by another process"""
+        obj = State(name="California")
+        obj.save()
+        models.storage.compact()
+        key = "State." + obj.id
+        with open(file_path("file.json"), "r") as f:
+            js = json.load(f)
+        js[key]["name"] = "Nevada, but longer"
+        with open(file_path("file.json"), "w") as f:
+            json.dump(js, f)
+        models.storage.close()
+        self.assertEqual(models.storage.all()[key].name, "Nevada, but longer")
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_close_during_own_compaction(self):
+        """Test that close does not reload the files this process is
+        changing with them locked, as its background compaction does"""
+        obj = State(name="California")
+        obj.save()
+        storage = models.storage
+        changed = threading.Event()
+
+        def compaction():
+            """changes the files, then records their stat, locked"""
+            with storage._locked():
+                with open(file_path("file.json.journal"), "a") as f:
+                    f.write("\n")
+                changed.set()
+                time.sleep(0.2)
+                FileStorage._FileStorage__file_stat = storage._file_stat()
+
+        thread = threading.Thread(target=compaction)
+        thread.start()
+        self.assertTrue(changed.wait(10))
+        with mock.patch.object(FileStorage, "_reload") as reload:
+            storage.close()
+        thread.join(10)
+        reload.assert_not_called()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_new_while_reading(self):
+        """Test that reading while another thread stores objects does not
+        take __objects for replaced"""
+        models.storage.compact()
+        states = [State(name="State {}".format(i)) for i in range(2000)]
+        done = threading.Event()
+
+        def read():
+            """looks states up until the writer is done"""
+            while not done.is_set():
+                models.storage.get(State, states[0].id)
+                models.storage.count(State)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        try:
+            for state in states:
+                models.storage.new(state)
+        finally:
+            done.set()
+            reader.join(10)
+        self.assertFalse(FileStorage._FileStorage__replaced)
+        self.assertFalse(FileStorage._FileStorage__rewrite)
+        for state in states:
+            models.storage.delete(state)
+        models.storage.save()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_get_many(self):
+        """Test that get_many returns only the existing requested objects"""
+        obj1 = State(name="California")
+        obj2 = State(name="Nevada")
+        models.storage.new(obj1)
+        models.storage.new(obj2)
+        result = models.storage.get_many(State, [obj1.id, obj2.id, "nope"])
+        self.assertEqual(result, {"State." + obj1.id: obj1,
+                                  "State." + obj2.id: obj2})
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_counts(self):
+        """Test that counts matches count for every class"""
+        State(name="California").save()
+        counts = models.storage.counts()
+        for key, value in classes.items():
+            with self.subTest(key=key):
+                self.assertEqual(counts[key], models.storage.count(value))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_page(self):
+        """Test that page walks the objects in (created_at, id) order"""
+        state = State(name="California")
+        cities = [City(name="City {}".format(i), state_id=state.id,
+                       created_at=datetime(2017, 1, 1, 0, 0, 0, i))
+                  for i in range(5)]
+        models.storage.new(state)
+        for city in cities:
+            models.storage.new(city)
+        count = models.storage.count(City)
+        seen = []
+        after = None
+        while True:
+            page = models.storage.page(City, 2, after)
+            seen.extend(page)
+            if len(page) < 2:
+                break
+            after = (page[-1].created_at, page[-1].id)
+        self.assertEqual(len(seen), count)
+        keys = [(obj.created_at, obj.id) for obj in seen]
+        self.assertEqual(keys, sorted(keys))
+        cities[0].created_at = datetime.max
+        self.assertIs(models.storage.page(City)[-1], cities[0])
+        models.storage.delete(cities[1])
+        page = models.storage.page(City, None, None, "state_id", state.id)
+        self.assertEqual(page, [cities[i] for i in (2, 3, 4, 0)])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_iter_page_survives_changes(self):
+        """Test that iter_page keeps its place while objects come and go"""
+        amenities = [Amenity(name="Amenity {}".format(i),
+                             created_at=datetime(2017, 1, 1, 0, 0, 0, i))
+                     for i in range(1500)]
+        for amenity in amenities:
+            models.storage.new(amenity)
+        seen = []
+        for amenity in models.storage.iter_page(Amenity):
+            if amenity is amenities[0]:
+                models.storage.delete(amenities[1001])
+            seen.append(amenity)
+        self.assertIn(amenities[1000], seen)
+        self.assertNotIn(amenities[1001], seen)
+        self.assertIn(amenities[1499], seen)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_search_places(self):
+        """Test that search_places filters by location and amenities"""
+        state = State(name="California")
+        city = City(name="San Francisco", state_id=state.id)
+        other_city = City(name="Reno", state_id="elsewhere")
+        wifi = Amenity(name="Wifi")
+        pool = Amenity(name="Pool")
+        places = [Place(name="Place {}".format(i), city_id=city_id,
+                        created_at=datetime(2017, 1, 1, 0, 0, 0, i))
+                  for i, city_id in enumerate([city.id, city.id,
+                                               other_city.id])]
+        for obj in [state, city, other_city, wifi, pool] + places:
+            models.storage.new(obj)
+        places[0].amenity_ids = [wifi.id, pool.id]
+        places[1].amenity_ids = [wifi.id]
+        places[2].amenity_ids = [wifi.id, pool.id]
+        search = models.storage.search_places
+        self.assertEqual(search(states=[state.id]), places[:2])
+        self.assertEqual(search(states=[state.id], cities=[other_city.id]),
+                         places)
+        self.assertEqual(search(amenities=[wifi.id, pool.id]),
+                         [places[0], places[2]])
+        self.assertEqual(search([state.id], [], [pool.id, wifi.id]),
+                         [places[0]])
+        places[0].amenity_ids = [pool.id]
+        self.assertEqual(search([state.id], [], [wifi.id]), [places[1]])
+        self.assertEqual(len(search()), models.storage.count(Place))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_page_range(self):
+        """Test that page_range filters and sorts on numeric ranges"""
+        prices = [1000003, 1000001, 1000004, 1000002, 1000001]
+        places = [Place(name="Place {}".format(i), price_by_night=price,
+                        max_guest=i, latitude=-80.0 - i,
+                        created_at=datetime(2017, 1, 1, 0, 0, 0, i))
+                  for i, price in enumerate(prices)]
+        for place in places:
+            models.storage.new(place)
+        page_range = models.storage.page_range
+        ranges = {"price_by_night": (1000001, 1000003)}
+        self.assertEqual(page_range(Place, ranges),
+                         [places[i] for i in (0, 1, 3, 4)])
+        by_price = page_range(Place, ranges, "price_by_night")
+        self.assertEqual(by_price, sorted([places[i] for i in (0, 1, 3, 4)],
+                                          key=lambda p: (p.price_by_night,
+                                                         p.id)))
+        first = page_range(Place, ranges, "price_by_night", 2)
+        last = first[-1]
+        rest = page_range(Place, ranges, "price_by_night", None,
+                          (last.price_by_night, last.id))
+        self.assertEqual(first + rest, by_price)
+        ranges["max_guest"] = (1, None)
+        self.assertEqual(page_range(Place, ranges, "price_by_night", 1),
+                         [min(places[1], places[4], key=lambda p: p.id)])
+        self.assertEqual(page_range(Place, {"latitude": (-83, -81)}),
+                         places[1:4])
+        places[2].latitude = -82.5
+        places[3].price_by_night = "free"
+        self.assertEqual(page_range(Place, {"latitude": (-82.9, -82)}),
+                         places[2:3])
+        self.assertEqual(page_range(Place, ranges), [places[1], places[4]])
+        models.storage.delete(places[1])
+        self.assertEqual(page_range(Place, ranges), [places[4]])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_within_bbox_and_nearest(self):
+        """Test the area queries, across the antimeridian too"""
+        coordinates = [(65.0, 179.9), (65.1, -179.9), (65.2, 179.0),
+                       (66.0, -179.5)]
+        places = [Place(name="Place {}".format(i), latitude=lat,
+                        longitude=lng,
+                        created_at=datetime(2017, 1, 1, 0, 0, 0, i))
+                  for i, (lat, lng) in enumerate(coordinates)]
+        for place in places:
+            models.storage.new(place)
+        within_bbox = models.storage.within_bbox
+        self.assertEqual(within_bbox(Place, 64.9, 179.5, 65.5, -179.5),
+                         places[:2])
+        self.assertEqual(within_bbox(Place, 64.9, 178.5, 66.5, 179.95),
+                         [places[0], places[2]])
+        self.assertEqual(within_bbox(Place, 64.9, 178.5, 66.5, 179.95, 1,
+                                     (places[0].created_at,
+                                      places[0].id)), [places[2]])
+        self.assertEqual(models.storage.nearest(Place, 65.04, 180.0, 3),
+                         places[:3])
+        places[3].latitude = 65.05
+        places[3].longitude = -179.95
+        self.assertEqual(models.storage.nearest(Place, 65.04, 180.0, 1),
+                         [places[3]])
+        models.storage.delete(places[0])
+        self.assertEqual(within_bbox(Place, 64.9, 179.5, 65.5, -179.5),
+                         [places[1], places[3]])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_search(self):
+        """Test that search ranks the texts saved, updated and deleted"""
+        place = Place(name="Cottage",
+                      description="Quiet cottage, quiet quokka garden")
+        review = Review(text="Saw a quokka in the garden")
+        other = Review(text="Noisy quokka")
+        for obj in (place, review, other):
+            models.storage.new(obj)
+        models.storage.save()
+        search = models.storage.search
+        self.assertEqual([obj for score, obj in search("quiet quokka")],
+                         [place, other, review])
+        self.assertEqual([obj for score, obj in search("quokka", Review)],
+                         [other, review])
+        review.text = "Noisy"
+        models.storage.delete(other)
+        models.storage.save()
+        self.assertEqual([obj for score, obj in search("quokka")], [place])
+        self.assertEqual([obj for score, obj in search("noisy")], [review])
+        self.assertEqual(search("the"), [])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_all_by_follows_new_and_delete(self):
+        """Test that all_by stays in sync with new, save and delete"""
+        state = State(name="California")
+        other = State(name="Nevada")
+        city = City(name="San Francisco", state_id=state.id)
+        for obj in [state, other, city]:
+            models.storage.new(obj)
+        key = "City." + city.id
+        self.assertEqual(models.storage.all_by(City, "state_id", state.id),
+                         {key: city})
+        self.assertEqual(state.cities, [city])
+        city.state_id = other.id
+        models.storage.save()
+        self.assertEqual(state.cities, [])
+        self.assertEqual(other.cities, [city])
+        models.storage.delete(city)
+        self.assertEqual(other.cities, [])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_all_with_class(self):
+        """Test that all(cls) returns exactly the objects of cls"""
+        models.storage.new(State(name="California"))
+        models.storage.new(City(name="San Francisco"))
+        expected = {key: obj for key, obj in models.storage.all().items()
+                    if type(obj) is State}
+        self.assertEqual(models.storage.all(State), expected)
+        self.assertEqual(models.storage.all("State"), expected)
+        self.assertEqual(models.storage.count(State), len(expected))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_all_include(self):
+        """Test that all(cls, include) returns the objects of all(cls) with
+        their relationships"""
+        state = State(name="California")
+        city = City(name="San Francisco", state_id=state.id)
+        models.storage.new(state)
+        models.storage.new(city)
+        states = models.storage.all(State, include=["cities"])
+        self.assertEqual(states, models.storage.all(State))
+        self.assertEqual(states["State." + state.id].cities, [city])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_bulk_new(self):
+        """Test that bulk_new stores and saves every object"""
+        objs = [State(name="State {}".format(i)) for i in range(5)]
+        models.storage.bulk_new(objs)
+        models.storage.reload()
+        for obj in objs:
+            self.assertEqual(models.storage.get(State, obj.id).name,
+                             obj.name)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_bulk_upsert(self):
+        """Test that bulk_upsert inserts new rows and updates stored ones"""
+        obj = State(name="California")
+        models.storage.new(obj)
+        models.storage.save()
+        created_at = obj.created_at
+        rows = [{"id": obj.id, "name": "Nevada"}, {"name": "Oregon"}]
+        self.assertEqual(models.storage.bulk_upsert(State, iter(rows)), 2)
+        self.assertIs(models.storage.get(State, obj.id), obj)
+        self.assertEqual(obj.name, "Nevada")
+        self.assertEqual(obj.created_at, created_at)
+        self.assertIn("State." + obj.id,
+                      models.storage.all_by(State, "name", "Nevada"))
+        self.assertNotIn("State." + obj.id,
+                         models.storage.all_by(State, "name", "California"))
+        models.storage.reload()
+        names = [state.name for state in models.storage.all(State).values()]
+        self.assertIn("Nevada", names)
+        self.assertIn("Oregon", names)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_transaction(self):
+        """Test that transaction saves once at the end or rolls back"""
+        obj = State(name="California")
+        obj.save()
+        with models.storage.transaction():
+            obj.name = "Nevada"
+            obj.save()
+            with open(file_path("file.json.journal"), "a+") as f:
+                f.seek(0)
+                self.assertNotIn("Nevada", f.read())
+        models.storage.reload()
+        self.assertEqual(models.storage.get(State, obj.id).name, "Nevada")
+        other = State(name="Oregon")
+        with self.assertRaises(ValueError):
+            with models.storage.transaction():
+                models.storage.get(State, obj.id).name = "Texas"
+                other.save()
+                raise ValueError()
+        self.assertEqual(models.storage.get(State, obj.id).name, "Nevada")
+        self.assertIsNone(models.storage.get(State, other.id))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_transaction_threads(self):
+        """Test that a transaction neither saves nor drops the changes of
+        the other threads"""
+        obj = State(name="California")
+        obj.save()
+        began = threading.Event()
+        end = threading.Event()
+
+        def rolled_back():
+            """changes obj in a transaction that fails"""
+            try:
+                with models.storage.transaction():
+                    obj.name = "Texas"
+                    began.set()
+                    end.wait(10)
+                    raise ValueError()
+            except ValueError:
+                pass
+
+        transaction = threading.Thread(target=rolled_back)
+        transaction.start()
+        self.assertTrue(began.wait(10))
+        other = State(name="Oregon")
+        models.storage.new(other)
+        save = threading.Thread(target=models.storage.save)
+        save.start()
+        save.join(0.2)
+        self.assertTrue(save.is_alive())
+        end.set()
+        transaction.join(10)
+        save.join(10)
+        saved = ""
+        for path in (file_path("file.json"), file_path("file.json.journal")):
+            if os.path.exists(path):
+                with open(path, "r") as f:
+                    saved += f.read()
+        self.assertIn("Oregon", saved)
+        self.assertNotIn("Texas", saved)
+        self.assertEqual(models.storage.get(State, obj.id).name, "California")
+        self.assertIs(models.storage.get(State, other.id), other)
+        models.storage.reload()
+        self.assertEqual(models.storage.get(State, other.id).name, "Oregon")
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_version(self):
+        """Test that version changes with the objects of its class only"""
+        obj = State(name="California")
+        version = models.storage.version(State)
+        amenity_version = models.storage.version(Amenity)
+        models.storage.new(obj)
+        self.assertNotEqual(models.storage.version(State), version)
+        version = models.storage.version(State)
+        self.assertEqual(models.storage.version(State), version)
+        obj.name = "Nevada"
+        self.assertNotEqual(models.storage.version(State), version)
+        version = models.storage.version(State)
+        models.storage.delete(obj)
+        self.assertNotEqual(models.storage.version(State), version)
+        self.assertEqual(models.storage.version(Amenity), amenity_version)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_version_saved(self):
+        """Test that the processes agree on the versions saved, kept by
+        reload() and compact() while their classes do not change"""
+        storage = FileStorage()
+        obj = State(name="California")
+        storage.new(obj)
+        storage.save()
+        version = storage.version(State)
+        amenity_version = storage.version(Amenity)
+        output = subprocess.run(
+            [sys.executable, "-c", "import models\n"
+             "from models.state import State\n"
+             "version, modified = models.storage.version(State)\n"
+             "print(version, modified.isoformat())"],
+            check=True, capture_output=True, text=True).stdout.split()
+        self.assertEqual(output, [str(version[0]), version[1].isoformat()])
+        storage.reload()
+        self.assertEqual(storage.version(State), version)
+        storage.compact()
+        storage.reload()
+        self.assertEqual(storage.version(State), version)
+        self.assertEqual(storage.version(Amenity), amenity_version)
+        storage.delete(obj)
+        storage.save()
+        self.assertGreater(storage.version(State)[0], version[0])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_two_processes(self):
+        """Test that the saves of two processes survive their compactions"""
+        def run(code):
+            """runs code in another process and returns its output"""
+            return subprocess.run(
+                [sys.executable, "-c", "import models\n"
+                 "from models.state import State\n" + code],
+                check=True, capture_output=True, text=True).stdout.split()
+        first = State(name="First of A")
+        first.save()
+        other, = run('state = State(name="Of B")\nstate.save()\n'
+                     'models.storage.compact()\nprint(state.id)')
+        # the journal A appended to was compacted and removed by B
+        second = State(name="Second of A")
+        second.save()
+        models.storage.compact()
+        with open(file_path("file.json")) as f:
+            data = json.load(f)
+        for id in (first.id, other, second.id):
+            self.assertIn("State." + id, data)
+        found = run("for id in {!r}:\n"
+                    "    print(models.storage.get(State, id) is not None)"
+                    .format([first.id, other, second.id]))
+        self.assertEqual(found, ["True"] * 3)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_save_journals_changed_objects(self):
+        """Test that save only journals changes and reload replays them"""
+        for i in range(5):
+            models.storage.new(State(name="State {}".format(i)))
+        obj = State(name="California")
+        models.storage.new(obj)
+        models.storage.compact()
+        key = "State." + obj.id
+        obj.name = "Nevada"
+        models.storage.save()
+        with open(file_path("file.json.journal"), "r") as f:
+            lines = [json.loads(line) for line in f]
+        # the versions of the classes, carried over by compact(), first
+        self.assertIn("State", lines[0])
+        self.assertEqual([list(line) for line in lines[1:]],
+                         [[key], ["State"]])
+        self.assertEqual(lines[1][key]["name"], "Nevada")
+        self.assertEqual(lines[2]["State"][0],
+                         models.storage.version(State)[0])
+        models.storage.all().pop(key)
+        models.storage.reload()
+        self.assertEqual(models.storage.all()[key].name, "Nevada")
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_reload_skips_torn_journal_record(self):
+        """Test that a record cut short by a crash does not stop replay"""
+        for i in range(5):
+            models.storage.new(State(name="State {}".format(i)))
+        models.storage.compact()
+        obj = State(name="California")
+        obj.save()
+        key = "State." + obj.id
+        with open(file_path("file.json.journal"), "a") as f:
+            f.write('{"State.torn": {"name": "Nev')
+        models.storage.all().pop(key)
+        models.storage.reload()
+        self.assertEqual(models.storage.all()[key].name, "California")
+        self.assertNotIn("State.torn", models.storage.all())
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_reload_unreadable_snapshot(self):
+        """Test that reload replays the journal alone when the snapshot is
+        not one"""
+        State(name="California").save()
+        FileStorage._FileStorage__binary = True
+        try:
+            models.storage.compact()
+        finally:
+            FileStorage._FileStorage__binary = False
+        obj = State(name="Nevada")
+        obj.save()
+        with open(file_path("file.bin"), "rb") as f:
+            data = f.read()
+        try:
+            for cut in (data[:10], b""):
+                with self.subTest(cut=cut):
+                    with open(file_path("file.bin"), "wb") as f:
+                        f.write(cut)
+                    models.storage.reload()
+                    self.assertEqual(
+                        models.storage.get(State, obj.id).name, "Nevada")
+        finally:
+            with open(file_path("file.bin"), "wb") as f:
+                f.write(data)
+            models.storage.reload()
+        models.storage.compact()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_compact_replaces_file_atomically(self):
+        """Test that compact writes every object and empties the journal"""
+        State(name="California").save()
+        models.storage.compact()
+        self.assertFalse(os.path.exists(file_path("file.json.tmp")))
+        self.assertFalse(os.path.exists(
+            file_path("file.json.journal.compacting")))
+        # but for the versions of the classes
+        with open(file_path("file.json.journal"), "r") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(all("." not in name for name in lines[0]))
+        with open(file_path("file.json"), "r") as f:
+            js = json.load(f)
+        self.assertEqual(set(js), set(models.storage.all()))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_lazy_reload(self):
+        """Test that a lazy reload builds objects only when they are used"""
+        for positions in [True, False]:
+            with self.subTest(positions=positions):
+                state = State(name="California")
+                city = City(name="San Francisco", state_id=state.id)
+                state.save()
+                city.save()
+                models.storage.compact()
+                if not positions:
+                    os.remove(file_path("file.json.positions"))
+                count = models.storage.count()
+                FileStorage._FileStorage__lazy = True
+                try:
+                    models.storage.reload()
+                finally:
+                    FileStorage._FileStorage__lazy = False
+                objects = FileStorage._FileStorage__objects
+                self.assertNotIn("State." + state.id, objects)
+                self.assertEqual(models.storage.count(), count)
+                loaded = models.storage.get(State, state.id)
+                self.assertEqual(loaded.name, "California")
+                self.assertIn("State." + state.id, objects)
+                self.assertNotIn("City." + city.id, objects)
+                self.assertEqual([c.id for c in loaded.cities], [city.id])
+                self.assertEqual(len(models.storage.all()), count)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_binary_snapshot(self):
+        """Test that objects survive the binary snapshot and the way back"""
+        for lazy in [False, True]:
+            with self.subTest(lazy=lazy):
+                state = State(name="California")
+                state.save()
+                other = State(id="not-a-uuid", name="Nevada")
+                other.save()
+                FileStorage._FileStorage__binary = True
+                try:
+                    models.storage.compact()
+                finally:
+                    FileStorage._FileStorage__binary = False
+                self.assertTrue(os.path.exists(file_path("file.bin")))
+                self.assertFalse(os.path.exists(file_path("file.json")))
+                count = models.storage.count()
+                FileStorage._FileStorage__lazy = lazy
+                try:
+                    models.storage.reload()
+                finally:
+                    FileStorage._FileStorage__lazy = False
+                self.assertEqual(models.storage.count(), count)
+                loaded = models.storage.get(State, state.id)
+                self.assertEqual(loaded.to_dict(), state.to_dict())
+                loaded = models.storage.get(State, other.id)
+                self.assertEqual(loaded.to_dict(), other.to_dict())
+                self.assertIsNone(models.storage.get(State, "missing"))
+                self.assertEqual(len(models.storage.all()), count)
+                models.storage.compact()
+                self.assertTrue(os.path.exists(file_path("file.json")))
+                self.assertFalse(os.path.exists(file_path("file.bin")))
+                models.storage.reload()
+                loaded = models.storage.get(State, state.id)
+                self.assertEqual(loaded.to_dict(), state.to_dict())
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_snapshot_convert(self):
+        """Test that snapshot.convert rewrites a snapshot in both formats"""
+        state = State(name="California")
+        state.save()
+        models.storage.compact()
+        with open(file_path("file.json"), "r") as f:
+            objects = json.load(f)
+        snapshot.convert(file_path("file.json"), file_path("file.json.bin"))
+        snapshot.convert(file_path("file.json.bin"),
+                         file_path("file.json.back"))
+        try:
+            with open(file_path("file.json.back"), "r") as f:
+                self.assertEqual(json.load(f), objects)
+        finally:
+            os.remove(file_path("file.json.bin"))
+            os.remove(file_path("file.json.back"))
+
+    def test_snapshot_convert_utc_offset(self):
+        """Test that snapshot.convert reads the timestamps with a UTC offset
+        as naive UTC, as the models do"""
+        with tempfile.TemporaryDirectory() as path:
+            src = os.path.join(path, "file.json")
+            with open(src, "w") as f:
+                json.dump({"State.1": {
+                    "__class__": "State", "id": "1", "name": "California",
+                    "created_at": "2017-01-01T00:00:00+02:00",
+                    "updated_at": "2017-01-01T00:00:00.000000"}}, f)
+            snapshot.convert(src, os.path.join(path, "file.bin"))
+            snapshot.convert(os.path.join(path, "file.bin"),
+                             os.path.join(path, "back.json"))
+            with open(os.path.join(path, "back.json")) as f:
+                attrs = json.load(f)["State.1"]
+        self.assertEqual(attrs["created_at"], "2016-12-31T22:00:00.000000")
+        self.assertEqual(attrs["updated_at"], "2017-01-01T00:00:00.000000")
+
+    def test_search_journal(self):
+        """Test that the search journal is only kept with a snapshot and is
+        compacted into it once it grows past JOURNAL_SIZE"""
+        texts = {"1": "quiet quokka", "2": "noisy quokka"}
+
+        def source():
+            """yields the texts indexed"""
+            return (("Review", id, text) for id, text in texts.items())
+
+        with tempfile.TemporaryDirectory() as path:
+            index = fulltext.FullText(os.path.join(path, "search"))
+            index.update([("Review", "3", "quokka")])
+            self.assertFalse(os.path.exists(index.path))
+            self.assertFalse(os.path.getsize(index.journal_path))
+            self.assertEqual(len(index.search("quokka", ["Review"], 10,
+                                              source)), 2)
+            other = fulltext.FullText(index.path)
+            with mock.patch.object(fulltext, "JOURNAL_SIZE", 0):
+                for i in range(100):
+                    other.update([("Review", str(i), "quokka " * 100)])
+                    self.assertLessEqual(os.path.getsize(index.journal_path),
+                                         os.path.getsize(index.path))
+            self.assertEqual(len(index.search("quokka", ["Review"], 1000,
+                                              source)), 100)
+            self.assertEqual(index.search("quiet", ["Review"], 10, source),
+                             [])